@@ -0,0 +1,4 @@
+"""
+Benchmarks of Hungry Homer. Run them from the repository directory,
+e.g. `python -m benchmarks.collisions`.
+"""
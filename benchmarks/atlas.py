@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""
+Compares object images packed into the texture atlas (cached or built
+again) with images loaded by pyglet.resource (as before the atlas) and
+with a texture of each image: the time to load them, to set up a level
+(its sprites and batches) and to draw a frame of it, and the number of
+sprite groups (i. e. of texture switches) in its batches.
+
+Usage: python -m benchmarks.atlas [--headless] [--frames N] [--level I]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import pyglet
+
+
+def cached_atlas():
+    """Returns the regions of the cached atlas."""
+    from hungry_homer import atlas
+
+    return atlas.load()
+
+
+def built_atlas():
+    """Returns the regions of the atlas built again (without saving it)."""
+    from hungry_homer import atlas
+
+    read, save = atlas.read, atlas.save
+    atlas.read = lambda hash_: None
+    atlas.save = lambda *args: None
+    try:
+        return atlas.load()
+    finally:
+        atlas.read, atlas.save = read, save
+
+
+def resource_images():
+    """Returns the images loaded by pyglet.resource."""
+    from hungry_homer import atlas
+
+    pyglet.resource.path = ["@hungry_homer.resources_dir"]
+    pyglet.resource.reindex()
+    return {
+        name: pyglet.resource.image(name + ".png") for name in atlas.NAMES
+        }
+
+
+def separate_textures():
+    """Returns a texture of each image."""
+    from hungry_homer import atlas
+
+    return {
+        name: pyglet.image.load(
+            os.path.join(atlas.directory, name + ".png")
+            ).get_texture()
+        for name in atlas.NAMES
+        }
+
+
+def group_count(level):
+    """Returns the number of sprite groups in the batches of a level."""
+    batches = [level.batch, level.watcher_batch] + [
+        chunk.batch for chunk in level.chunks.values()
+        ]
+    return sum(len(batch.group_map) for batch in batches)
+
+
+def measure(window, loader, level_index, frames):
+    """
+    Returns the times (in ms) to load the images, to set up a level and
+    the median time to draw a frame of it, and its number of groups.
+    """
+    from hungry_homer import objects, states
+
+    start = time.perf_counter()
+    regions = loader()
+    loading = time.perf_counter() - start
+    objects.images.clear()
+    objects.images.regions = regions
+
+    start = time.perf_counter()
+    level = states.Level(window, window.maps[level_index], level_index)
+    setup = time.perf_counter() - start
+    window.state = level
+
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        window.switch_to()
+        window.clear()
+        level.draw()
+        # (wait until it's drawn)
+        pyglet.gl.glFinish()
+        times.append(time.perf_counter() - start)
+    groups = group_count(level)
+    level.delete()
+    window.state = window.menu
+    return (
+        loading * 1000, setup * 1000, statistics.median(times) * 1000, groups
+        )
+
+
+def main():
+    """Prints the times of the ways of loading images."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--headless", action="store_true",
+                        help="use pyglet without a display (EGL)")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--level", type=int, default=3,
+                        help="index of the level (the arena by default)")
+    arguments = parser.parse_args()
+    pyglet.options["headless"] = arguments.headless
+    from hungry_homer import game
+
+    window = game.Game()
+    # (the first level opened also sets up things of pyglet)
+    measure(window, cached_atlas, arguments.level, 10)
+    print(
+        f"{'images':18}  {'load ms':>8}  {'setup ms':>8}  {'frame ms':>8}"
+        + f"  {'groups':>6}"
+        )
+    for name, loader in (
+            ("atlas (cached)", cached_atlas), ("atlas (built)", built_atlas),
+            ("pyglet.resource", resource_images),
+            ("texture each", separate_textures)
+            ):
+        loading, setup, frame, groups = measure(
+            window, loader, arguments.level, arguments.frames
+            )
+        print(
+            f"{name:18}  {loading:8.2f}  {setup:8.2f}  {frame:8.3f}"
+            + f"  {groups:6}"
+            )
+    window.close()
+
+if __name__ == "__main__":
+    main()
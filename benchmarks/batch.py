@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Compares the speed of simulations one by one and of a batch simulation
+of many instances in agent-steps (ticks of one instance) per second
+(tests/test_batch.py checks that they give the same results).
+
+Usage: python -m benchmarks.batch [instance counts...]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from hungry_homer import batch, maps as level_maps, simulation
+from benchmarks import maps
+
+
+def random_inputs(count, ticks, seed=0):
+    """
+    Returns arrows pressed in count instances for ticks (each player
+    keeps pressing one for a while).
+    """
+    generator = random.Random(seed)
+    inputs = np.empty((ticks, count), dtype=np.int64)
+    directions = [4] * count
+    for tick in range(ticks):
+        for i in range(count):
+            if generator.random() < 0.03:
+                directions[i] = generator.choice([0, 1, 2, 3, 4, 4])
+        inputs[tick] = directions
+    return inputs
+
+
+def agent_steps_per_second(map_, count, ticks=200):
+    """
+    Returns agent-steps per second of simulations one by one (at most
+    100 of them, their speed doesn't depend on the count) and of a batch
+    simulation of count instances.
+    """
+    inputs = random_inputs(count, ticks)
+    levels = [simulation.Simulation(map_) for _ in range(min(count, 100))]
+    start = time.perf_counter()
+    for tick in range(ticks):
+        for i, level in enumerate(levels):
+            level.step(int(inputs[tick, i]))
+    one_by_one = len(levels) * ticks / (time.perf_counter() - start)
+
+    batch_simulation = batch.BatchSimulation(map_, count)
+    start = time.perf_counter()
+    for tick in range(ticks):
+        batch_simulation.step(inputs[tick])
+    batched = count * ticks / (time.perf_counter() - start)
+    return one_by_one, batched
+
+
+def main():
+    """Prints the speed of the batch simulation."""
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 4000]
+    levels = level_maps.Maps("hungry_homer.level_maps", 32, 24)
+    tested = [(path, levels[i]) for i, path in enumerate(levels.paths)]
+    tested.append(("arena (30 watchers)", maps.arena(32, 24, 30)))
+    print(f"{'map':20}  {'count':>5}  {'one by one':>10}  {'batch':>10}")
+    for name, map_ in tested:
+        for count in counts:
+            one_by_one, batched = agent_steps_per_second(map_, count)
+            print(f"{name:20}  {count:5}  {one_by_one:10.0f}  {batched:10.0f}")
+
+if __name__ == "__main__":
+    main()
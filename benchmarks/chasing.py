@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""
+Compares ticks per second of simulations with many chasing watchers
+finding their ways in the shared distance field (searched once after
+Homer gets to another cell, only as far as they are) and by a whole
+search of the map each time one of them decides.
+
+Usage: python -m benchmarks.chasing [ticks]
+"""
+
+import random
+import sys
+import time
+
+from hungry_homer import distancefield, simulation
+from benchmarks import maps
+
+
+class SearchEachTime(distancefield.DistanceField):
+    """Distance field searched again for every decision."""
+
+    def direction(self, index, direction_i):
+        """Searches the whole map, then finds the direction."""
+        target = self.target
+        self.target = None
+        self.set_target(target)
+        # (the corner is a brick in these maps, so it searches them all)
+        self.distance(self.size - 1)
+        return super().direction(index, direction_i)
+
+
+def chasing(map_):
+    """Returns the map with all the watchers replaced by chasing ones."""
+    watchers = simulation.CIRCULAR_WATCHERS + simulation.LINEAR_WATCHERS
+    return [
+        [simulation.CHASING_WATCHER if symbol in watchers else symbol
+         for symbol in row]
+        for row in map_
+        ]
+
+
+def ticks_per_second(map_, field_class, ticks):
+    """
+    Returns how many ticks per second a simulation with the given
+    distance field runs (Homer is invincible and moves randomly).
+    """
+    level = simulation.Simulation(map_)
+    level.homer_distances = field_class(level.walkability)
+    level.objects["homer"][0].invincible = True
+    generator = random.Random(0)
+    directions = []
+    while len(directions) < ticks:
+        directions += [generator.randrange(5)] * generator.randrange(1, 120)
+    start = time.perf_counter()
+    for direction_i in directions[:ticks]:
+        level.step(direction_i)
+    return ticks / (time.perf_counter() - start)
+
+
+def main():
+    """Prints ticks per second in an arena and mazes."""
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tested = [
+        ("arena 32x24, 30", maps.arena(32, 24, 30)),
+        ("maze 31x23, 30", maps.maze(31, 23, 30)),
+        ("maze 63x47, 100", maps.maze(63, 47, 100))
+        ]
+    print(f"{'map, chasers':20}  {'shared':>8}  {'search':>8}")
+    for name, map_ in tested:
+        map_ = chasing(map_)
+        shared = ticks_per_second(map_, distancefield.DistanceField, ticks)
+        searching = ticks_per_second(map_, SearchEachTime, ticks)
+        print(f"{name:20}  {shared:8.0f}  {searching:8.0f}")
+
+if __name__ == "__main__":
+    main()
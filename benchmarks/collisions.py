@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+"""
+Measures simulation ticks per second depending on the number of
+watchers (whose collisions dominate the tick on crowded maps).
+
+Usage: python -m benchmarks.collisions [watcher counts...]
+"""
+
+import sys
+import time
+
+from hungry_homer import simulation
+from benchmarks import maps
+
+
+def ticks_per_second(map_, ticks=1000):
+    """Returns how many ticks per second a simulation of a map runs."""
+    level = simulation.Simulation(map_)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        level.step()
+    return ticks / (time.perf_counter() - start)
+
+
+def main():
+    """Prints ticks per second for increasing watcher counts."""
+    watcher_counts = [int(arg) for arg in sys.argv[1:]] or [
+        10, 50, 100, 200, 400, 800
+        ]
+    print("watchers  ticks/s")
+    for watcher_count in watcher_counts:
+        map_ = maps.arena(80, 60, watcher_count)
+        print(f"{watcher_count:8}  {ticks_per_second(map_):7.0f}")
+
+if __name__ == "__main__":
+    main()
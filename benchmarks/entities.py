@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""
+Measures memory of simulation entities (as traced by tracemalloc):
+bytes per entity of maps full of food and of the level maps.
+
+Usage: python -m benchmarks.entities [width] [height]
+"""
+
+import sys
+import tracemalloc
+
+from hungry_homer import maps, simulation
+from benchmarks import maps as generated_maps
+
+
+def entity_memory(map_):
+    """
+    Returns the number of entities of a map and bytes allocated
+    for them (when the simulation sets them up).
+    """
+    level = simulation.Simulation(map_)
+    tracemalloc.start()
+    level.setup_objects()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # (the entities set up before are freed during the measurement,
+    # the new ones are what's left)
+    count = (
+        len(level.objects["homer"]) + len(level.objects["watchers"])
+        + len(level.objects["gate"]) + len(level.all_collectibles)
+        )
+    return count, size
+
+
+def main():
+    """Prints memory of the entities of several maps."""
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    levels = maps.Maps("hungry_homer.level_maps", 32, 24)
+    tested = {
+        f"food {width}x{height}": generated_maps.arena(
+            width, height, 100, food=True
+            ),
+        "food 32x24": generated_maps.arena(32, 24, 10, food=True)
+        }
+    for i, path in enumerate(levels.paths):
+        tested[path] = levels[i]
+    print(f"{'map':16}  {'entities':>8}  {'KiB':>8}  {'B/entity':>8}")
+    for name, map_ in tested.items():
+        count, size = entity_memory(map_)
+        print(
+            f"{name:16}  {count:8}  {size / 1024:8.0f}  {size / count:8.0f}"
+            )
+
+if __name__ == "__main__":
+    main()
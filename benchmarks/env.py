@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+"""
+Measures throughput of the environments in env-steps per second: of
+one environment, and of vector environments stepped in this process
+and in worker processes.
+
+Usage: python -m benchmarks.env [ticks per step] [steps]
+"""
+
+import os
+import random
+import sys
+import time
+
+from hungry_homer import env
+
+
+def env_steps_per_second(count, processes, ticks_per_step, steps):
+    """Returns env-steps per second of a vector environment."""
+    generator = random.Random(0)
+    vector_env = env.VectorEnv(
+        count, processes=processes, ticks_per_step=ticks_per_step
+        )
+    vector_env.reset(seed=0)
+    actions = [
+        [generator.randrange(env.ACTION_COUNT) for _ in range(count)]
+        for _ in range(steps)
+        ]
+    start = time.perf_counter()
+    for step_actions in actions:
+        vector_env.step(step_actions)
+    result = count * steps / (time.perf_counter() - start)
+    vector_env.close()
+    return result
+
+
+def main():
+    """Prints env-steps per second for several configurations."""
+    ticks_per_step = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(f"{ticks_per_step} tick(s) per step, {os.cpu_count()} CPU(s)")
+    print(f"{'envs':>5}  {'processes':>9}  {'env-steps/s':>11}")
+    for count, processes in ((1, 0), (64, 0), (64, 2), (64, 4)):
+        result = env_steps_per_second(
+            count, processes, ticks_per_step, steps
+            )
+        print(f"{count:5}  {processes:9}  {result:11.0f}")
+
+if __name__ == "__main__":
+    main()
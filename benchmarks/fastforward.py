@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""
+Compares ticks per second of stepping a simulation tick by tick and of
+fast-forwarding it (the player keeps pressing random arrows for random
+numbers of ticks, the same ones in both cases).
+
+Usage: python -m benchmarks.fastforward [segments]
+"""
+
+import random
+import sys
+import time
+
+from hungry_homer import fastforward, maps as level_maps, simulation
+from benchmarks import maps
+
+
+def ticks_per_second(map_, advance, segments=100):
+    """Returns how many ticks per second advance runs a simulation."""
+    generator = random.Random(0)
+    level = simulation.Simulation(map_)
+    ticks = 0
+    start = time.perf_counter()
+    for _ in range(segments):
+        direction_i = generator.choice([0, 1, 2, 3, 4, 4])
+        segment_ticks = generator.choice([30, 100, 400])
+        advance(level, segment_ticks, direction_i)
+        ticks += segment_ticks
+    return ticks / (time.perf_counter() - start)
+
+
+def step(level, ticks, direction_i):
+    """Advances the simulation by stepping each tick."""
+    for _ in range(ticks):
+        level.step(direction_i)
+
+
+def main():
+    """Prints ticks per second of the levels and a crowded arena."""
+    segments = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    levels = level_maps.Maps("hungry_homer.level_maps", 32, 24)
+    tested = [(path, levels[i]) for i, path in enumerate(levels.paths)]
+    tested.append(("arena (30 watchers)", maps.arena(32, 24, 30)))
+    print(f"{'map':20}  {'step':>8}  {'forward':>8}")
+    for name, map_ in tested:
+        stepped = ticks_per_second(map_, step, segments)
+        forwarded = ticks_per_second(map_, fastforward.advance, segments)
+        print(f"{name:20}  {stepped:8.0f}  {forwarded:8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of loading many levels: a synthetic set of generated maps
+(arenas and mazes) saved as text files and compiled into a level pack.
+Each way of loading runs in a fresh process, which reports the time
+and the growth of its resident memory (peak RSS):
+
+all text    every text map read and padded at startup
+pack        the pack memory-mapped at startup
+
+and then the time to get a level (read a text map or decode it from
+the pack) when it's opened.
+
+Usage: python -m benchmarks.levelpack [--levels N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+from hungry_homer import levelpack, maps as level_maps
+from benchmarks import maps
+
+GRID_WIDTH = 32
+GRID_HEIGHT = 24
+
+
+def generate(count):
+    """Returns count maps (half of them arenas, half mazes)."""
+    result = []
+    for i in range(count):
+        rng = random.Random(i)
+        # (odd sizes, so mazes are surrounded by bricks)
+        width = 2 * rng.randrange(8, GRID_WIDTH // 2) + 1
+        height = 2 * rng.randrange(6, GRID_HEIGHT // 2) + 1
+        if i % 2:
+            map_ = maps.arena(width, height, rng.randrange(10), i, food=True)
+        else:
+            map_ = maps.maze(width, height, rng.randrange(10), i)
+        result.append(map_)
+    return result
+
+
+def resident():
+    """Returns the peak resident memory of the process in KiB."""
+    # (kilobytes on Linux, bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def read_text(path):
+    """Reads a text map as Maps do."""
+    with open(path) as file:
+        return level_maps.pad(level_maps.parse(file), GRID_WIDTH, GRID_HEIGHT)
+
+
+def load_text(directory, queue):
+    """Reads all the text maps in a directory, reports time and memory."""
+    before = resident()
+    start = time.perf_counter()
+    loaded = [
+        read_text(os.path.join(directory, path))
+        for path in sorted(os.listdir(directory))
+        ]
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, resident() - before, len(loaded)))
+
+
+def load_pack(path, queue):
+    """Opens a pack, reports time and memory."""
+    before = resident()
+    start = time.perf_counter()
+    pack = levelpack.LevelPack(path, GRID_WIDTH, GRID_HEIGHT)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, resident() - before, len(pack)))
+    pack.close()
+
+
+def measure(function, *arguments):
+    """Runs a function in a fresh process, returns what it reported."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=function, args=(*arguments, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    """Generates the levels and measures loading them."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--levels", type=int, default=10000)
+    arguments = parser.parse_args()
+
+    maps_ = generate(arguments.levels)
+    with tempfile.TemporaryDirectory() as directory:
+        text_directory = os.path.join(directory, "maps")
+        os.mkdir(text_directory)
+        for i, map_ in enumerate(maps_):
+            path = os.path.join(text_directory, f"{i:06}.txt")
+            with open(path, "w") as file:
+                file.writelines("".join(row) + "\n" for row in reversed(map_))
+        pack_path = os.path.join(directory, "levels.hhlp")
+        start = time.perf_counter()
+        levelpack.write(maps_, pack_path)
+        built = time.perf_counter() - start
+        text_size = sum(
+            os.path.getsize(os.path.join(text_directory, path))
+            for path in os.listdir(text_directory)
+            )
+        print(
+            f"{len(maps_)} levels, text {text_size / 1024:.0f} KiB,"
+            + f" pack {os.path.getsize(pack_path) / 1024:.0f} KiB"
+            + f" (built in {built:.2f} s)"
+            )
+
+        print(f"{'startup':>8}  {'ms':>9}  {'RSS KiB':>8}")
+        for name, function, argument in (
+            ("all text", load_text, text_directory),
+            ("pack", load_pack, pack_path)
+            ):
+            elapsed, memory, count = measure(function, argument)
+            assert count == len(maps_)
+            print(f"{name:>8}  {elapsed * 1000:9.2f}  {memory:8}")
+
+        # opening levels in random order
+        indices = random.Random(0).sample(range(len(maps_)), 1000)
+        paths = sorted(os.listdir(text_directory))
+        start = time.perf_counter()
+        for i in indices:
+            read_text(os.path.join(text_directory, paths[i]))
+        text_time = (time.perf_counter() - start) / len(indices)
+        pack = levelpack.LevelPack(pack_path, GRID_WIDTH, GRID_HEIGHT)
+        start = time.perf_counter()
+        for i in indices:
+            pack[i]
+        pack_time = (time.perf_counter() - start) / len(indices)
+        for i in indices[:100]:
+            assert pack[i] == read_text(os.path.join(text_directory, paths[i]))
+        pack.close()
+        print(
+            f"opening a level: text {text_time * 1e6:.0f} µs,"
+            + f" pack {pack_time * 1e6:.0f} µs"
+            )
+
+if __name__ == "__main__":
+    main()
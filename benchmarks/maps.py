@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""Generated maps for benchmarks."""
+
+import random
+
+from hungry_homer import simulation
+
+
+def arena(width, height, watcher_count, seed=0, food=False):
+    """
+    Returns a map (rows of symbols from bottom to top) of an open arena
+    surrounded by bricks with Homer, the gate and randomly placed
+    watchers (and food on all the other free positions if food).
+    """
+    rng = random.Random(seed)
+    map_ = [["X"] * width]
+    for _ in range(height - 2):
+        map_.append(["X"] + [" "] * (width - 2) + ["X"])
+    map_.append(["X"] * width)
+    map_[-1][width // 2] = "/"
+    map_[1][1] = "H"
+
+    free = [
+        (j, i)
+        for i in range(1, height - 1) for j in range(1, width - 1)
+        if map_[i][j] == " "
+        ]
+    symbols = simulation.CIRCULAR_WATCHERS + simulation.LINEAR_WATCHERS
+    for j, i in rng.sample(free, watcher_count):
+        map_[i][j] = rng.choice(symbols)
+    if food:
+        for j, i in free:
+            if map_[i][j] == " ":
+                map_[i][j] = "*"
+    return map_
+
+
+def maze(width, height, watcher_count, seed=0, loops=0.1):
+    """
+    Returns a map of a maze (corridors between bricks, with loops as
+    the fraction of walls between corridors removed) with Homer in
+    the bottom left corner, the gate in the top right one, the key,
+    randomly placed watchers and food in all the other corridors.
+    """
+    rng = random.Random(seed)
+    map_ = [["X"] * width for _ in range(height)]
+    # carve corridors between cells with odd coordinates (depth-first)
+    map_[1][1] = " "
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        neighbours = [
+            (x + dx, y + dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+            if 0 < x + dx < width - 1 and 0 < y + dy < height - 1
+            and map_[y + dy][x + dx] == "X"
+            ]
+        if not neighbours:
+            stack.pop()
+            continue
+        next_x, next_y = rng.choice(neighbours)
+        map_[(y + next_y) // 2][(x + next_x) // 2] = " "
+        map_[next_y][next_x] = " "
+        stack.append((next_x, next_y))
+    for y in range(1, height - 1):
+        for x in range(1, width - 1):
+            if (
+                map_[y][x] == "X" and rng.random() < loops
+                and (
+                    map_[y][x - 1] == map_[y][x + 1] == " "
+                    or map_[y - 1][x] == map_[y + 1][x] == " "
+                    )
+                ):
+                map_[y][x] = " "
+
+    free = [
+        (x, y) for y in range(1, height - 1) for x in range(1, width - 1)
+        if map_[y][x] == " "
+        ]
+    map_[1][1] = "H"
+    gate = max(free, key=lambda position: position[0] + position[1])
+    map_[gate[1]][gate[0]] = "/"
+    free = [(x, y) for x, y in free if map_[y][x] == " "]
+    symbols = simulation.CIRCULAR_WATCHERS + simulation.LINEAR_WATCHERS
+    positions = rng.sample(free, watcher_count + 1)
+    x, y = positions.pop()
+    map_[y][x] = "_"
+    for x, y in positions:
+        map_[y][x] = rng.choice(symbols)
+    for x, y in free:
+        if map_[y][x] == " ":
+            map_[y][x] = "*"
+    return map_
+
+
+def generate(width, height, walls=0.15, food_count=None, watcher_count=10,
+             bell_count=1, seed=0):
+    """
+    Returns a map surrounded by bricks, with bricks in a walls fraction
+    of the other cells, Homer in the bottom left corner and the gate,
+    the key, bells, watchers and food (on all the other cells if
+    food_count is None) placed randomly in the cells Homer can get to.
+    """
+    rng = random.Random(seed)
+    map_ = [["X"] * width]
+    for _ in range(height - 2):
+        map_.append(["X"] + [
+            "X" if rng.random() < walls else " " for _ in range(width - 2)
+            ] + ["X"])
+    map_.append(["X"] * width)
+    map_[1][1] = "H"
+
+    # cells Homer can get to (in the order they're found)
+    reachable = []
+    found = {(1, 1)}
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack.pop()
+        for next_x, next_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (
+                map_[next_y][next_x] == " "
+                and (next_x, next_y) not in found
+                ):
+                found.add((next_x, next_y))
+                reachable.append((next_x, next_y))
+                stack.append((next_x, next_y))
+    rng.shuffle(reachable)
+    if food_count is None:
+        food_count = max(len(reachable) - 2 - bell_count - watcher_count, 0)
+    symbols = (
+        ["/", "_"] + ["b"] * bell_count
+        + [
+            rng.choice(simulation.CIRCULAR_WATCHERS
+                       + simulation.LINEAR_WATCHERS)
+            for _ in range(watcher_count)
+            ]
+        + ["*"] * food_count
+        )
+    if len(symbols) > len(reachable):
+        raise ValueError(
+            f"{len(symbols)} entities don't fit in {len(reachable)} cells"
+            )
+    for (x, y), symbol in zip(reachable, symbols):
+        map_[y][x] = symbol
+    return map_
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the level menu with a big level pack (the levels of the
+game over and over): the time to create the menu, to update it each
+tick, to move the selection down by one level (the whole pack is
+scrolled through) and to draw it.
+
+Usage: python -m benchmarks.menu [--headless] [--levels N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pyglet
+
+try:
+    from importlib import resources
+# for Python < 3.7
+except ImportError:
+    import importlib_resources as resources
+
+
+def draw(window):
+    """Draws a frame (waiting until it's drawn)."""
+    window.switch_to()
+    window.on_draw()
+    pyglet.gl.glFinish()
+    window.flip()
+
+
+def main():
+    """Creates the menu of a big pack and measures it."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--headless", action="store_true",
+                        help="use pyglet without a display (EGL)")
+    parser.add_argument("--levels", type=int, default=10000)
+    arguments = parser.parse_args()
+    pyglet.options["headless"] = arguments.headless
+    from hungry_homer import game, levelpack, maps, states
+
+    location = "hungry_homer.level_maps"
+    levels = []
+    for path in sorted(resources.contents(location)):
+        if path.endswith(".txt"):
+            with resources.open_text(location, path) as file:
+                levels.append(maps.parse(file))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "levels.hhlp")
+        levelpack.write(
+            [levels[i % len(levels)] for i in range(arguments.levels)], path
+            )
+        window = game.Game()
+        window.maps = levelpack.LevelPack(
+            path, window.grid_width, window.grid_height
+            )
+
+        start = time.perf_counter()
+        window.menu = window.state = states.Menu(window)
+        created = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(1200):
+            window.tick()
+        ticked = (time.perf_counter() - start) / 1200
+
+        selected = drawn = 0
+        for _ in range(arguments.levels - 1):
+            start = time.perf_counter()
+            window.on_key_press(window.key.DOWN, 0)
+            selected += time.perf_counter() - start
+            start = time.perf_counter()
+            draw(window)
+            drawn += time.perf_counter() - start
+        assert window.menu.selected_i == arguments.levels - 1
+        window.close()
+
+    count = arguments.levels - 1
+    print(f"{arguments.levels} levels")
+    print(f"creating the menu  {created * 1000:9.2f} ms")
+    print(f"tick               {ticked * 1000:9.3f} ms")
+    print(f"selecting a level  {selected / count * 1000:9.3f} ms")
+    print(f"frame              {drawn / count * 1000:9.3f} ms")
+
+if __name__ == "__main__":
+    main()
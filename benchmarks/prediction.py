@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""
+Compares the time of stepping a simulation (with an invincible Homer
+standing still) with the time of predicting its watchers and of queries
+of random ticks (tests/test_prediction.py checks the predictions against
+stepping).
+
+Usage: python -m benchmarks.prediction [ticks]
+"""
+
+import random
+import sys
+import time
+
+from hungry_homer import maps as level_maps, prediction, simulation
+from benchmarks import maps
+
+
+def stepped(map_):
+    """Returns a simulation in which Homer can't be bumped."""
+    level = simulation.Simulation(map_)
+    level.objects["homer"][0].invincible = True
+    return level
+
+
+def main():
+    """Prints the times of the levels and of generated maps."""
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    levels = level_maps.Maps("hungry_homer.level_maps", 32, 24)
+    tested = [(path, levels[i]) for i, path in enumerate(levels.paths)]
+    tested += [
+        (f"{count} watchers", maps.generate(64, 48, watcher_count=count))
+        for count in (50, 300)
+        ]
+    tested.append(("maze (40 watchers)", maps.maze(31, 23, 40)))
+    print(
+        f"{'map':20}  {'step s':>7}  {'predict s':>9}"
+        + f"  {'query us':>8}  {'period':>6}"
+        )
+    generator = random.Random(0)
+    for name, map_ in tested:
+        level = stepped(map_)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            level.step()
+        stepping = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predictor = prediction.Predictor(map_)
+        # (and whether they repeat by then)
+        predictor.phase(ticks)
+        predicting = time.perf_counter() - start
+
+        # (queries of the whole map, the paths are traced already)
+        count = len(predictor.watchers)
+        queries = [
+            (generator.randrange(count), generator.randrange(ticks))
+            for _ in range(10000)
+            ] if count else []
+        start = time.perf_counter()
+        for i, tick in queries:
+            predictor.position(i, tick)
+        query = (time.perf_counter() - start) / max(len(queries), 1)
+        print(
+            f"{name:20}  {stepping:7.3f}  {predicting:9.3f}"
+            + f"  {query * 1e6:8.2f}  {predictor.period or '-':>6}"
+            )
+
+if __name__ == "__main__":
+    main()
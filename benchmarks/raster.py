@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""
+Measures frames per second of the software renderer: full frames,
+frames drawing only changed cells, and downsampled channel grids
+(of levels played with random input).
+
+Usage: python -m benchmarks.raster [frames]
+"""
+
+import random
+import sys
+import time
+
+from hungry_homer import maps, raster, simulation
+
+
+def frames_per_second(map_, render, frames, images):
+    """
+    Returns frames per second of render(rasterizer) called after each
+    tick of a simulation.
+    """
+    generator = random.Random(0)
+    level = simulation.Simulation(map_)
+    rasterizer = raster.Rasterizer(level, images)
+    direction_i = 4
+    elapsed = 0
+    for _ in range(frames):
+        if generator.random() < 0.05:
+            direction_i = generator.choice([0, 1, 2, 3, 4, 4])
+        level.step(direction_i)
+        start = time.perf_counter()
+        render(rasterizer)
+        elapsed += time.perf_counter() - start
+    return frames / elapsed
+
+
+def main():
+    """Prints frames per second of the levels."""
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    images = raster.load_images()
+    levels = maps.Maps("hungry_homer.level_maps", 32, 24)
+    renders = {
+        "full": lambda rasterizer: rasterizer.render(full=True),
+        "changed cells": lambda rasterizer: rasterizer.render(),
+        "channels": lambda rasterizer: rasterizer.channels()
+        }
+    print(f"{'map':8}" + "".join(f"  {name:>13}" for name in renders))
+    for i, path in enumerate(levels.paths):
+        print(f"{path:8}" + "".join(
+            f"  {frames_per_second(levels[i], render, frames, images):13.0f}"
+            for render in renders.values()
+            ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Stress test of restarting levels: Homer loses in a level over and over
+(so it's restarted), and a level is left and opened again from the
+menu over and over. Memory allocated by Python (as traced by
+tracemalloc) and the number of vertices in the level batches should
+stay flat.
+
+Usage: python -m benchmarks.restart [--headless] [--restarts N] [--level I]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import pyglet
+
+
+def vertex_count(batch):
+    """Returns the number of vertices allocated in a batch."""
+    return sum(
+        sum(domain.allocator.sizes)
+        for group in batch.group_map.values()
+        for domain in group.values()
+        )
+
+
+def level_vertex_count(level):
+    """
+    Returns the number of vertices in all the batches of a level (Homer,
+    watchers and the chunks of things that don't move).
+    """
+    batches = [level.batch, level.watcher_batch] + [
+        chunk.batch for chunk in level.chunks.values()
+        ]
+    return sum(vertex_count(batch) for batch in batches)
+
+
+def draw(window):
+    """
+    Draws a frame (as the event loop does, which also deletes OpenGL
+    buffers of deleted batches).
+    """
+    window.switch_to()
+    window.on_draw()
+    window.flip()
+
+
+def lose(window):
+    """Makes Homer lose, so the level gets restarted in the next tick."""
+    homer = window.state.simulation.objects["homer"][0]
+    homer.lost = True
+    homer.opacity = 0
+    window.tick()
+
+
+def reopen(window):
+    """Leaves the level and opens it again from the menu."""
+    window.on_key_press(window.key.ESCAPE, 0)
+    window.menu.open()
+    window.tick()
+
+
+def measure(window, action, count, level_index):
+    """
+    Prints memory after every count // 10 calls of action(window) (each
+    followed by drawing a frame) in a level and the time per call.
+    """
+    window.menu.select_level(level_index)
+    window.menu.open()
+    gc.collect()
+    tracemalloc.start()
+    elapsed = 0
+    for i in range(1, count + 1):
+        start = time.perf_counter()
+        action(window)
+        elapsed += time.perf_counter() - start
+        draw(window)
+        if i % (count // 10) == 0:
+            gc.collect()
+            print(
+                f"{i:8}  {tracemalloc.get_traced_memory()[0] / 1024:10.0f}"
+                + f"  {level_vertex_count(window.state):8}"
+                )
+    tracemalloc.stop()
+    print(f"{elapsed / count * 1000:.2f} ms per {action.__name__}")
+    window.on_key_press(window.key.ESCAPE, 0)
+
+
+def main():
+    """Runs the stress tests."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--headless", action="store_true",
+                        help="use pyglet without a display (EGL)")
+    parser.add_argument("--restarts", type=int, default=10000)
+    parser.add_argument("--level", type=int, default=3,
+                        help="index of the level (the arena by default)")
+    arguments = parser.parse_args()
+    pyglet.options["headless"] = arguments.headless
+    from hungry_homer import game
+
+    window = game.Game()
+    for action in (lose, reopen):
+        print(f"{action.__name__:>8}  {'KiB':>10}  {'vertices':>8}")
+        measure(window, action, arguments.restarts, arguments.level)
+    window.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of levels in generated mazes of increasing size: Homer walks
+around (in randomly changing directions) and the time per frame is
+split into the simulation tick, the update of the sprites and drawing.
+The camera follows Homer, so the time of the sprites and of drawing
+should stay about the same however big the map is.
+
+Usage: python -m benchmarks.scrolling [--headless] [--ticks N]
+"""
+
+import argparse
+import random
+import time
+
+import pyglet
+
+from benchmarks import maps
+
+SIZES = ((32, 24), (64, 48), (128, 96), (256, 192), (512, 384))
+
+
+def directions(count, seed=0):
+    """Returns count directions, each held for up to a second."""
+    rng = random.Random(seed)
+    result = []
+    while len(result) < count:
+        result.extend([rng.randrange(4)] * rng.randrange(1, 120))
+    return result[:count]
+
+
+def measure(window, map_, inputs):
+    """
+    Plays a level of a map with the inputs, returns the times of its
+    creation and of the simulation, the sprites and drawing per frame
+    (in milliseconds).
+    """
+    from hungry_homer import states
+
+    start = time.perf_counter()
+    level = states.Level(window, map_, 0)
+    created = time.perf_counter() - start
+    window.state = level
+
+    simulated = updated = drawn = 0
+    for direction_i in inputs:
+        start = time.perf_counter()
+        level.simulation.step(direction_i)
+        simulated += time.perf_counter() - start
+        start = time.perf_counter()
+        for entity in level.simulation.removed:
+            level.objects["collectibles"][entity.map_position].visible = False
+        level.update_objects()
+        updated += time.perf_counter() - start
+        start = time.perf_counter()
+        window.switch_to()
+        window.on_draw()
+        pyglet.gl.glFinish()
+        drawn += time.perf_counter() - start
+        window.flip()
+    level.delete()
+    window.state = window.menu
+    return (
+        created * 1000, simulated / len(inputs) * 1000,
+        updated / len(inputs) * 1000, drawn / len(inputs) * 1000
+        )
+
+
+def main():
+    """Runs the benchmark in mazes of all the sizes."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--headless", action="store_true",
+                        help="use pyglet without a display (EGL)")
+    parser.add_argument("--ticks", type=int, default=1200)
+    arguments = parser.parse_args()
+    pyglet.options["headless"] = arguments.headless
+    from hungry_homer import game
+
+    window = game.Game()
+    inputs = directions(arguments.ticks)
+    print(
+        f"{'map':>9}  {'create ms':>9}  {'tick ms':>7}  {'sprites ms':>10}"
+        + f"  {'draw ms':>7}"
+        )
+    for width, height in SIZES:
+        # about a watcher per 64 cells
+        map_ = maps.maze(width, height, width * height // 64)
+        created, simulated, updated, drawn = measure(window, map_, inputs)
+        print(
+            f"{width:4}x{height:<4}  {created:9.1f}  {simulated:7.3f}"
+            + f"  {updated:10.3f}  {drawn:7.3f}"
+            )
+    window.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""
+Measures how long taking and restoring snapshots of levels takes (and
+pushing them to and popping them from a rewind buffer), and how many
+ticks of history fit in the buffer (of levels played with random input).
+
+Usage: python -m benchmarks.snapshot [ticks]
+"""
+
+import random
+import sys
+import time
+
+from hungry_homer import maps, simulation, snapshot
+
+
+def measure(map_, ticks):
+    """
+    Returns microseconds per take, restore, push and pop, and integers
+    per pushed tick.
+    """
+    generator = random.Random(0)
+    level = simulation.Simulation(map_)
+    history = snapshot.RewindBuffer(capacity=1 << 24)
+    snapshots = []
+    direction_i = 4
+    for _ in range(ticks):
+        if generator.random() < 0.05:
+            direction_i = generator.choice([0, 1, 2, 3, 4, 4])
+        level.step(direction_i)
+        snapshots.append(snapshot.take(level))
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        snapshot.take(level)
+    take = time.perf_counter() - start
+    start = time.perf_counter()
+    for taken in snapshots:
+        snapshot.restore(level, taken)
+    restore = time.perf_counter() - start
+    start = time.perf_counter()
+    for taken in snapshots:
+        history.push(taken)
+    push = time.perf_counter() - start
+    used = history.used
+    start = time.perf_counter()
+    while history.pop() is not None:
+        pass
+    pop = time.perf_counter() - start
+    return [
+        elapsed / ticks * 1e6 for elapsed in (take, restore, push, pop)
+        ] + [used / ticks]
+
+
+def main():
+    """Prints the results for the levels."""
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    levels = maps.Maps("hungry_homer.level_maps", 32, 24)
+    names = ("take µs", "restore µs", "push µs", "pop µs", "ints/tick")
+    print(f"{'map':8}" + "".join(f"  {name:>10}" for name in names))
+    for i, path in enumerate(levels.paths):
+        print(f"{path:8}" + "".join(
+            f"  {result:10.1f}" for result in measure(levels[i], ticks)
+            ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""
+Measures startup of the game: import times of its modules
+(as reported by `python -X importtime`) and wall-clock time from the
+start of the import to the first drawn frame of the menu. Results are
+printed as JSON, so they can be compared across commits.
+
+Usage: python -m benchmarks.startup [--headless] [--runs N]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# run in a new interpreter, so nothing is imported yet
+FIRST_FRAME = """
+import time
+start = time.perf_counter()
+import pyglet
+pyglet.options["headless"] = {headless}
+from hungry_homer import game
+window = game.Game()
+window.switch_to()
+window.dispatch_event("on_draw")
+window.flip()
+print(time.perf_counter() - start)
+"""
+
+
+def import_times(headless):
+    """
+    Returns cumulative import times (in ms) of hungry_homer modules
+    and pyglet.
+    """
+    result = subprocess.run(
+        [
+            sys.executable, "-X", "importtime", "-c",
+            f"import pyglet; pyglet.options['headless'] = {headless};"
+            + " import hungry_homer.game"
+            ],
+        capture_output=True, text=True, check=True
+        )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        module = module.strip()
+        if module.startswith("hungry_homer") or module == "pyglet":
+            times[module] = int(cumulative) / 1000
+    return times
+
+
+def first_frame(headless):
+    """Returns time (in ms) from importing the game to its first frame."""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_FRAME.format(headless=headless)],
+        capture_output=True, text=True, check=True
+        )
+    return float(result.stdout.split()[-1]) * 1000
+
+
+def main():
+    """Prints median times of several runs as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--headless", action="store_true",
+                        help="use pyglet without a display (EGL)")
+    parser.add_argument("--runs", type=int, default=5)
+    arguments = parser.parse_args()
+
+    runs = [import_times(arguments.headless) for _ in range(arguments.runs)]
+    results = {
+        "import_ms": {
+            module: statistics.median(run[module] for run in runs)
+            for module in runs[0]
+            },
+        "first_frame_ms": statistics.median(
+            first_frame(arguments.headless) for _ in range(arguments.runs)
+            )
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+"""
+Scalability benchmarks on generated maps (see benchmarks.maps.generate)
+of increasing size, wall density, watcher count and amount of food.
+Each map is measured in a fresh process: setup of its simulation (time
+and memory allocated by Python), ticks per second of the simulation
+without drawing, setup of its level in the game window and the time
+of frames (a tick and drawing), and the growth of the peak resident
+memory of the process. Results are printed as JSON, two of them (e.g.
+of two commits) can be compared.
+
+Usage: python -m benchmarks.suite [--headless] [--no-render] [--ticks N]
+           [--frames N] [--map WIDTHxHEIGHT,WALLS,FOOD,WATCHERS...]
+       python -m benchmarks.suite --compare OLD.json NEW.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks import maps
+
+# (the size is varied with the same density of food and watchers,
+# the rest on a map of the base size)
+SIZES = ((32, 24), (64, 48), (128, 96), (256, 192))
+BASE_WIDTH, BASE_HEIGHT = 64, 48
+WALLS = (0, 0.3)
+WATCHER_COUNTS = (0, 100, 400)
+FOOD_COUNTS = (0, None)
+
+# measured values and whether more is better
+METRICS = (
+    ("simulation_setup_ms", False), ("simulation_kib", False),
+    ("ticks_per_second", True), ("level_setup_ms", False),
+    ("frame_ms", False), ("frame_p95_ms", False), ("peak_rss_kib", False)
+    )
+
+
+def configuration(width, height, walls=0.15, food_count="density",
+                  watcher_count="density"):
+    """
+    Returns parameters of a generated map (a quarter of the cells with
+    food and a watcher per 100 cells by default).
+    """
+    return {
+        "width": width, "height": height, "walls": walls,
+        "food_count": (
+            width * height // 4 if food_count == "density" else food_count
+            ),
+        "watcher_count": (
+            width * height // 100 if watcher_count == "density"
+            else watcher_count
+            )
+        }
+
+
+def default_configurations():
+    """Returns the parameters of the maps measured by default."""
+    result = [configuration(width, height) for width, height in SIZES]
+    result += [
+        configuration(BASE_WIDTH, BASE_HEIGHT, walls=walls) for walls in WALLS
+        ]
+    result += [
+        configuration(BASE_WIDTH, BASE_HEIGHT, watcher_count=count)
+        for count in WATCHER_COUNTS
+        ]
+    result += [
+        configuration(BASE_WIDTH, BASE_HEIGHT, food_count=count)
+        for count in FOOD_COUNTS
+        ]
+    return result
+
+
+def parse_configuration(text):
+    """
+    Returns parameters of a map given as WIDTHxHEIGHT,WALLS,FOOD,WATCHERS
+    (FOOD can be "all", the last three can be left out).
+    """
+    size, *rest = text.split(",")
+    width, height = (int(value) for value in size.split("x"))
+    arguments = {}
+    if len(rest) > 0:
+        arguments["walls"] = float(rest[0])
+    if len(rest) > 1:
+        arguments["food_count"] = None if rest[1] == "all" else int(rest[1])
+    if len(rest) > 2:
+        arguments["watcher_count"] = int(rest[2])
+    return configuration(width, height, **arguments)
+
+
+def resident():
+    """Returns the peak resident memory of the process in KiB."""
+    # (kilobytes on Linux, bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def inputs(count, seed=0):
+    """Returns count directions, each held for up to a second."""
+    rng = random.Random(seed)
+    result = []
+    while len(result) < count:
+        result.extend([rng.randrange(5)] * rng.randrange(1, 120))
+    return result[:count]
+
+
+def measure(config, options, queue):
+    """Measures a map (run in a fresh process), puts the results to queue."""
+    if options["render"]:
+        import pyglet
+        pyglet.options["headless"] = options["headless"]
+        from hungry_homer import game, states
+    from hungry_homer import simulation
+
+    map_ = maps.generate(**config)
+    before = resident()
+    result = {"map": config}
+
+    tracemalloc.start()
+    simulation.Simulation(map_)
+    result["simulation_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    setups = []
+    for _ in range(3):
+        start = time.perf_counter()
+        level = simulation.Simulation(map_)
+        setups.append(time.perf_counter() - start)
+    result["simulation_setup_ms"] = min(setups) * 1000
+
+    # (the best of three runs, others than the benchmark slow it down)
+    directions = inputs(options["ticks"])
+    elapsed = []
+    for _ in range(3):
+        level = simulation.Simulation(map_)
+        start = time.perf_counter()
+        for direction_i in directions:
+            level.step(direction_i)
+        elapsed.append(time.perf_counter() - start)
+    result["ticks_per_second"] = len(directions) / min(elapsed)
+
+    if options["render"]:
+        window = game.Game()
+        window.switch_to()
+        start = time.perf_counter()
+        level = states.Level(window, map_, 0)
+        result["level_setup_ms"] = (time.perf_counter() - start) * 1000
+        window.state = level
+        keys = (window.key.UP, window.key.RIGHT, window.key.DOWN,
+                window.key.LEFT)
+        frames = []
+        for direction_i in inputs(options["frames"]):
+            for i, key in enumerate(keys):
+                window.key_handler[key] = i == direction_i
+            start = time.perf_counter()
+            window.tick()
+            window.switch_to()
+            window.on_draw()
+            pyglet.gl.glFinish()
+            frames.append(time.perf_counter() - start)
+            window.flip()
+            # (Homer won)
+            if window.state is not level:
+                break
+        result["frame_ms"] = statistics.median(frames) * 1000
+        result["frame_p95_ms"] = (
+            sorted(frames)[int(0.95 * (len(frames) - 1))] * 1000
+            )
+        window.close()
+    result["peak_rss_kib"] = resident() - before
+    queue.put(result)
+
+
+def run(config, options):
+    """Measures a map in a fresh process, returns the results."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(config, options, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def commit():
+    """Returns the current git commit (None if it's unknown)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+            ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def describe(config):
+    """Returns a short description of the parameters of a map."""
+    food = "all" if config["food_count"] is None else config["food_count"]
+    return (
+        f"{config['width']}x{config['height']} walls {config['walls']}"
+        + f" food {food} watchers {config['watcher_count']}"
+        )
+
+
+def compare(old_path, new_path):
+    """Prints the ratios of the results of the same maps in two runs."""
+    with open(old_path) as file:
+        old = json.load(file)
+    with open(new_path) as file:
+        new = json.load(file)
+    print(f"{old['commit']} -> {new['commit']}")
+    old_results = {
+        json.dumps(result["map"], sort_keys=True): result
+        for result in old["results"]
+        }
+    for result in new["results"]:
+        previous = old_results.get(json.dumps(result["map"], sort_keys=True))
+        if previous is None:
+            continue
+        print(describe(result["map"]))
+        for metric, more_is_better in METRICS:
+            if not previous.get(metric) or metric not in result:
+                continue
+            ratio = result[metric] / previous[metric]
+            better = ratio > 1 if more_is_better else ratio < 1
+            print(
+                f"  {metric:20} {previous[metric]:12.2f}"
+                + f" -> {result[metric]:12.2f}  x{ratio:.2f}"
+                + ("" if abs(ratio - 1) < 0.05 else
+                   " (better)" if better else " (worse)")
+                )
+
+
+def main():
+    """Runs the benchmarks (or compares two results)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--headless", action="store_true",
+                        help="use pyglet without a display (EGL)")
+    parser.add_argument("--no-render", action="store_true",
+                        help="don't measure levels in the game window")
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--map", action="append", type=parse_configuration,
+                        metavar="WIDTHxHEIGHT,WALLS,FOOD,WATCHERS",
+                        help="measure this map instead of the default ones")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare results of two runs")
+    arguments = parser.parse_args()
+    if arguments.compare:
+        compare(*arguments.compare)
+        return
+
+    options = {
+        "render": not arguments.no_render, "headless": arguments.headless,
+        "ticks": arguments.ticks, "frames": arguments.frames
+        }
+    results = []
+    for config in arguments.map or default_configurations():
+        print(describe(config), file=sys.stderr)
+        results.append(run(config, options))
+    print(json.dumps({
+        "commit": commit(), "python": platform.python_version(),
+        "options": options, "results": results
+        }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+"""
+Compares checks whether a moving entity can go somewhere using the
+compiled walkability masks with checks of the symbols in the map
+(as the level did before the masks were introduced).
+
+Usage: python -m benchmarks.walkability
+"""
+
+import timeit
+
+from hungry_homer import simulation, walkability
+from benchmarks import maps
+
+
+def is_forbidden_in_map(map_, position, direction_i=4, has_key=False):
+    """Checks whether a move is forbidden from the symbols in the map."""
+    x = position[0] + simulation.OBJECT_DIRECTIONS[direction_i][0]
+    y = position[1] + simulation.OBJECT_DIRECTIONS[direction_i][1]
+    forbidden = "X." if has_key else "X./"
+    if not (0 <= x < len(map_[0]) and 0 <= y < len(map_)):
+        return True
+    return map_[y][x] in forbidden
+
+
+def main():
+    """Prints times of checks using the map symbols and the masks."""
+    map_ = maps.arena(32, 24, 0)
+    compiled = walkability.Walkability(map_, simulation.OBJECT_DIRECTIONS)
+    checks = [
+        ((x, y), direction_i)
+        for y in range(len(map_)) for x in range(len(map_[0]))
+        for direction_i in range(5)
+        ]
+    for (position, direction_i) in checks:
+        assert (
+            compiled.is_forbidden(position, direction_i)
+            == is_forbidden_in_map(map_, position, direction_i)
+            )
+
+    def check_map():
+        for position, direction_i in checks:
+            is_forbidden_in_map(map_, position, direction_i)
+
+    def check_masks():
+        for position, direction_i in checks:
+            compiled.is_forbidden(position, direction_i)
+
+    # moving entities keep the index of their position
+    indexed_checks = [
+        (compiled.index(position), direction_i)
+        for position, direction_i in checks
+        ]
+
+    def check_indexed_masks():
+        masks = compiled.masks[0]
+        for index, direction_i in indexed_checks:
+            not masks[index] >> direction_i & 1
+
+    # a circular watcher's turn (see simulation.CircularWatcher.update)
+    turns = [
+        ((x, y), direction_i, side)
+        for y in range(len(map_)) for x in range(len(map_[0]))
+        for direction_i in range(4) for side in (-1, 1)
+        if not is_forbidden_in_map(map_, (x, y))
+        ]
+
+    def turn_map():
+        for position, direction_i, side in turns:
+            if is_forbidden_in_map(map_, position, (direction_i + side) % 4):
+                i = 0
+                while (
+                    is_forbidden_in_map(map_, position, direction_i)
+                    and i <= 2
+                    ):
+                    direction_i = (direction_i - side) % 4
+                    i += 1
+
+    def turn_masks():
+        for position, direction_i, side in turns:
+            allowed = compiled.masks[0][compiled.index(position)]
+            if not allowed >> ((direction_i + side) % 4) & 1:
+                i = 0
+                while not allowed >> direction_i & 1 and i <= 2:
+                    direction_i = (direction_i - side) % 4
+                    i += 1
+
+    repeat = 200
+    for name, function, count in (
+        ("single check, map symbols", check_map, len(checks)),
+        ("single check, is_forbidden", check_masks, len(checks)),
+        ("single check, indexed masks", check_indexed_masks, len(checks)),
+        ("circular turn, map symbols", turn_map, len(turns)),
+        ("circular turn, masks", turn_masks, len(turns))
+        ):
+        seconds = min(timeit.repeat(function, number=repeat, repeat=5))
+        print(f"{name:28} {seconds / repeat / count * 1e9:6.1f} ns")
+
+if __name__ == "__main__":
+    main()
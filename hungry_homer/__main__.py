@@ -13,11 +13,41 @@ Hungry Homer
  - close with ESC
 """
 
-from hungry_homer import game
+import argparse
+
+from hungry_homer import game, replay
 
 def main():
     """Runs the game."""
-    game_window = game.Game()
+    parser = argparse.ArgumentParser(prog="hungry_homer")
+    parser.add_argument(
+        "--record", metavar="DIRECTORY",
+        help="save replays of the played levels to the directory"
+        )
+    parser.add_argument(
+        "--play", metavar="REPLAY", help="play back a replay"
+        )
+    parser.add_argument(
+        "--pack", metavar="PACK",
+        help="play levels of a level pack (see hungry_homer.levelpack)"
+        )
+    parser.add_argument(
+        "--profile", metavar="TRACE",
+        help="time phases of ticks and frames, save their percentiles"
+        + " to a CSV file (or with the samples to a JSON one) on exit"
+        )
+    parser.add_argument(
+        "--hud", action="store_true",
+        help="show the frame rate, the tick rate and the time of phases"
+        )
+    arguments = parser.parse_args()
+    game_window = game.Game(
+        replay_directory=arguments.record, level_pack=arguments.pack,
+        trace=arguments.profile, show_profile=arguments.hud,
+        playback=(
+            replay.Replay.load(arguments.play) if arguments.play else None
+            )
+        )
     game_window.run()
 
 if __name__ == "__main__":
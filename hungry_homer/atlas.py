@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+"""
+Texture atlas of object images. The images in resources_dir are packed
+into a single image, so all level objects are drawn from one texture.
+The atlas is cached on disk next to the images and built again only
+when they change.
+"""
+
+import hashlib
+import json
+import os
+
+import pyglet
+from pyglet.extlibs import png
+
+from hungry_homer import resources_dir
+
+
+# images packed into the atlas (file names without ".png")
+NAMES = (
+    "homer", "brick", "circular_watcher", "linear_watcher",
+    "chasing_watcher", "key", "gate", "food", "bell"
+    )
+WIDTH = 128
+# transparent pixels around each image
+BORDER = 1
+
+directory = os.path.dirname(resources_dir.__file__)
+image_path = os.path.join(directory, "atlas.png")
+index_path = os.path.join(directory, "atlas.json")
+
+
+def sources_hash():
+    """Returns a hash of the packed images."""
+    sha = hashlib.sha1()
+    for name in NAMES:
+        with open(os.path.join(directory, name + ".png"), "rb") as file:
+            sha.update(name.encode() + b"\0" + file.read())
+    return sha.hexdigest()
+
+
+def build():
+    """
+    Packs the images into rows (shelves) of an atlas. Returns its
+    height, its RGBA pixels (from top to bottom) and an index of image
+    positions (x, y from the bottom left corner, width, height).
+    """
+    sources = {}
+    for name in NAMES:
+        width, height, rows, _ = png.Reader(
+            filename=os.path.join(directory, name + ".png")
+            ).asRGBA8()
+        sources[name] = (width, height, [bytes(row) for row in rows])
+
+    # place the images from the top, the highest first
+    placed = {}
+    x = y = shelf_height = 0
+    for name in sorted(NAMES, key=lambda name: -sources[name][1]):
+        width, height, _ = sources[name]
+        if width + 2 * BORDER > WIDTH:
+            raise ValueError(f"image {name!r} is too wide for the atlas")
+        if x + width + 2 * BORDER > WIDTH:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        placed[name] = (x + BORDER, y + BORDER)
+        x += width + 2 * BORDER
+        shelf_height = max(shelf_height, height + 2 * BORDER)
+    atlas_height = y + shelf_height
+
+    pixels = bytearray(WIDTH * atlas_height * 4)
+    index = {}
+    for name, (left, top) in placed.items():
+        width, height, rows = sources[name]
+        for i, row in enumerate(rows):
+            start = ((top + i) * WIDTH + left) * 4
+            pixels[start:(start + width * 4)] = row
+        index[name] = (left, atlas_height - top - height, width, height)
+    return atlas_height, bytes(pixels), index
+
+
+def save(height, pixels, index, hash_):
+    """Saves the atlas next to the images."""
+    with open(image_path, "wb") as file:
+        png.Writer(WIDTH, height, greyscale=False, alpha=True).write(
+            file,
+            (
+                pixels[(i * WIDTH * 4):((i + 1) * WIDTH * 4)]
+                for i in range(height)
+                )
+            )
+    with open(index_path, "w") as file:
+        json.dump({"hash": hash_, "index": index}, file)
+
+
+def read(hash_):
+    """
+    Reads the cached atlas (as pyglet image) and its index, or returns
+    None if it's missing or outdated.
+    """
+    try:
+        with open(index_path) as file:
+            cached = json.load(file)
+        if cached["hash"] != hash_:
+            return None
+        return pyglet.image.load(image_path), cached["index"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load():
+    """
+    Returns a dictionary of texture regions of the images (built again
+    if they changed since the cached atlas was saved).
+    """
+    hash_ = sources_hash()
+    cached = read(hash_)
+    if cached is None:
+        height, pixels, index = build()
+        try:
+            save(height, pixels, index, hash_)
+        # e.g. an installation directory which isn't writable
+        except OSError:
+            pass
+        image = pyglet.image.ImageData(
+            WIDTH, height, "RGBA", pixels, pitch=(-WIDTH * 4)
+            )
+    else:
+        image, index = cached
+    texture = image.get_texture()
+    return {
+        name: texture.get_region(*position)
+        for name, position in index.items()
+        }
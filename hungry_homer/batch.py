@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+
+"""
+Batch simulation of many independent instances of one level at once.
+The entities are kept in NumPy arrays (a row per instance) and all the
+instances are updated together by the same rules as in
+simulation.Simulation (including its quirks), so e.g. thousands of
+playthroughs of a map can be simulated much faster than one by one.
+It needs NumPy (pip install hungry_homer[batch]).
+"""
+
+import numpy as np
+
+from hungry_homer import simulation
+
+FOOD, KEY, BELL = range(3)
+COLLECTIBLE_KINDS = {
+    simulation.Food: FOOD,
+    simulation.Key: KEY,
+    simulation.Bell: BELL
+    }
+
+INTEGER = np.int32
+DX = np.array(
+    [direction[0] for direction in simulation.OBJECT_DIRECTIONS],
+    dtype=INTEGER
+    )
+DY = np.array(
+    [direction[1] for direction in simulation.OBJECT_DIRECTIONS],
+    dtype=INTEGER
+    )
+
+# state of an instance (what's reset after losing is listed first,
+# the scheduled completion of the level survives the restart)
+ENTITY_FIELDS = (
+    "x", "y", "direction_i", "facing_i", "in_place", "speed",
+    "food_count", "has_key", "bump_count", "invincible", "lost", "won",
+    "opacity",
+    "watcher_x", "watcher_y", "watcher_direction_i", "watcher_facing_i",
+    "watcher_in_place", "watcher_side",
+    "exists", "rung", "ringing", "gate_opened",
+    "invincibility_due", "ringing_due"
+    )
+FIELDS = ENTITY_FIELDS + ("complete_due", "completed")
+
+# not scheduled
+NEVER = -1
+
+
+class BatchSimulation:
+    """
+    Instances of a simulation of one map. Homer's attributes are arrays
+    of shape (count,) named as in simulation.Homer, the watchers' ones
+    have shape (watcher count, count) and are prefixed with "watcher_",
+    the collectibles' ones have shape (collectible count, count)
+    (so values of an entity in all the instances are next to each
+    other). Scheduled functions are replaced by the ticks when they're
+    due.
+    """
+
+    def __init__(self, map_, count):
+        """Initializes count instances of a simulation of a map."""
+        self.map = map_
+        self.count = count
+        template = simulation.Simulation(map_)
+        self.walkability = template.walkability
+        self.width = self.walkability.width
+        self.height = self.walkability.height
+        self.size = simulation.OBJECT_SIZE
+        self.masks = np.array(
+            [list(masks) for masks in self.walkability.masks], dtype=INTEGER
+            )
+        self.food_total = template.food_count
+        self.gate_x = template.objects["gate"][0].x
+        self.gate_y = template.objects["gate"][0].y
+        self.ticks = 0
+
+        watchers = template.objects["watchers"]
+        # (each instance would need its own distances to Homer)
+        if any(
+            isinstance(watcher, simulation.ChasingWatcher)
+            for watcher in watchers
+            ):
+            raise ValueError("chasing watchers can't be simulated in batches")
+        self.circular = np.array(
+            [isinstance(watcher, simulation.CircularWatcher)
+             for watcher in watchers],
+            dtype=bool
+            )
+        collectibles = list(template.objects["collectibles"].values())
+        self.kinds = np.array(
+            [COLLECTIBLE_KINDS[type(collectible)]
+             for collectible in collectibles],
+            dtype=INTEGER
+            )
+        # index of the collectible in each cell (-1 if none)
+        self.collectible_at = np.full(
+            self.width * self.height, -1, dtype=INTEGER
+            )
+        for i, collectible in enumerate(collectibles):
+            x, y = collectible.map_position
+            self.collectible_at[y * self.width + x] = i
+
+        # initial state (of one instance)
+        homer = template.objects["homer"][0]
+        self.initial = {
+            field: np.array(
+                getattr(homer, field),
+                dtype=bool if isinstance(getattr(homer, field), bool)
+                else INTEGER
+                )
+            for field in (
+                "x", "y", "direction_i", "facing_i", "in_place", "speed",
+                "food_count", "has_key", "bump_count", "invincible",
+                "lost", "won", "opacity"
+                )
+            }
+        for field in (
+            "x", "y", "direction_i", "facing_i", "in_place"
+            ):
+            self.initial["watcher_" + field] = np.array(
+                [getattr(watcher, field) for watcher in watchers],
+                dtype=bool if field == "in_place" else INTEGER
+                )
+        self.initial["watcher_side"] = np.array(
+            [getattr(watcher, "side", 0) for watcher in watchers],
+            dtype=INTEGER
+            )
+        for field in ("exists", "rung", "ringing"):
+            self.initial[field] = np.array(
+                [getattr(collectible, field, False)
+                 for collectible in collectibles],
+                dtype=bool
+                )
+        self.initial["gate_opened"] = np.array(False)
+        self.initial["invincibility_due"] = np.array(NEVER, dtype=INTEGER)
+        self.initial["ringing_due"] = np.full(
+            len(collectibles), NEVER, dtype=INTEGER
+            )
+        self.initial["complete_due"] = np.array(NEVER, dtype=INTEGER)
+        self.initial["completed"] = np.array(False)
+
+        for field in FIELDS:
+            setattr(
+                self, field,
+                np.repeat(self.initial[field][..., None], count, axis=-1)
+                )
+
+    def restart(self, instances):
+        """Restarts the level in instances (a boolean array)."""
+        for field in ENTITY_FIELDS:
+            getattr(self, field)[..., instances] = (
+                self.initial[field][..., None]
+                )
+
+    def step(self, direction_i=4):
+        """
+        Updates all the instances by one tick. direction_i is
+        the direction of the arrow pressed by the player in each
+        instance (an array, or a number if the same in all of them).
+        """
+        self.ticks += 1
+        direction_i = np.broadcast_to(
+            np.asarray(direction_i, dtype=INTEGER), (self.count,)
+            )
+        self.call_scheduled()
+
+        # Homer + watchers (if Homer restarts the level, the old ones
+        # are updated, but the collisions are handled for the new ones)
+        restarted = self.lost & (self.opacity <= 0)
+        self.update_homer(direction_i)
+        self.update_watchers()
+        if restarted.any():
+            self.restart(restarted)
+
+        self.handle_watchers_collisions()
+        self.handle_collectibles_collisions()
+        self.handle_gate_collisions()
+        self.handle_watcher_watcher_collisions()
+
+    def call_scheduled(self):
+        """Does what the scheduled functions would do in this tick."""
+        ended = self.invincibility_due == self.ticks
+        self.invincible[ended] = False
+        self.invincibility_due[ended] = NEVER
+        stopped = self.ringing_due == self.ticks
+        self.ringing[stopped] = False
+        self.ringing_due[stopped] = NEVER
+        completed = self.complete_due == self.ticks
+        self.completed[completed] = True
+        self.complete_due[completed] = NEVER
+
+    def move(self, x, y, direction_i, speed, facing_i):
+        """
+        Moves entities according to their directions. Returns whether
+        they're in place.
+        """
+        x += DX[direction_i] * speed
+        y += DY[direction_i] * speed
+        facing_i[...] = np.where(direction_i < 4, direction_i, facing_i)
+        return (x % self.size == 0) & (y % self.size == 0)
+
+    def map_index(self, x, y):
+        """Returns indices of cells of coordinates in the masks."""
+        return y // self.size * self.width + x // self.size
+
+    def update_homer(self, direction_i):
+        """Updates Homer's direction etc. (see simulation.Homer)."""
+        lost = self.lost
+        # vanish if lost (or restart the level)
+        self.opacity[lost & (self.opacity > 0)] -= 5
+        # flash if invincible
+        alive = ~lost
+        self.opacity[alive] = np.where(
+            self.invincible & (self.opacity == 255), 100, 255
+            )[alive]
+        # after winning slowly go away
+        self.speed[alive & self.won] = 1
+
+        deciding = alive & ~self.won
+        # stop before moving into a brick (deciding Homer in place is
+        # always in the map)
+        in_place = deciding & self.in_place
+        index = np.where(in_place, self.map_index(self.x, self.y), 0)
+        allowed = self.masks[self.has_key.astype(INTEGER), index]
+        blocked = in_place & (allowed >> direction_i & 1 == 0)
+        new_direction_i = np.where(blocked, 4, direction_i)
+        # actually change direction (only if in place or if Homer turns
+        # around)
+        changed = deciding & (
+            self.in_place
+            | (
+                (new_direction_i < 4)
+                & (np.abs(self.direction_i - new_direction_i) == 2)
+                )
+            )
+        self.direction_i[changed] = new_direction_i[changed]
+
+        self.in_place = self.move(
+            self.x, self.y, self.direction_i, self.speed, self.facing_i
+            )
+
+    def update_watchers(self):
+        """Turns the watchers in place and moves them."""
+        # only the watchers in place decide where to go
+        watcher_i, instance_i = np.nonzero(self.watcher_in_place)
+        direction_i = self.watcher_direction_i[watcher_i, instance_i]
+        side = self.watcher_side[watcher_i, instance_i]
+        allowed = self.masks[0][self.map_index(
+            self.watcher_x[watcher_i, instance_i],
+            self.watcher_y[watcher_i, instance_i]
+            )]
+
+        # circular: no wall on the given side => turn to the side,
+        # a wall ahead => turn to the other side (at most 3 times)
+        circular = self.circular[watcher_i]
+        side_i = (direction_i + side) % 4
+        side_free = circular & (allowed >> side_i & 1 == 1)
+        new_direction_i = np.where(side_free, side_i, direction_i)
+        turning = circular & ~side_free
+        for _ in range(3):
+            blocked = turning & (allowed >> new_direction_i & 1 == 0)
+            new_direction_i = np.where(
+                blocked, (new_direction_i - side) % 4, new_direction_i
+                )
+        # linear: a wall ahead => turn around
+        linear = ~circular & (allowed >> direction_i & 1 == 0)
+        new_direction_i = np.where(
+            linear, (direction_i + 2) % 4, new_direction_i
+            )
+        self.watcher_direction_i[watcher_i, instance_i] = new_direction_i
+
+        self.watcher_in_place = self.move(
+            self.watcher_x, self.watcher_y, self.watcher_direction_i,
+            simulation.OBJECT_SPEED, self.watcher_facing_i
+            )
+
+    def handle_watchers_collisions(self):
+        """Bumps Homer into watchers (see Homer.handle_collision)."""
+        touching = (
+            (np.abs(self.watcher_x - self.x) <= self.size)
+            & (np.abs(self.watcher_y - self.y) <= self.size)
+            ).any(axis=0)
+        bumped = touching & ~self.invincible
+        # dramatically fly down
+        losing = bumped & (self.bump_count == 1)
+        self.lost[losing] = True
+        self.speed[losing] = 4
+        self.direction_i[losing] = 2
+        hurt = bumped & ~losing
+        self.bump_count[hurt] += 1
+        self.invincible[hurt] = True
+        self.invincibility_due[hurt] = (
+            self.ticks + simulation.INVINCIBILITY_TICKS
+            )
+
+    def handle_collectibles_collisions(self):
+        """Lets Homer in place take collectibles and ring bells."""
+        cell_x = self.x // self.size
+        cell_y = self.y // self.size
+        inside = (
+            self.in_place
+            & (0 <= cell_x) & (cell_x < self.width)
+            & (0 <= cell_y) & (cell_y < self.height)
+            )
+        collectible_i = np.where(
+            inside,
+            self.collectible_at[
+                np.where(inside, cell_y * self.width + cell_x, 0)
+                ],
+            -1
+            )
+        instances = np.nonzero(collectible_i >= 0)[0]
+        collectible_i = collectible_i[instances]
+        taken = self.exists[collectible_i, instances]
+        instances = instances[taken]
+        collectible_i = collectible_i[taken]
+        kinds = self.kinds[collectible_i]
+
+        food = instances[kinds == FOOD]
+        self.food_count[food] += 1
+        key = instances[kinds == KEY]
+        self.has_key[key] = True
+        self.gate_opened[key] = True
+        self.exists[collectible_i[kinds != BELL], instances[kinds != BELL]] = (
+            False
+            )
+
+        # Homer can ring a bell only once
+        bell = kinds == BELL
+        bell_instances = instances[bell]
+        bell_i = collectible_i[bell]
+        ringing = ~self.rung[bell_i, bell_instances]
+        bell_instances = bell_instances[ringing]
+        bell_i = bell_i[ringing]
+        self.invincible[bell_instances] = True
+        self.invincibility_due[bell_instances] = (
+            self.ticks + simulation.RINGING_TICKS
+            )
+        self.rung[bell_i, bell_instances] = True
+        self.ringing[bell_i, bell_instances] = True
+        self.ringing_due[bell_i, bell_instances] = (
+            self.ticks + simulation.RINGING_TICKS
+            )
+
+    def handle_gate_collisions(self):
+        """Lets Homer with all the food win in the gate."""
+        winning = (
+            (self.x == self.gate_x) & (self.y == self.gate_y)
+            & (self.food_count == self.food_total)
+            & ~self.won
+            )
+        self.invincible[winning] = True
+        self.won[winning] = True
+        self.complete_due[winning] = (
+            self.ticks + simulation.COMPLETION_TICKS
+            )
+
+    def handle_watcher_watcher_collisions(self):
+        """
+        Turns watchers around (and circular ones switch their sides)
+        for each other watcher they touch.
+        """
+        x = self.watcher_x
+        y = self.watcher_y
+        counts = np.zeros(x.shape, dtype=INTEGER)
+        # each watcher with the next ones
+        for i in range(len(x) - 1):
+            touching = (
+                (np.abs(x[i + 1:] - x[i]) <= self.size)
+                & (np.abs(y[i + 1:] - y[i]) <= self.size)
+                )
+            counts[i] += touching.sum(axis=0, dtype=INTEGER)
+            counts[i + 1:] += touching
+        odd = counts % 2 == 1
+        self.watcher_direction_i[odd] = (self.watcher_direction_i[odd] + 2) % 4
+        self.watcher_side[odd] *= -1
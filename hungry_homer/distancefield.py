@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Distances from the cells of a map to a target cell (Homer's), shared by
+all the chasing watchers of a level (see simulation.ChasingWatcher).
+"""
+
+import array
+
+
+class DistanceField:
+    """
+    Numbers of moves from the cells to the target for entities without
+    the key (the gate never opens for watchers, so opening it doesn't
+    change them). They're found by a breadth-first search backwards
+    from the target, which goes only as far as the queried cells, and
+    it starts again only when the target changes. The cells found are
+    stamped with the number of the search, so nothing has to be cleared
+    for a new one.
+    """
+
+    def __init__(self, walkability_):
+        """Prepares a field of a compiled map (without a target)."""
+        self.walkability = walkability_
+        self.masks = walkability_.masks[0]
+        width = walkability_.width
+        self.size = width * walkability_.height
+        self.offsets = [
+            dx + dy * width for dx, dy in walkability_.directions[:4]
+            ]
+        self.distances = array.array("i", [0]) * self.size
+        self.stamps = array.array("i", [0]) * self.size
+        self.stamp = 0
+        self.target = None
+        # cells found by the search, those from head on aren't expanded
+        self.queue = []
+        self.head = 0
+
+    def set_target(self, position):
+        """
+        Sets the target position (nothing can get to one outside
+        the map, e.g. Homer flying away after losing).
+        """
+        if position == self.target:
+            return
+        self.target = position
+        self.stamp += 1
+        self.queue = []
+        self.head = 0
+        x, y = position
+        if (
+            0 <= x < self.walkability.width
+            and 0 <= y < self.walkability.height
+            ):
+            index = self.walkability.index(position)
+            self.distances[index] = 0
+            self.stamps[index] = self.stamp
+            self.queue.append(index)
+
+    def distance(self, index):
+        """
+        Returns the distance of a cell (given by its index in the masks)
+        to the target (None if the target can't be reached from it).
+        """
+        stamps = self.stamps
+        stamp = self.stamp
+        if stamps[index] != stamp:
+            masks = self.masks
+            distances = self.distances
+            queue = self.queue
+            size = self.size
+            while self.head < len(queue) and stamps[index] != stamp:
+                cell = queue[self.head]
+                self.head += 1
+                distance = distances[cell] + 1
+                # cells from which the cell can be entered
+                for direction_i, offset in enumerate(self.offsets):
+                    other = cell - offset
+                    if (
+                        0 <= other < size
+                        and stamps[other] != stamp
+                        and masks[other] >> direction_i & 1
+                        ):
+                        distances[other] = distance
+                        stamps[other] = stamp
+                        queue.append(other)
+            if stamps[index] != stamp:
+                return None
+        return self.distances[index]
+
+    def direction(self, index, direction_i):
+        """
+        Returns the direction of a shortest way to the target from a
+        cell (direction_i if it's one of them, None if the target can't
+        be reached or it's already there).
+        """
+        distance = self.distance(index)
+        if not distance:
+            return None
+        # (all the cells nearer than this one are found already)
+        closer = []
+        mask = self.masks[index]
+        for i, offset in enumerate(self.offsets):
+            other = index + offset
+            if (
+                mask >> i & 1
+                and self.stamps[other] == self.stamp
+                and self.distances[other] == distance - 1
+                ):
+                closer.append(i)
+        return direction_i if direction_i in closer else closer[0]
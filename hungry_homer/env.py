@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+"""
+Gym-style environments for automated players: reset() starts a level,
+step(action) presses an arrow for a tick (or a few) and returns
+an observation of the level, a reward and whether the episode is done.
+VectorEnv steps many environments per call, optionally in processes.
+"""
+
+import multiprocessing
+import random
+
+from hungry_homer import fastforward, maps, simulation
+
+GRID_WIDTH = 32
+GRID_HEIGHT = 24
+MAPS_LOCATION = "hungry_homer.level_maps"
+
+# actions are directions of the pressed arrow
+UP, RIGHT, DOWN, LEFT, NONE = range(5)
+ACTION_COUNT = 5
+
+# codes of cells in observations
+EMPTY, BRICK, FOOD, KEY, BELL, GATE_CLOSED, GATE_OPENED, WATCHER, HOMER = (
+    range(9)
+    )
+CELL_CODES = {
+    simulation.Food: FOOD,
+    simulation.Key: KEY,
+    simulation.Bell: BELL
+    }
+
+REWARDS = {
+    "food": 1.0,
+    "key": 5.0,
+    "bump": -5.0,
+    "won": 20.0,
+    "lost": -20.0
+    }
+
+
+class Env:
+    """An environment playing levels from the level maps."""
+
+    def __init__(self, maps_=None, ticks_per_step=1, max_ticks=None):
+        """
+        Initializes an environment. Each step the action is repeated
+        for ticks_per_step ticks, an episode is cut off after max_ticks
+        ticks (never if None).
+        """
+        self.maps = maps_ if maps_ is not None else maps.Maps(
+            MAPS_LOCATION, GRID_WIDTH, GRID_HEIGHT
+            )
+        self.ticks_per_step = ticks_per_step
+        self.max_ticks = max_ticks
+        self.random = random.Random()
+        self.simulation = None
+        self.level_index = None
+        self.background = None
+        # Homer's state when he lost (before the level was restarted)
+        self.lost_info = None
+
+    def reset(self, level_index=None, seed=None):
+        """
+        Starts a level (a random one if level_index is None) and returns
+        the first observation.
+        """
+        if seed is not None:
+            self.random.seed(seed)
+        if level_index is None:
+            level_index = self.random.randrange(len(self.maps))
+        self.level_index = level_index
+        map_ = self.maps[level_index]
+        self.simulation = simulation.Simulation(
+            map_, on_restart=self.restarted
+            )
+        # bricks never change
+        width = self.simulation.grid_width
+        self.background = bytearray(width * self.simulation.grid_height)
+        for y, row in enumerate(map_):
+            for x, symbol in enumerate(row):
+                if symbol == "X":
+                    self.background[y * width + x] = BRICK
+        return self.observation()
+
+    def observation(self):
+        """
+        Returns the level as bytes, a code of what's in each cell, row
+        by row from the bottom (moving entities are in the cells their
+        centres are in).
+        """
+        width = self.simulation.grid_width
+        height = self.simulation.grid_height
+        cells = bytearray(self.background)
+        objects = self.simulation.objects
+        for (x, y), entity in objects["collectibles"].items():
+            cells[y * width + x] = CELL_CODES[type(entity)]
+        gate = objects["gate"][0]
+        x, y = gate.map_position
+        cells[y * width + x] = GATE_OPENED if gate.opened else GATE_CLOSED
+        for code, entities in (
+            (WATCHER, objects["watchers"]), (HOMER, objects["homer"])
+            ):
+            for entity in entities:
+                x = (entity.x + entity.size // 2) // entity.size
+                y = (entity.y + entity.size // 2) // entity.size
+                # Homer may leave the map after winning or losing
+                if 0 <= x < width and 0 <= y < height:
+                    cells[y * width + x] = code
+        return bytes(cells)
+
+    def info(self):
+        """Returns Homer's state."""
+        homer = self.simulation.objects["homer"][0]
+        return {
+            "food_count": homer.food_count,
+            "has_key": homer.has_key,
+            "bump_count": homer.bump_count,
+            "won": homer.won,
+            "lost": homer.lost,
+            "ticks": self.simulation.ticks
+            }
+
+    def restarted(self):
+        """Keeps Homer's state before the level is restarted."""
+        self.lost_info = self.info()
+
+    def step(self, action):
+        """
+        Presses the arrow in the direction action (NONE for none) and
+        returns the observation, the reward, whether the episode is done
+        and info (Homer's state).
+        """
+        before = self.info()
+        self.lost_info = None
+        fastforward.advance(self.simulation, self.ticks_per_step, action)
+        # (if Homer lost early in the step, the level may be restarted,
+        # but it's the lost Homer who's rewarded)
+        if self.lost_info is None:
+            after = self.info()
+        else:
+            after = dict(self.lost_info, ticks=self.simulation.ticks)
+
+        reward = (
+            REWARDS["food"] * (after["food_count"] - before["food_count"])
+            + REWARDS["key"] * (after["has_key"] - before["has_key"])
+            + REWARDS["bump"] * (after["bump_count"] - before["bump_count"])
+            + REWARDS["won"] * (after["won"] - before["won"])
+            + REWARDS["lost"] * (after["lost"] - before["lost"])
+            )
+        done = after["won"] or after["lost"]
+        after["truncated"] = (
+            not done
+            and self.max_ticks is not None
+            and after["ticks"] >= self.max_ticks
+            )
+        return (
+            self.observation(), reward, done or after["truncated"], after
+            )
+
+
+class VectorEnv:
+    """
+    Many environments stepped together. An environment whose episode
+    is done is reset (to the same level) and its last info contains
+    the final observation. With processes > 0, the environments are
+    split among that many worker processes.
+    """
+
+    def __init__(self, count, processes=0, level_index=None, **kwargs):
+        """
+        Initializes count environments playing the level with
+        level_index (random ones if None), kwargs are passed to Env.
+        """
+        self.count = count
+        self.level_index = level_index
+        self.workers = []
+        self.envs = []
+        if processes:
+            for i in range(processes):
+                connection, worker_connection = multiprocessing.Pipe()
+                worker = multiprocessing.Process(
+                    target=work,
+                    args=(worker_connection, len(range(i, count, processes)),
+                          level_index, kwargs),
+                    daemon=True
+                    )
+                worker.start()
+                self.workers.append((connection, worker))
+        else:
+            self.envs = [Env(**kwargs) for _ in range(count)]
+
+    def reset(self, seed=None):
+        """
+        Resets all the environments (with seeds seed, seed + 1...) and
+        returns their observations.
+        """
+        seeds = [None if seed is None else seed + i for i in range(self.count)]
+        if not self.workers:
+            return reset(self.envs, self.level_index, seeds)
+        processes = len(self.workers)
+        for i, (connection, _) in enumerate(self.workers):
+            connection.send(("reset", seeds[i::processes]))
+        return self.merge([connection.recv() for connection, _ in self.workers])
+
+    def step(self, actions):
+        """
+        Steps each environment with its action and returns lists of
+        observations, rewards, done flags and infos.
+        """
+        if not self.workers:
+            return step(self.envs, actions, self.level_index)
+        processes = len(self.workers)
+        for i, (connection, _) in enumerate(self.workers):
+            connection.send(("step", actions[i::processes]))
+        results = [connection.recv() for connection, _ in self.workers]
+        return tuple(
+            self.merge([result[j] for result in results]) for j in range(4)
+            )
+
+    def merge(self, parts):
+        """
+        Merges lists from the workers (the worker i % processes has
+        environment i as its (i // processes)-th one).
+        """
+        processes = len(self.workers)
+        return [
+            parts[i % processes][i // processes] for i in range(self.count)
+            ]
+
+    def close(self):
+        """Stops the worker processes."""
+        for connection, worker in self.workers:
+            connection.send(("close", None))
+            worker.join()
+        self.workers = []
+
+
+def reset(envs, level_index, seeds):
+    """Resets environments with seeds, returns their observations."""
+    return [env.reset(level_index, seed) for env, seed in zip(envs, seeds)]
+
+
+def step(envs, actions, level_index):
+    """
+    Steps environments (resetting the done ones), returns lists of
+    observations, rewards, done flags and infos.
+    """
+    observations, rewards, dones, infos = [], [], [], []
+    for env, action in zip(envs, actions):
+        observation, reward, done, info = env.step(action)
+        if done:
+            info["final_observation"] = observation
+            observation = env.reset(level_index)
+        observations.append(observation)
+        rewards.append(reward)
+        dones.append(done)
+        infos.append(info)
+    return observations, rewards, dones, infos
+
+
+def work(connection, count, level_index, kwargs):
+    """Runs environments in a worker process of VectorEnv."""
+    envs = [Env(**kwargs) for _ in range(count)]
+    while True:
+        command, argument = connection.recv()
+        if command == "reset":
+            connection.send(reset(envs, level_index, argument))
+        elif command == "step":
+            connection.send(step(envs, argument, level_index))
+        elif command == "close":
+            break
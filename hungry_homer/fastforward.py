@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+
+"""
+Fast-forwarding of a simulation. Moving entities change their way only
+at points of the grid, and mostly they just go on, so the simulation
+can jump over ticks which only move the entities and step normally
+only in ticks when something happens (a turn, a collision, taking
+a collectible, a scheduled function...). The result is identical to
+stepping.
+"""
+
+from hungry_homer import simulation as simulation_module
+
+# the least number of ticks worth skipping (skipping fewer takes about
+# as long as stepping)
+MIN_SKIP = 2
+# the most ticks stepped before looking for quiet ticks again (crowded
+# simulations rarely have any, so they're looked for less often there)
+MAX_BACKOFF = 32
+
+
+def velocity(entity):
+    """Returns entity's movement per tick."""
+    dx, dy = entity.directions[entity.direction_i]
+    return dx * entity.speed, dy * entity.speed
+
+
+def arrival(entity):
+    """
+    Returns in how many ticks a moving entity gets to a point of the
+    grid (None if it doesn't move or never gets there).
+    """
+    dx, dy = velocity(entity)
+    # entities move only horizontally or vertically
+    if dx:
+        position, other, speed = entity.x, entity.y, dx
+    elif dy:
+        position, other, speed = entity.y, entity.x, dy
+    else:
+        return None
+    if other % entity.size:
+        return None
+    distance = -position % entity.size if speed > 0 else position % entity.size
+    if distance == 0:
+        distance = entity.size
+    if distance % speed:
+        return None
+    return abs(distance // speed)
+
+
+def decision_tick(entity, goes_on, limit):
+    """
+    Returns the first tick (counted from 1, at most limit + 1) in which
+    an entity is at a point of the grid, where goes_on(position) says
+    it doesn't keep its way. It's also returned when the entity gets to
+    which points of the grid before.
+    """
+    if entity.in_place:
+        tick = 1
+        position = entity.map_position
+        arrivals = []
+    else:
+        ticks = arrival(entity)
+        if ticks is None:
+            return limit + 1, []
+        dx, dy = velocity(entity)
+        tick = ticks + 1
+        position = (
+            (entity.x + dx * ticks) // entity.size,
+            (entity.y + dy * ticks) // entity.size
+            )
+        arrivals = [(ticks, position)]
+    dx, dy = entity.directions[entity.direction_i]
+    cell_ticks = entity.size // entity.speed
+    while tick <= limit:
+        if not goes_on(position):
+            return tick, arrivals
+        position = (position[0] + dx, position[1] + dy)
+        tick += cell_ticks
+        arrivals.append((tick - 1, position))
+    return limit + 1, arrivals
+
+
+def watcher_quiet_ticks(watcher, limit):
+    """Returns how many of the next ticks a watcher keeps its way."""
+    masks = watcher.walkability.masks[0]
+    index = watcher.walkability.index
+    direction_i = watcher.direction_i
+    if isinstance(watcher, simulation_module.ChasingWatcher):
+        # (where he goes depends on where Homer is then)
+        def goes_on(position):
+            return False
+    elif isinstance(watcher, simulation_module.CircularWatcher):
+        side_i = (direction_i + watcher.side) % 4
+
+        def goes_on(position):
+            mask = masks[index(position)]
+            return not mask >> side_i & 1 and mask >> direction_i & 1
+    else:
+        def goes_on(position):
+            return masks[index(position)] >> direction_i & 1
+    return decision_tick(watcher, goes_on, limit)[0] - 1
+
+
+def homer_quiet_ticks(simulation, direction_i, limit):
+    """
+    Returns how many of the next ticks Homer keeps his way (and takes
+    nothing) if the player keeps pressing the arrow in direction_i.
+    """
+    homer = simulation.objects["homer"][0]
+    # the input changed (Homer may turn around), Homer vanishes or he
+    # has just won (and slows down)
+    if (
+        homer.input_direction_i != direction_i
+        or homer.lost
+        or homer.won and homer.speed != 1
+        ):
+        return 0
+    masks = homer.walkability.masks[homer.has_key]
+    index = homer.walkability.index
+
+    if homer.direction_i == 4:
+        # Homer stands and doesn't start moving (or he's already won)
+        if (
+            homer.won
+            or direction_i == 4
+            or not masks[homer.map_index] >> direction_i & 1
+            ):
+            return limit
+        return 0
+
+    if homer.won:
+        def goes_on(position):
+            return True
+    elif homer.direction_i == direction_i:
+        def goes_on(position):
+            return masks[index(position)] >> direction_i & 1
+    else:
+        # he stops or turns at the next point of the grid
+        def goes_on(position):
+            return False
+    tick, arrivals = decision_tick(homer, goes_on, limit)
+
+    # getting to a collectible or the gate
+    collectibles = simulation.objects["collectibles"]
+    gate = simulation.objects["gate"][0].map_position
+    for arrival_tick, position in arrivals:
+        if position in collectibles or position == gate:
+            return min(tick, arrival_tick) - 1
+    return tick - 1
+
+
+def touching_ticks(distance, speed, size):
+    """
+    Returns the first and the last tick in which two entities are at
+    most size apart along an axis, if their distance changes by speed
+    per tick (None as the last one if forever, None if never).
+    """
+    if speed == 0:
+        return (0, None) if abs(distance) <= size else None
+    if speed < 0:
+        distance, speed = -distance, -speed
+    last = (size - distance) // speed
+    first = -((size + distance) // speed)
+    return (first, last) if first <= last else None
+
+
+def collision(first, second, horizon):
+    """
+    Returns in how many ticks (at most horizon) two moving entities
+    collide (None if they don't).
+    """
+    first_dx, first_dy = velocity(first)
+    second_dx, second_dy = velocity(second)
+    start, end = 1, horizon
+    for distance, speed in (
+        (second.x - first.x, second_dx - first_dx),
+        (second.y - first.y, second_dy - first_dy)
+        ):
+        ticks = touching_ticks(distance, speed, first.size)
+        if ticks is None:
+            return None
+        start = max(start, ticks[0])
+        if ticks[1] is not None:
+            end = min(end, ticks[1])
+    return start if start <= end else None
+
+
+def collision_horizon(entities, homer, horizon):
+    """
+    Returns the number of ticks (at most horizon) before the first
+    collision of the entities which matters. Candidate pairs are found
+    by sweeping the areas the entities cover in horizon ticks along
+    the x axis.
+    """
+    areas = []
+    for entity in entities:
+        dx, dy = velocity(entity)
+        areas.append((
+            min(entity.x, entity.x + dx * horizon) - entity.size,
+            max(entity.x, entity.x + dx * horizon),
+            min(entity.y, entity.y + dy * horizon) - entity.size,
+            max(entity.y, entity.y + dy * horizon),
+            entity
+            ))
+    areas.sort(key=lambda area: area[0])
+    active = []
+    for area in areas:
+        left, _, bottom, top, entity = area
+        active = [other for other in active if other[1] >= left]
+        for _, _, other_bottom, other_top, other in active:
+            if (
+                other_bottom <= top and bottom <= other_top
+                # touching Homer matters only if he's not invincible
+                and not (homer.invincible and homer in (entity, other))
+                ):
+                ticks = collision(entity, other, horizon)
+                if ticks is not None:
+                    horizon = ticks - 1
+                    if horizon < MIN_SKIP:
+                        return 0
+        active.append(area)
+    return horizon
+
+
+def quiet_ticks(simulation, direction_i, limit):
+    """
+    Returns how many of the next ticks (at most limit) can be skipped,
+    i. e. only move the entities, if the player keeps pressing the arrow
+    in direction_i (4 if none).
+    """
+    if limit < MIN_SKIP:
+        return 0
+    homer = simulation.objects["homer"][0]
+    watchers = simulation.objects["watchers"]
+    horizon = limit
+    due = simulation.scheduler.next_due()
+    if due is not None:
+        horizon = min(horizon, due - 1)
+    horizon = min(horizon, homer_quiet_ticks(simulation, direction_i, horizon))
+    for watcher in watchers:
+        if horizon < MIN_SKIP:
+            return 0
+        horizon = min(horizon, watcher_quiet_ticks(watcher, horizon))
+    if horizon < MIN_SKIP:
+        return 0
+    return collision_horizon([homer] + watchers, homer, horizon)
+
+
+def last_point(position, speed, ticks, size):
+    """
+    Returns the coordinate of the last point of the grid which an entity
+    got to moving along an axis by ticks (None if none).
+    """
+    end = position + speed * ticks
+    point = end - end % size if speed > 0 else end + (-end % size)
+    if speed > 0 and point > position or speed < 0 and point < position:
+        return point
+    return None
+
+
+def skip(simulation, ticks):
+    """Moves the entities as if the simulation did ticks quiet steps."""
+    simulation.scheduler.skip(ticks)
+    simulation.ticks += ticks
+    simulation.removed.clear()
+
+    homer = simulation.objects["homer"][0]
+    for entity in [homer] + simulation.objects["watchers"]:
+        dx, dy = velocity(entity)
+        if dx or dy:
+            point_x, point_y = entity.x, entity.y
+            if dx:
+                point_x = last_point(entity.x, dx, ticks, entity.size)
+            if dy:
+                point_y = last_point(entity.y, dy, ticks, entity.size)
+            if point_x is not None and point_y is not None:
+                entity.map_position = (
+                    point_x // entity.size, point_y // entity.size
+                    )
+                entity.map_index = entity.walkability.index(
+                    entity.map_position
+                    )
+        entity.x += dx * ticks
+        entity.y += dy * ticks
+        entity.in_place = (
+            entity.x % entity.size == 0
+            and entity.y % entity.size == 0
+            )
+        if entity.direction_i < 4:
+            entity.facing_i = entity.direction_i
+        if entity is not homer:
+            entity.spatial_index.move(entity)
+
+    # flash if invincible
+    if homer.invincible:
+        for _ in range(2 - ticks % 2):
+            homer.opacity = 100 if homer.opacity == 255 else 255
+    else:
+        homer.opacity = 255
+
+
+def advance(simulation, ticks, direction_i=4):
+    """
+    Advances the simulation by the given number of ticks, as if step
+    was called with direction_i each tick, skipping quiet ones.
+    """
+    backoff = 1
+    while ticks > 0:
+        quiet = quiet_ticks(simulation, direction_i, ticks)
+        if quiet > 0:
+            skip(simulation, quiet)
+            ticks -= quiet
+            backoff = 1
+        else:
+            for _ in range(min(backoff, ticks)):
+                simulation.step(direction_i)
+            ticks -= min(backoff, ticks)
+            backoff = min(backoff * 2, MAX_BACKOFF)
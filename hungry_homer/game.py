@@ -1,20 +1,30 @@
 #!/usr/bin/env python3
 
-try:
-    from importlib import resources
-# for Python < 3.7
-except ImportError:
-    import importlib_resources as resources
-
 import pyglet
 
-from hungry_homer import states
+from hungry_homer import (
+    levelpack, maps, overlay, profiler, simulation, states, timestep
+    )
 
 
 class Game(pyglet.window.Window):
 
-    def __init__(self):
-        """Initializes the game window."""
+    def __init__(self, max_ticks_per_frame=8, replay_directory=None,
+                 playback=None, level_pack=None, trace=None,
+                 show_profile=False):
+        """
+        Initializes the game window. At most max_ticks_per_frame ticks
+        are run to catch up with game time before drawing a frame.
+        If replay_directory is given, replays of levels are saved there.
+        If a replay is given for playback, its level is played with its
+        inputs (ValueError is raised if it's of a level of another pack).
+        If level_pack is given, the levels are loaded from that
+        pack instead of the level maps of the game (see levelpack).
+        If a trace path is given, phases of ticks and frames are timed
+        and their percentiles saved there on exit (see profiler).
+        If show_profile is true, they're shown over the game (F3 hides
+        them).
+        """
         self.grid_width = 32
         self.grid_height = 24
         self.object_size = 20
@@ -40,74 +50,79 @@ class Game(pyglet.window.Window):
         self.push_handlers(self.key_handler)
 
         self.clock = pyglet.clock
+        # the game is updated 120 times per second of game time,
+        # frames are drawn as often as possible
+        self.timestep = timestep.FixedTimestep(
+            self.tick, simulation.TICK_RATE, max_ticks=max_ticks_per_frame
+            )
 
         self.maps_location = "hungry_homer.level_maps"
-        self.maps = self.__read_maps()
-
+        # maps are read when their level is opened
+        if level_pack is None:
+            self.maps = maps.Maps(
+                self.maps_location, self.grid_width, self.grid_height
+                )
+        else:
+            self.maps = levelpack.LevelPack(
+                level_pack, self.grid_width, self.grid_height
+                )
+
+        self.replay_directory = replay_directory
+        self.trace = trace
+        self.profiler = None
+        self.overlay = None
+        if trace is not None or show_profile:
+            self.profiler = profiler.Profiler()
+        if show_profile:
+            self.overlay = overlay.Overlay(self, self.profiler)
         self.menu = states.Menu(game=self)
         self.state = self.menu
+        if playback is not None:
+            map_ = self.maps[playback.level_index]
+            # (a replay of a pack is played in the same pack)
+            playback.check(map_)
+            self.state = states.Level(
+                self, map_, playback.level_index, playback
+                )
 
     def on_draw(self):
-        """Clears the window and draws the current state batch."""
+        """Clears the window and draws the current state."""
+        if self.profiler is not None:
+            self.profiler.start()
         self.clear()
-        self.state.batch.draw()
+        self.state.draw()
+        if self.profiler is not None:
+            self.profiler.lap("draw")
+        if self.overlay is not None:
+            self.overlay.draw()
 
     def update(self, dt):
+        """Runs ticks for dt seconds of game time (before each frame)."""
+        self.timestep.update(dt)
+        if self.overlay is not None:
+            self.overlay.update(dt)
+
+    def tick(self):
         """Calls the current state to update itself."""
-        # ignore dt, always move by some number of pixels
+        # always move by some number of pixels
         self.state.update()
 
     def run(self):
-        """Runs game window and updates it every 1/120 s."""
-        self.clock.schedule_interval(self.update, 1/120)
+        """Runs game window and updates it before every frame."""
+        self.clock.schedule(self.update)
         pyglet.app.run()
+        if self.trace is not None:
+            self.profiler.dump(self.trace)
 
     def on_key_press(self, symbol, modifiers):
-        """Call the current state's on_key_press."""
-        self.state.on_key_press(symbol, modifiers)
-
-    def __read_maps(self):
         """
-        Reads maps from map_dir as lists of lists of elements (from bottom
-        to top row), and pads them, so they get centred with given window
-        width and height.
+        Call the current state's on_key_press (or hides/shows
+        the profile).
         """
-        map_paths = sorted([
-            path for path in resources.contents(self.maps_location)
-            if path.endswith(".txt")
-            ])
-        maps = []
-        for path in map_paths:
-            with resources.open_text(self.maps_location, path) as file:
-                map_ = [list(line.rstrip()) for line in file]
-                # reverse <= pyglet counts from the bottom left corner
-                map_.reverse()
-                # if a map is smaller than window size, pad it,
-                # so it gets centred
-                map_height = len(map_)
-                map_width = max((len(row) for row in map_))
-                if map_height > self.grid_height or map_width > self.grid_width:
-                    raise ValueError(
-                        f"map in {path!r} is too big"
-                        + f" ({map_width}x{map_height},"
-                        + f" maximum is {self.grid_width}x{self.grid_height})"
-                        )
-                padding_row_count = (self.grid_height - map_height) // 2
-                padding_column_count = (self.grid_width - map_width) // 2
-                padded = []
-                # pad from the bottom
-                padded.extend([["."] * self.grid_width] * padding_row_count)
-                # pad from the left and the right
-                for row in map_:
-                    new_row = ["."] * padding_column_count + row
-                    new_row += ["."] * (self.grid_width - len(new_row))
-                    padded.append(new_row)
-                # pad from the top
-                padded.extend(
-                    [["."] * self.grid_width] * (self.grid_height - len(padded))
-                    )
-                maps.append(padded)
-        return maps
+        if symbol == self.key.F3 and self.overlay is not None:
+            self.overlay.visible = not self.overlay.visible
+            return
+        self.state.on_key_press(symbol, modifiers)
 
     def __print_maps(self):
         """Prints maps."""
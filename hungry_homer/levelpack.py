@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+"""
+Level packs: many maps compiled into a single binary file which is
+memory-mapped, so opening a pack reads almost nothing and a level is
+decoded only when it's needed. Little-endian layout of a pack:
+
+header   magic b"HHLP", version (uint32), number of levels (uint32)
+index    for each level: offset of its data (uint64), width, height
+         (uint16) and amount of food (uint32)
+data     for each level: its cells (width x height ASCII symbols, rows
+         from bottom to top, shorter rows filled with ".")
+
+A pack is compiled from text maps and inspected with
+
+python -m hungry_homer.levelpack build PACK [MAP.txt...]
+python -m hungry_homer.levelpack info PACK
+"""
+
+from collections.abc import Sequence
+import mmap
+import struct
+import sys
+
+try:
+    from importlib import resources
+# for Python < 3.7
+except ImportError:
+    import importlib_resources as resources
+
+from hungry_homer import maps
+
+MAGIC = b"HHLP"
+VERSION = 2
+HEADER = struct.Struct("<4sII")
+INDEX_ENTRY = struct.Struct("<QHHI")
+
+
+def encode(map_):
+    """
+    Returns the size, the cells and the amount of food of a map (rows
+    of symbols from bottom to top) as they are stored in a pack.
+    """
+    width = max((len(row) for row in map_))
+    cells = "".join(
+        "".join(row).ljust(width, ".") for row in map_
+        ).encode("ascii")
+    return width, len(map_), cells, cells.count(b"*")
+
+
+def write(maps_, path):
+    """
+    Writes maps (lists of rows of symbols from bottom to top, not
+    padded) to a pack.
+    """
+    encoded = [encode(map_) for map_ in maps_]
+    offset = HEADER.size + len(encoded) * INDEX_ENTRY.size
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(encoded)))
+        for width, height, cells, food_count in encoded:
+            file.write(INDEX_ENTRY.pack(offset, width, height, food_count))
+            offset += len(cells)
+        for _, _, cells, _ in encoded:
+            file.write(cells)
+
+
+class LevelPack(Sequence):
+    """
+    Maps in a pack (padded for a window as Maps are). Only the header
+    is read at first, a map is decoded whenever it's needed.
+    """
+
+    def __init__(self, path, grid_width, grid_height):
+        """
+        Opens a pack in the given file (for the given grid size of
+        the window).
+        """
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(
+                f"{path!r} isn't a level pack (of version {VERSION})"
+                )
+
+    def __len__(self):
+        """Returns the number of maps."""
+        return self.count
+
+    def entry(self, i):
+        """
+        Returns the offset, the width, the height and the amount of food
+        of the i-th map.
+        """
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("level pack index out of range")
+        return INDEX_ENTRY.unpack_from(
+            self.data, HEADER.size + i * INDEX_ENTRY.size
+            )
+
+    def __getitem__(self, i):
+        """Returns the i-th map (decoded from the pack)."""
+        offset, width, height, _ = self.entry(i)
+        cells = self.data[offset:(offset + width * height)].decode("ascii")
+        return maps.pad(
+            [list(cells[j:(j + width)]) for j in range(0, len(cells), width)],
+            self.grid_width, self.grid_height
+            )
+
+    def name(self, i):
+        """
+        Returns the name of the i-th map with its size and amount
+        of food (without decoding it).
+        """
+        _, width, height, food_count = self.entry(i)
+        return f"Level {i + 1}  ({width}x{height}, food {food_count})"
+
+    def close(self):
+        """Closes the pack."""
+        self.data.close()
+
+
+def main():
+    """Builds a pack from text maps or prints what's in a pack."""
+    if len(sys.argv) < 3 or sys.argv[1] not in ("build", "info"):
+        sys.exit(
+            "usage: python -m hungry_homer.levelpack build PACK [MAP.txt...]"
+            + "\n       python -m hungry_homer.levelpack info PACK"
+            )
+    if sys.argv[1] == "build":
+        maps_ = []
+        if len(sys.argv) > 3:
+            for path in sys.argv[3:]:
+                with open(path) as file:
+                    maps_.append(maps.parse(file))
+        else:
+            # the levels of the game
+            location = "hungry_homer.level_maps"
+            for path in sorted(resources.contents(location)):
+                if path.endswith(".txt"):
+                    with resources.open_text(location, path) as file:
+                        maps_.append(maps.parse(file))
+        write(maps_, sys.argv[2])
+        print(f"{sys.argv[2]}: {len(maps_)} levels")
+    else:
+        pack = LevelPack(sys.argv[2], 0, 0)
+        print(f"{sys.argv[2]}: {len(pack)} levels")
+        for i in range(len(pack)):
+            _, width, height, food_count = pack.entry(i)
+            print(f"{i:6}  {width}x{height}  food {food_count}")
+        pack.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""Level maps read when a level is opened."""
+
+from collections.abc import Sequence
+
+try:
+    from importlib import resources
+# for Python < 3.7
+except ImportError:
+    import importlib_resources as resources
+
+
+class Maps(Sequence):
+    """
+    Maps in text files of a package. Only their names are listed at
+    first, a map is read the first time it's needed.
+    """
+
+    def __init__(self, location, grid_width, grid_height):
+        """
+        Lists maps in the given package (for the given grid size of
+        the window).
+        """
+        self.location = location
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.paths = sorted([
+            path for path in resources.contents(self.location)
+            if path.endswith(".txt")
+            ])
+        self.maps = {}
+
+    def __len__(self):
+        """Returns the number of maps."""
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        """Returns the i-th map (which is read if needed)."""
+        path = self.paths[i]
+        if path not in self.maps:
+            self.maps[path] = self.read(path)
+        return self.maps[path]
+
+    def name(self, i):
+        """Returns the name of the i-th map (without reading it)."""
+        return f"Level {i + 1}"
+
+    def read(self, path):
+        """
+        Reads a map as a list of lists of elements (from bottom to top
+        row), and pads it, so it gets centred with given window width
+        and height (bigger maps are only padded to rectangles, they're
+        scrolled).
+        """
+        with resources.open_text(self.location, path) as file:
+            return pad(parse(file), self.grid_width, self.grid_height)
+
+
+def parse(lines):
+    """
+    Returns a map of lines of text (from top to bottom) as a list of
+    lists of elements from bottom to top row.
+    """
+    map_ = [list(line.rstrip()) for line in lines]
+    # reverse <= pyglet counts from the bottom left corner
+    map_.reverse()
+    return map_
+
+
+def pad(map_, grid_width, grid_height):
+    """
+    Returns a map padded, so it gets centred in a window of the given
+    grid size (bigger maps are only padded to rectangles).
+    """
+    map_height = len(map_)
+    map_width = max((len(row) for row in map_))
+    width = max(map_width, grid_width)
+    height = max(map_height, grid_height)
+    padding_row_count = (height - map_height) // 2
+    padding_column_count = (width - map_width) // 2
+    # pad from the bottom (with rows which are lists of their own,
+    # so changing a cell doesn't change all the padding rows)
+    padded = [["."] * width for _ in range(padding_row_count)]
+    # pad from the left and the right
+    for row in map_:
+        new_row = ["."] * padding_column_count + row
+        new_row += ["."] * (width - len(new_row))
+        padded.append(new_row)
+    # pad from the top
+    padded.extend(["."] * width for _ in range(height - len(padded)))
+    return padded
@@ -1,86 +1,101 @@
 #!/usr/bin/env python3
 
-"""Module with classes for all the level objects."""
+"""
+Module with sprites for all the level objects. They only draw entities
+of a simulation (see the simulation module) which holds the game rules.
+"""
 
 import pyglet
-key = pyglet.window.key
+
+from hungry_homer import atlas, simulation
+
+
+class Images(dict):
+    """
+    Object images (regions of a single texture) which are loaded when
+    any of them is used for the first time.
+    """
+
+    # numbers of frames of images which are grids (i. e. animations or
+    # orientations)
+    frame_counts = {
+        "homer": 4,
+        "circular_watcher": 4,
+        "linear_watcher": 4,
+        "chasing_watcher": 4,
+        "gate": 2,
+        "bell": 5
+        }
+
+    def __init__(self):
+        """Initializes images without loading them."""
+        super().__init__()
+        self.regions = None
+
+    def __missing__(self, name):
+        """Loads an image (and the atlas if necessary)."""
+        if self.regions is None:
+            self.regions = atlas.load()
+        image = self.regions[name]
+        if name in self.frame_counts:
+            image = pyglet.image.ImageGrid(image, 1, self.frame_counts[name])
+        self[name] = image
+        return image
 
 
-# set directory with images
-pyglet.resource.path = ['@hungry_homer.resources_dir']
-pyglet.resource.reindex()
 # object images
-images = {
-    "homer": pyglet.image.ImageGrid(
-        pyglet.resource.image("homer.png"), 1, 4
-        ),
-    "brick": pyglet.resource.image("brick.png"),
-    "circular_watcher": pyglet.image.ImageGrid(
-        pyglet.resource.image("circular_watcher.png"), 1, 4
-        ),
-    "linear_watcher": pyglet.image.ImageGrid(
-        pyglet.resource.image("linear_watcher.png"), 1, 4
-        ),
-    "key": pyglet.resource.image("key.png"),
-    "gate": pyglet.image.ImageGrid(
-        pyglet.resource.image("gate.png"), 1, 2
-        ),
-    "food": pyglet.resource.image("food.png"),
-    "bell": pyglet.image.ImageGrid(
-        pyglet.resource.image("bell.png"), 1, 5
-        )
-    }
+images = Images()
 
 
 class Object(pyglet.sprite.Sprite):
-    """Base class for all level objects."""
-
-    def __init__(self, game, level, map_position, *args, **kwargs):
-        """Initializes an object."""
-        self.game = game
-        self.level = level
-        self.size = self.game.object_size
-        self.map_position = map_position
-        self.in_place = True    # i. e. at exactly one point of the grid
-        self.exists = True
-        super().__init__(
-            *args, **kwargs,
-            x=(map_position[0] * self.size),
-            y=(map_position[1] * self.size)
-            )
+    """Base class for sprites of all level objects."""
+
+    def __init__(self, entity, *args, **kwargs):
+        """Initializes an object drawing the given entity."""
+        self.entity = entity
+        super().__init__(*args, **kwargs, x=entity.x, y=entity.y)
 
     def update(self):
-        """Updates the object (should be called every frame)."""
+        """
+        Updates the sprite according to its entity (should be called
+        every frame).
+        """
         pass
 
-    def handle_collision(self, other):
-        """Updates the object after colliding with another one."""
-        pass
 
-    def collides(self, other):
-        """
-        Finds whether the object collides with another one, i. e.
-        whether they at least touch with their corners.
-        """
-        return (
-            abs(other.x - self.x) <= self.size
-            and abs(other.y - self.y) <= self.size
-            )
+class StaticLayer(pyglet.sprite.Sprite):
+    """
+    Bricks of a level (obstacles through which noone can go) baked into
+    a single texture, so they're drawn at once.
+    """
 
-    def overlaps(self, other):
+    def __init__(self, map_, *args, cells=None, **kwargs):
         """
-        Finds whether the object completely overlaps another one, i. e.
-        whether they have the same coordinates.
+        Initializes bricks of a map (rows of symbols from bottom to top),
+        or only of its cells (ranges of columns and rows) if given.
         """
-        return other.x == self.x and other.y == self.y
-
-
-class Brick(Object):
-    """An obstacle through which noone can go."""
-
-    def __init__(self, *args, **kwargs):
-        """Initializes a brick."""
-        super().__init__(img=images["brick"], *args, **kwargs)
+        size = simulation.OBJECT_SIZE
+        if cells is None:
+            cells = (
+                range(max((len(row) for row in map_))), range(len(map_))
+                )
+        columns, rows = cells
+        texture = pyglet.image.Texture.create(
+            len(columns) * size, len(rows) * size
+            )
+        brick = images["brick"].get_image_data()
+        for i in rows:
+            row = map_[i]
+            for j in columns:
+                if j < len(row) and row[j] == "X":
+                    texture.blit_into(
+                        brick, (j - columns.start) * size,
+                        (i - rows.start) * size, 0
+                        )
+        super().__init__(
+            texture, *args, x=columns.start * size, y=rows.start * size,
+            **kwargs
+            )
 
 
 class Gate(Object):
@@ -92,18 +107,14 @@ class Gate(Object):
     def __init__(self, *args, **kwargs):
         """Initializes the gate."""
         self.image_grid = images["gate"]
-        super().__init__(*args, img=self.image_grid[0], **kwargs)
         self.opened = False
+        super().__init__(*args, img=self.image_grid[0], **kwargs)
 
-    def open(self):
+    def update(self):
         """Updates image according to whether the gate is opened."""
-        if self.level.objects["homer"][0].has_key:
-            self.opened = True
-        if self.opened:
-            self.image = self.image_grid[1]
-        else:
-            self.image = self.image_grid[0]
-
+        if self.entity.opened != self.opened:
+            self.opened = self.entity.opened
+            self.image = self.image_grid[1 if self.opened else 0]
 
 
 class MovingObject(Object):
@@ -112,33 +123,19 @@ class MovingObject(Object):
     def __init__(self, image_grid, *args, **kwargs):
         """Initializes a moving object."""
         self.image_grid = image_grid
+        self.facing_i = 0
         super().__init__(*args, img=self.image_grid[0], **kwargs)
-        self.speed = self.game.object_speed
-        self.directions = self.game.object_directions
-        self.direction_i = 4
 
     def update(self):
         """
         Updates moving object's coordinates and image orientation
-        according to its direction.
+        according to its entity.
         """
-        # update coordinates
-        self.x += self.directions[self.direction_i][0] * self.speed
-        self.y += self.directions[self.direction_i][1] * self.speed
-        self.in_place = (
-            self.x % self.size == 0
-            and self.y % self.size == 0
-            )
-        if self.in_place:
-            self.map_position = (
-                self.x // self.size,
-                self.y // self.size
-                )
-        # update image orientation
-        if self.direction_i < 4:
-            # BUG: orientation should be changed also when trying to
-            # move into a wall (this manifests only in a corner)
-            self.image = self.image_grid[self.direction_i]
+        if self.x != self.entity.x or self.y != self.entity.y:
+            self.position = (self.entity.x, self.entity.y)
+        if self.facing_i != self.entity.facing_i:
+            self.facing_i = self.entity.facing_i
+            self.image = self.image_grid[self.facing_i]
 
 
 class Homer(MovingObject):
@@ -147,132 +144,13 @@ class Homer(MovingObject):
     def __init__(self, *args, **kwargs):
         """Initializes Homer."""
         super().__init__(image_grid=images["homer"], *args, **kwargs)
-        self.key = self.game.key
-        self.key_handler = self.game.key_handler
-        self.food_count = 0
-        self.has_key = False
-        self.bump_count = 0
-        self.invincible = False
-        self.lost = False
-        self.won = False
 
     def update(self):
-        """Updates Homers's direction etc."""
-
-        # vanish if lost
-        if self.lost:
-            if self.opacity > 0:
-                self.opacity -= 5
-            # restart the level
-            else:
-                self.level.setup_objects()
-        else:
-            # flash if invincible (after bumping into a watcher or
-            # winning)
-            if self.invincible and self.opacity == 255:
-                self.opacity = 100
-            else:
-                self.opacity = 255
-
-            # after winning slowly go away
-            if self.won:
-                self.speed = 1
-
-            else:
-                # register new direction
-                for i, key in enumerate(
-                    (self.key.UP, self.key.RIGHT,
-                     self.key.DOWN, self.key.LEFT)
-                    ):
-                    if self.key_handler[key]:
-                        new_direction_i = i
-                        break
-                # no key pressed => don't move
-                else:
-                    new_direction_i = 4
-
-                # stop before moving into a brick
-                if (
-                    self.in_place
-                    and self.level.is_forbidden(
-                        self.map_position, new_direction_i,
-                        has_key=self.has_key
-                        )
-                    ):
-                    new_direction_i = 4
-
-                # actually change direction
-                if (
-                    # only if in place
-                    self.in_place
-                    # or if Homer turns around
-                    or (
-                        new_direction_i < 4
-                        and abs(self.direction_i - new_direction_i) == 2
-                        )
-                    ):
-                    self.direction_i = new_direction_i
-
-        # change coordinates accordingly
+        """Updates Homer's coordinates, orientation and opacity."""
+        if self.opacity != self.entity.opacity:
+            self.opacity = self.entity.opacity
         super().update()
 
-    def handle_collision(self, other):
-        """Updates Homer after colliding with collectibles or watchers."""
-
-        # watchers
-        if (
-            self.collides(other)
-            and isinstance(other, Watcher)
-            and not self.invincible
-            ):
-            if self.bump_count == 1:
-                self.lost = True
-                # dramatically fly down
-                self.speed = 4
-                self.direction_i = 2
-            else:
-                self.bump_count += 1
-                self.invincible = True
-                self.game.clock.schedule_once(
-                    self.end_invincibility, 1.0
-                    )
-
-        # collectibles + gate + bell
-        if self.overlaps(other):
-            if isinstance(other, Food):
-                self.food_count += 1
-            elif isinstance(other, Key):
-                self.has_key = True
-                self.level.objects["gate"][0].open()
-            elif (
-                isinstance(other, Gate)
-                and self.food_count == self.level.food_count
-                # only if Homer didn't already enter the gate
-                and not self.won
-                ):
-                # now it doesn't matter whether a watcher happens to
-                # touch Homer (and this also does that cool flashing)
-                self.invincible = True
-                self.won = True
-                self.game.clock.schedule_once(
-                    self.level.complete, 1.0
-                    )
-            elif (
-                isinstance(other, Bell)
-                # Homer can ring it only once
-                and not other.rung
-                ):
-                self.invincible = True
-                # if already invincible, prevent premature end_invincibility
-                self.game.clock.unschedule(self.end_invincibility)
-                self.game.clock.schedule_once(
-                    self.end_invincibility, 3.0
-                    )
-
-    def end_invincibility(self, dt):
-        """Ends invincibility after bumping into a watcher."""
-        self.invincible = False
-
 
 class Watcher(MovingObject):
     """Base class for watchers."""
@@ -281,86 +159,32 @@ class Watcher(MovingObject):
 class CircularWatcher(Watcher):
     """A watcher who always keeps a wall on his left/right side."""
 
-    def __init__(self, side, direction_i, *args, **kwargs):
+    def __init__(self, *args, **kwargs):
         """Initializes a circular watcher."""
         super().__init__(image_grid=images["circular_watcher"], *args, **kwargs)
-        self.direction_i = direction_i
-        self.side = side
-
-    def update(self):
-        """
-        Always keeps a wall on the given side. (If no wall is there,
-        they turn to the side; if a wall is ahead, they turn to the
-        other side.)
-        """
-        if self.in_place:
-            # no wall on the given side => turn to the side
-            if not self.level.is_forbidden(
-                self.map_position, (self.direction_i + self.side) % 4
-                ):
-                self.direction_i = (self.direction_i + self.side) % 4
-            else:
-                # wall ahead => turn to the other side
-                # (this may happen only twice, unless the watcher is
-                # completely enclosed which really shouldn't happen)
-                i = 0
-                while (
-                    self.level.is_forbidden(
-                        self.map_position, self.direction_i
-                        )
-                    and i <= 2
-                    ):
-                    self.direction_i = (self.direction_i - self.side) % 4
-                    i += 1
-        super().update()
-
-    def handle_collision(self, other):
-        """Changes the side after bumping into another watcher."""
-        if self.collides(other) and isinstance(other, Watcher):
-            self.side *= -1
-            self.direction_i = (self.direction_i + 2) % 4
 
 
 class LinearWatcher(Watcher):
     """A watcher who moves horizontally/vertically."""
 
-    def __init__(self, direction_i, *args, **kwargs):
+    def __init__(self, *args, **kwargs):
         """Initializes a linear watcher."""
         super().__init__(image_grid=images["linear_watcher"], *args, **kwargs)
-        self.direction_i = direction_i
 
-    def update(self):
-        """Turns around after bumping into wall."""
-        if self.in_place:
-            # wall ahead
-            if self.level.is_forbidden(
-                self.map_position, self.direction_i
-                ):
-                self.turn_around()
-        super().update()
 
-    def turn_around(self):
-        """Turns around."""
-        self.direction_i = (self.direction_i + 2) % 4
+class ChasingWatcher(Watcher):
+    """A watcher who goes after Homer."""
 
-    def handle_collision(self, other):
-        """Turns around after bumping into another watcher."""
-        # return
-        if self.collides(other) and isinstance(other, Watcher):
-            self.turn_around()
+    def __init__(self, *args, **kwargs):
+        """Initializes a chasing watcher."""
+        super().__init__(
+            image_grid=images["chasing_watcher"], *args, **kwargs
+            )
 
 
 class Collectible(Object):
     """Base class for objects which Homer can take."""
 
-    def handle_collision(self, other):
-        """
-        Marks itself as to be deleted after it is completely overlapped
-        by Homer.
-        """
-        if self.overlaps(other) and isinstance(other, Homer):
-            self.exists = False
-
 
 class Food(Collectible):
     """Food which can be eaten by Homer."""
@@ -383,23 +207,37 @@ class Bell(Object):
     def __init__(self, *args, **kwargs):
         """Initializes a bell."""
         self.image_grid = images["bell"]
+        self.ringing = False
         self.rung = False
         super().__init__(*args, img=self.image_grid[0], **kwargs)
 
-    def handle_collision(self, other):
+    def update(self):
         """
-        Rings if Homer hasn't rung it yet.
+        Rings while the bell is ringing, then stays silent (and becomes
+        the unrung bell again when the level is restarted).
         """
-        if not self.rung and self.overlaps(other) and isinstance(other, Homer):
-            self.rung = True
-            self.image = pyglet.image.Animation.from_image_sequence(
-                images["bell"][:4], duration=0.1
-                )
-            self.game.clock.schedule_once(
-                self.stop_ringing, 3.0
-                )
-
-    def stop_ringing(self, dt):
-        """Stops ringing."""
-        self.image = self.image_grid[4]
-
+        if (
+            self.entity.ringing != self.ringing
+            or self.entity.rung != self.rung
+            ):
+            self.ringing = self.entity.ringing
+            self.rung = self.entity.rung
+            if self.ringing:
+                self.image = pyglet.image.Animation.from_image_sequence(
+                    images["bell"][:4], duration=0.1
+                    )
+            else:
+                self.image = self.image_grid[4 if self.rung else 0]
+
+
+# sprite classes for the entity classes
+classes = {
+    simulation.Gate: Gate,
+    simulation.Homer: Homer,
+    simulation.CircularWatcher: CircularWatcher,
+    simulation.LinearWatcher: LinearWatcher,
+    simulation.ChasingWatcher: ChasingWatcher,
+    simulation.Food: Food,
+    simulation.Key: Key,
+    simulation.Bell: Bell
+    }
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""Overlay with the frame rate, the tick rate and the costs of phases."""
+
+import pyglet
+
+
+class Overlay:
+    """
+    Text in the top left corner of the window, refreshed a few times
+    per second (setting the text lays it out again).
+    """
+
+    def __init__(self, game, profiler, interval=0.5):
+        """
+        Initializes an overlay of a game with the phases timed by
+        a profiler, refreshed every interval seconds.
+        """
+        self.game = game
+        self.profiler = profiler
+        self.interval = interval
+        self.visible = True
+        self.batch = pyglet.graphics.Batch()
+        # (a translucent white background, so the text can be read)
+        self.background = pyglet.shapes.Rectangle(
+            0, game.height, 0, 0, color=(255, 255, 255),
+            batch=self.batch, group=pyglet.graphics.OrderedGroup(0)
+            )
+        self.background.opacity = 200
+        self.label = pyglet.text.Label(
+            x=4, y=game.height - 4, anchor_y="top",
+            width=game.width, multiline=True,
+            font_name="monospace", font_size=9,
+            color=(200, 0, 0, 255),   # red
+            batch=self.batch, group=pyglet.graphics.OrderedGroup(1)
+            )
+        self.elapsed = 0.0
+        self.frames = 0
+
+    def update(self, dt):
+        """Counts a frame (dt seconds after the previous one)."""
+        self.elapsed += dt
+        self.frames += 1
+        if self.elapsed < self.interval:
+            return
+        lines = [
+            f"{self.frames / self.elapsed:5.0f} FPS"
+            + f"  {self.game.timestep.tick_rate:5.0f} ticks/s"
+            + f"  {self.game.timestep.dropped_ticks} dropped",
+            f"{'ms':18} {'p50':>6} {'p95':>6} {'p99':>6}"
+            ]
+        for phase in self.profiler.phases:
+            values = self.profiler.percentiles(phase)
+            if values[0] is not None:
+                lines.append(f"{phase:18}" + "".join(
+                    f" {value * 1000:6.2f}" for value in values
+                    ))
+        self.label.text = "\n".join(lines)
+        self.background.width = self.label.content_width + 8
+        self.background.height = self.label.content_height + 8
+        self.background.y = self.game.height - self.background.height
+        self.elapsed = 0.0
+        self.frames = 0
+
+    def draw(self):
+        """Draws the overlay (unless it's hidden)."""
+        if self.visible:
+            self.batch.draw()
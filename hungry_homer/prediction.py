@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+
+"""
+Prediction of where watchers are in any tick of a level without
+simulating up to it. Watchers never react to Homer and, alone on the
+static map, a watcher's path goes round and round, so it's traced once
+until it repeats and kept compactly (as its cells and directions in
+the ticks when it's in place). Its position in any tick is then
+computed from that in O(1).
+
+Watchers interact only when they bump into each other (and turn
+around). The paths are checked for that ahead of the queries, and in
+the tick when watchers meet the simulation is stepped instead and the
+paths of those whose way changed are traced again from there, so the
+predictions are exactly what stepping the simulation gives:
+
+predictor = prediction.Predictor(map_)
+x, y = predictor.position(watcher_i, ticks)
+"""
+
+import array
+import bisect
+import math
+
+from hungry_homer import fastforward, simulation, spatial
+
+SIZE = simulation.OBJECT_SIZE
+SPEED = simulation.OBJECT_SPEED
+DIRECTIONS = simulation.OBJECT_DIRECTIONS
+# ticks in which a watcher goes from a cell to an adjacent one
+MOVE_TICKS = SIZE // SPEED
+
+
+class Path:
+    """
+    Path of a watcher alone from a tick: the way to the first point of
+    the grid (if it isn't in place) and then its cells and directions
+    in which it leaves them (cell index * 4 + direction_i), one per
+    MOVE_TICKS ticks, the last ones repeated from the loop index on.
+    The points are traced only as far as they're needed (until they
+    repeat).
+    """
+
+    __slots__ = (
+        "start", "x", "y", "direction_i", "side", "origin", "points",
+        "loop", "watcher", "offsets", "indices", "cell", "next_i"
+        )
+
+    def __init__(self, watcher, ticks):
+        """Starts the path of a watcher from its state in a tick."""
+        self.start = ticks
+        self.x = watcher.x
+        self.y = watcher.y
+        self.direction_i = watcher.direction_i
+        # (linear watchers have no side)
+        self.side = getattr(watcher, "side", 0)
+        # the first tick in which it's in place
+        self.origin = ticks
+        if not watcher.in_place:
+            self.origin += fastforward.arrival(watcher)
+        self.points = array.array("i")
+        self.loop = None
+
+        # state of the tracing (the watcher decides where it goes on
+        # by its cell and the direction in which it came there)
+        self.watcher = watcher
+        width = watcher.walkability.width
+        self.offsets = [dx + dy * width for dx, dy in DIRECTIONS[:4]]
+        dx, dy = DIRECTIONS[self.direction_i]
+        distance = (self.origin - ticks) * SPEED
+        self.cell = watcher.walkability.index((
+            (self.x + dx * distance) // SIZE, (self.y + dy * distance) // SIZE
+            ))
+        self.next_i = self.direction_i
+        # indices of the points by the cells and the directions
+        self.indices = {}
+
+    def trace(self, count):
+        """Traces the path up to count points (or until it repeats)."""
+        points = self.points
+        while len(points) < count and self.loop is None:
+            cell = self.cell
+            direction_i = self.next_i
+            i = self.indices.get((cell, direction_i))
+            if i is not None:
+                self.loop = i
+                # (not needed anymore)
+                self.watcher = self.offsets = self.indices = None
+                return
+            self.indices[(cell, direction_i)] = len(points)
+            direction_i = self.watcher.direction_from(cell, direction_i)
+            points.append(cell * 4 + direction_i)
+            self.cell = cell + self.offsets[direction_i]
+            self.next_i = direction_i
+
+    def point(self, ticks):
+        """
+        Returns the index of the last point the watcher was in by the
+        given tick (at least origin) and the ticks since then.
+        """
+        k, ticks = divmod(ticks - self.origin, MOVE_TICKS)
+        if k >= len(self.points):
+            # (one more, to find out whether it's the first repeated one)
+            self.trace(k + 2)
+            if k >= len(self.points):
+                k = self.loop + (k - self.loop) % (
+                    len(self.points) - self.loop
+                    )
+        return k, ticks
+
+    def position(self, ticks, width):
+        """
+        Returns the coordinates of the watcher in a tick (in a map of
+        the given width).
+        """
+        if ticks < self.origin:
+            dx, dy = DIRECTIONS[self.direction_i]
+            distance = (ticks - self.start) * SPEED
+            return self.x + dx * distance, self.y + dy * distance
+        k, ticks = self.point(ticks)
+        cell, direction_i = divmod(self.points[k], 4)
+        dx, dy = DIRECTIONS[direction_i]
+        return (
+            cell % width * SIZE + dx * SPEED * ticks,
+            cell // width * SIZE + dy * SPEED * ticks
+            )
+
+    def direction(self, ticks):
+        """
+        Returns the direction of the watcher in a tick (in which it came
+        if it's in place).
+        """
+        if ticks < self.origin:
+            return self.direction_i
+        k, ticks = self.point(ticks)
+        if ticks:
+            return self.points[k] & 3
+        if k == 0:
+            return self.direction_i
+        # (the first point of the loop is reached from the last one in
+        # the same direction as the first time)
+        return self.points[k - 1] & 3
+
+    def next_point(self, ticks):
+        """Returns the first tick after the given one when it's in place."""
+        if ticks < self.origin:
+            return self.origin
+        return ticks + MOVE_TICKS - (ticks - self.origin) % MOVE_TICKS
+
+    def repeats(self):
+        """
+        Returns the tick from which the path repeats and the period
+        (in ticks).
+        """
+        while self.loop is None:
+            self.trace(2 * len(self.points) + 1)
+        return (
+            self.origin + self.loop * MOVE_TICKS,
+            (len(self.points) - self.loop) * MOVE_TICKS
+            )
+
+
+class Predictor:
+    """
+    Paths of the watchers of a map from the start of the level. Each
+    watcher has a path from the start and a new one from each tick when
+    its way was changed by meeting another one.
+    """
+
+    def __init__(self, map_):
+        """Starts the paths of the watchers in a map."""
+        # (Homer can't be bumped there, so it never restarts)
+        self.simulation = simulation.Simulation(map_)
+        self.simulation.objects["homer"][0].invincible = True
+        # (only those which meet are stepped there)
+        self.watchers = list(self.simulation.objects["watchers"])
+        if any(
+            isinstance(watcher, simulation.ChasingWatcher)
+            for watcher in self.watchers
+            ):
+            raise ValueError("chasing watchers react to Homer")
+        self.width = self.simulation.walkability.width
+        # ticks from which the paths of each watcher go and the paths
+        self.starts = [[0] for _ in self.watchers]
+        self.paths = [[Path(watcher, 0)] for watcher in self.watchers]
+        # the latest paths (checked for meeting up to this tick)
+        self.current = [paths[0] for paths in self.paths]
+        self.checked = 0
+        # the last tick when watchers met
+        self.met = 0
+        # (see joint_repeats, None until it's needed)
+        self.repetition = None
+        # the first tick from which the watchers repeat (as in the tick
+        # start + period before), once it's known they never meet again
+        self.start = None
+        self.period = None
+
+    def path(self, watcher_i, ticks):
+        """Returns the path of a watcher in a tick."""
+        self.extend(ticks)
+        starts = self.starts[watcher_i]
+        if ticks >= starts[-1]:
+            return self.paths[watcher_i][-1]
+        return self.paths[watcher_i][bisect.bisect_right(starts, ticks) - 1]
+
+    def position(self, watcher_i, ticks):
+        """Returns the coordinates of a watcher in a tick."""
+        return self.path(watcher_i, ticks).position(ticks, self.width)
+
+    def positions(self, ticks):
+        """Returns the coordinates of all the watchers in a tick."""
+        return [self.position(i, ticks) for i in range(len(self.watchers))]
+
+    def state(self, watcher_i, ticks):
+        """
+        Returns the coordinates, the direction and the side (0 for
+        linear watchers) of a watcher in a tick.
+        """
+        path = self.path(watcher_i, ticks)
+        return (
+            *path.position(ticks, self.width), path.direction(ticks),
+            path.side
+            )
+
+    def phase(self, ticks):
+        """
+        Returns the first tick in which the watchers are as in the given
+        one, if it's known already that they repeat (the tick itself if
+        not).
+        """
+        self.extend(ticks)
+        if self.period is None:
+            if self.repetition is None:
+                self.repetition = self.joint_repeats()
+            start, period = self.repetition
+            # (if the watchers didn't meet in a whole period since they
+            # repeat, they never will)
+            if self.checked < start + period:
+                return ticks
+            self.start = start
+            self.period = period
+        if ticks < self.start:
+            return ticks
+        return self.start + (ticks - self.start) % self.period
+
+    def joint_repeats(self):
+        """
+        Returns the tick from which all the latest paths repeat and
+        their common period (the least common multiple of theirs).
+        """
+        start = self.met
+        period = 1
+        for path in self.current:
+            path_start, path_period = path.repeats()
+            start = max(start, path_start)
+            period = period * path_period // math.gcd(period, path_period)
+        return start, period
+
+    def extend(self, ticks):
+        """Checks the paths for meeting watchers up to a tick."""
+        while self.checked < ticks and self.period is None:
+            meeting, met = self.meeting(
+                self.checked, self.checked + MOVE_TICKS
+                )
+            if meeting is None:
+                self.checked += MOVE_TICKS
+            else:
+                self.meet(meeting, met)
+
+    def meeting(self, first, last):
+        """
+        Returns the first tick after first (at most last) in which
+        watchers meet (None if they don't) and the indices of those
+        which meet then. Candidate pairs are found by sweeping the areas
+        they cover in these ticks along the x axis (they go straight
+        except in the points of the grid).
+        """
+        width = self.width
+        areas = []
+        for i, path in enumerate(self.current):
+            ticks = [first, last]
+            point = path.next_point(first)
+            if point < last:
+                ticks.append(point)
+            coordinates = [path.position(tick, width) for tick in ticks]
+            xs = [x for x, _ in coordinates]
+            ys = [y for _, y in coordinates]
+            areas.append((min(xs) - SIZE, max(xs), min(ys), max(ys), i))
+        areas.sort(key=lambda area: area[0])
+        result = None
+        met = set()
+        active = []
+        for area in areas:
+            left, _, bottom, top, i = area
+            path = self.current[i]
+            active = [other for other in active if other[1] >= left]
+            for _, _, other_bottom, other_top, other_i in active:
+                if other_bottom - SIZE > top or bottom - SIZE > other_top:
+                    continue
+                other = self.current[other_i]
+                for tick in range(first + 1, (result or last) + 1):
+                    x, y = path.position(tick, width)
+                    other_x, other_y = other.position(tick, width)
+                    if abs(x - other_x) <= SIZE and abs(y - other_y) <= SIZE:
+                        if tick != result:
+                            result = tick
+                            met = set()
+                        met.update((i, other_i))
+                        break
+            active.append(area)
+        return result, met
+
+    def meet(self, ticks, met):
+        """
+        Steps the watchers which meet in a tick from the tick before (the
+        others just go on, in the simulation without them) and starts
+        new paths of those whose way changed.
+        """
+        width = self.width
+        watchers = [self.watchers[i] for i in sorted(met)]
+        self.simulation.objects["watchers"] = watchers
+        self.simulation.watcher_index = spatial.SpatialHash(SIZE)
+        for i in sorted(met):
+            watcher = self.watchers[i]
+            path = self.current[i]
+            watcher.x, watcher.y = path.position(ticks - 1, width)
+            watcher.direction_i = path.direction(ticks - 1)
+            if path.side:
+                watcher.side = path.side
+            watcher.in_place = (
+                watcher.x % SIZE == 0 and watcher.y % SIZE == 0
+                )
+            # (only used in place)
+            watcher.map_position = (watcher.x // SIZE, watcher.y // SIZE)
+            watcher.map_index = watcher.walkability.index(
+                watcher.map_position
+                )
+            self.simulation.watcher_index.insert(watcher)
+        self.simulation.ticks = ticks - 1
+        self.simulation.step()
+        for i in sorted(met):
+            watcher = self.watchers[i]
+            path = self.current[i]
+            if (
+                (watcher.x, watcher.y) != path.position(ticks, width)
+                or watcher.direction_i != path.direction(ticks)
+                or getattr(watcher, "side", 0) != path.side
+                ):
+                path = Path(watcher, ticks)
+                self.current[i] = path
+                self.starts[i].append(ticks)
+                self.paths[i].append(path)
+        self.checked = ticks
+        self.met = ticks
+        self.repetition = None
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Timing of the phases of ticks and frames. The last samples of each
+phase are kept in a ring of preallocated floats, so percentiles can be
+computed at any time and the samples dumped to a trace. Code timing
+its phases only checks that it has a profiler, so without one it costs
+next to nothing.
+"""
+
+import array
+import csv
+import json
+import time
+
+# phases of a tick (see Simulation.step and Level.update), the whole
+# tick and drawing a frame
+PHASES = (
+    "entities", "homer collisions", "watcher collisions", "history",
+    "sprites", "tick", "draw"
+    )
+
+
+class Profiler:
+    """
+    Durations of phases. start() starts timing a tick (or a frame),
+    lap(phase) records the time since the previous lap (or the start)
+    as a sample of a phase, total(phase) the time since the start.
+    """
+
+    def __init__(self, phases=PHASES, capacity=4096):
+        """Initializes rings of capacity samples for each phase."""
+        self.phases = phases
+        self.capacity = capacity
+        self.samples = {
+            phase: array.array("d", bytes(8 * capacity)) for phase in phases
+            }
+        # samples recorded in total (the ring keeps the last capacity)
+        self.counts = dict.fromkeys(phases, 0)
+        self.started = 0.0
+        self.last = 0.0
+
+    def start(self):
+        """Starts timing."""
+        self.started = self.last = time.perf_counter()
+
+    def record(self, phase, duration):
+        """Records a duration (in seconds) of a phase."""
+        count = self.counts[phase]
+        self.samples[phase][count % self.capacity] = duration
+        self.counts[phase] = count + 1
+
+    def lap(self, phase):
+        """Records the time since the previous lap as a sample of a phase."""
+        now = time.perf_counter()
+        self.record(phase, now - self.last)
+        self.last = now
+
+    def total(self, phase):
+        """Records the time since the start as a sample of a phase."""
+        self.record(phase, time.perf_counter() - self.started)
+
+    def percentiles(self, phase, percents=(50, 95, 99)):
+        """
+        Returns percentiles (in seconds) of the kept samples of a phase
+        (None if there are none).
+        """
+        samples = sorted(
+            self.samples[phase][:min(self.counts[phase], self.capacity)]
+            )
+        if not samples:
+            return [None for _ in percents]
+        return [
+            samples[round(percent / 100 * (len(samples) - 1))]
+            for percent in percents
+            ]
+
+    def dump(self, path):
+        """
+        Writes the percentiles of the phases (in ms) to a CSV file, or
+        also the kept samples to a JSON file (if the path ends with
+        .json).
+        """
+        rows = []
+        for phase in self.phases:
+            rows.append([phase, self.counts[phase]] + [
+                None if value is None else value * 1000
+                for value in self.percentiles(phase)
+                ])
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({
+                    phase: {
+                        "count": count, "p50": p50, "p95": p95, "p99": p99,
+                        # (oldest first)
+                        "samples": [
+                            value * 1000 for value in self.kept(phase)
+                            ]
+                        }
+                    for phase, count, p50, p95, p99 in rows
+                    }, file)
+        else:
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["phase", "count", "p50", "p95", "p99"])
+                writer.writerows(rows)
+
+    def kept(self, phase):
+        """Returns the kept samples of a phase from the oldest one."""
+        count = self.counts[phase]
+        samples = self.samples[phase]
+        if count <= self.capacity:
+            return samples[:count]
+        i = count % self.capacity
+        return samples[i:] + samples[:i]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+"""
+Software rendering of a simulation into NumPy arrays, without OpenGL
+(e.g. observations for automated players). Images are decoded by pypng
+bundled with pyglet. It needs NumPy (pip install hungry_homer[raster]).
+"""
+
+import os
+
+import numpy as np
+from pyglet.extlibs import png
+
+from hungry_homer import atlas, simulation
+
+# channels of downsampled grids (coverage of cells by object types)
+CHANNELS = (
+    "brick", "food", "key", "bell", "gate", "watcher", "homer"
+    )
+# images of the entity classes and their channels
+IMAGES = {
+    simulation.Homer: ("homer", "homer"),
+    simulation.CircularWatcher: ("circular_watcher", "watcher"),
+    simulation.LinearWatcher: ("linear_watcher", "watcher"),
+    simulation.ChasingWatcher: ("chasing_watcher", "watcher"),
+    simulation.Food: ("food", "food"),
+    simulation.Key: ("key", "key"),
+    simulation.Bell: ("bell", "bell"),
+    simulation.Gate: ("gate", "gate")
+    }
+# a ringing bell changes its image every 0.1 s
+BELL_FRAME_TICKS = simulation.TICK_RATE // 10
+
+BACKGROUND = 255
+
+
+def load_images(size=simulation.OBJECT_SIZE):
+    """
+    Returns frames of the object images (as lists of RGBA arrays from
+    top to bottom of shape (size, size, 4), as float32 from 0 to 1).
+    """
+    images = {}
+    for name in atlas.NAMES:
+        width, height, rows, _ = png.Reader(
+            filename=os.path.join(atlas.directory, name + ".png")
+            ).asRGBA8()
+        pixels = np.array(
+            [np.frombuffer(bytes(row), dtype=np.uint8) for row in rows]
+            ).reshape(height, width, 4).astype(np.float32) / 255
+        images[name] = [
+            pixels[:, i:(i + size)] for i in range(0, width, size)
+            ]
+    return images
+
+
+class Rasterizer:
+    """
+    Renderer of a simulation into a frame buffer which is reused
+    between frames. Only cells whose contents changed are drawn again.
+    """
+
+    def __init__(self, simulation_, images=None):
+        """Initializes a renderer of a simulation."""
+        self.simulation = simulation_
+        images = images if images is not None else load_images()
+        # premultiplied colours (from 0 to 255) and alphas of the frames
+        self.images = {
+            name: [
+                (frame[..., :3] * frame[..., 3:] * 255, frame[..., 3:])
+                for frame in frames
+                ]
+            for name, frames in images.items()
+            }
+        self.size = simulation.OBJECT_SIZE
+        self.grid_width = simulation_.grid_width
+        self.grid_height = simulation_.grid_height
+        self.height = self.grid_height * self.size
+
+        # white background with bricks (which never change)
+        self.background = np.full(
+            (self.height, self.grid_width * self.size, 3),
+            BACKGROUND, dtype=np.uint8
+            )
+        self.bricks = np.zeros(
+            (self.grid_height, self.grid_width), dtype=np.uint8
+            )
+        brick = self.images["brick"][0]
+        for y, row in enumerate(simulation_.map):
+            for x, symbol in enumerate(row):
+                if symbol == "X":
+                    self.bricks[y, x] = 255
+                    region = self.cell_region(x, y)
+                    self.background[region] = self.blend(
+                        self.background[region], brick
+                        )
+        self.frame = self.background.copy()
+        self.channel_grid = np.zeros(
+            (len(CHANNELS), self.grid_height, self.grid_width),
+            dtype=np.uint8
+            )
+        # what's drawn in each cell
+        self.drawn = {}
+
+    def cell_region(self, x, y):
+        """Returns slices of the frame of a cell (from the bottom left)."""
+        top = self.height - (y + 1) * self.size
+        return (
+            slice(top, top + self.size),
+            slice(x * self.size, (x + 1) * self.size)
+            )
+
+    @staticmethod
+    def blend(pixels, image, opacity=1.0):
+        """
+        Returns RGB pixels with an image (premultiplied colours and
+        alphas) drawn over them.
+        """
+        color, alpha = image
+        if opacity != 1.0:
+            color = color * opacity
+            alpha = alpha * opacity
+        return (color + pixels * (1 - alpha) + 0.5).astype(np.uint8)
+
+    def sprites(self):
+        """
+        Returns what's drawn (image name, frame, x, y, opacity) in
+        the order in which it's drawn (i. e. as by the pyglet level).
+        """
+        objects = self.simulation.objects
+        gate = objects["gate"][0]
+        drawn = [("gate", int(gate.opened), gate.x, gate.y, 255)]
+        for entity in objects["collectibles"].values():
+            frame_i = 0
+            if isinstance(entity, simulation.Bell):
+                if entity.ringing:
+                    frame_i = (
+                        self.simulation.ticks // BELL_FRAME_TICKS % 4
+                        )
+                elif entity.rung:
+                    frame_i = 4
+            drawn.append(
+                (IMAGES[type(entity)][0], frame_i, entity.x, entity.y, 255)
+                )
+        for entity in objects["watchers"] + objects["homer"]:
+            drawn.append((
+                IMAGES[type(entity)][0], entity.facing_i, entity.x, entity.y,
+                getattr(entity, "opacity", 255)
+                ))
+        return drawn
+
+    def cells(self, x, y):
+        """Yields cells covered by an image at coordinates."""
+        for i in range(x // self.size, (x + self.size - 1) // self.size + 1):
+            for j in range(y // self.size, (y + self.size - 1) // self.size + 1):
+                if 0 <= i < self.grid_width and 0 <= j < self.grid_height:
+                    yield i, j
+
+    def render(self, full=False):
+        """
+        Renders the simulation into the frame buffer and returns it
+        (RGB, from top to bottom). Unless full, only cells whose
+        contents changed are drawn.
+        """
+        covering = {}
+        for sprite in self.sprites():
+            for cell in self.cells(sprite[2], sprite[3]):
+                covering.setdefault(cell, []).append(sprite)
+        if full:
+            self.frame[...] = self.background
+            self.drawn = {}
+        for cell in set(covering) | set(self.drawn):
+            sprites = covering.get(cell, [])
+            if self.drawn.get(cell, []) == sprites:
+                continue
+            self.draw_cell(cell, sprites)
+        self.drawn = covering
+        return self.frame
+
+    def draw_cell(self, cell, sprites):
+        """Draws a cell of the frame with the sprites covering it."""
+        x, y = cell
+        region = self.cell_region(x, y)
+        pixels = self.background[region].copy()
+        size = self.size
+        for name, frame_i, sprite_x, sprite_y, opacity in sprites:
+            # offset of the sprite from the cell (up and right)
+            dx = sprite_x - x * size
+            dy = sprite_y - y * size
+            # (rows of the image and the cell are from the top)
+            rows = slice(max(dy, 0), size + min(dy, 0))
+            columns = slice(max(-dx, 0), size - max(dx, 0))
+            part = [
+                layer[rows, columns] for layer in self.images[name][frame_i]
+                ]
+            target = pixels[
+                max(-dy, 0):(size - max(dy, 0)),
+                max(dx, 0):(size + min(dx, 0))
+                ]
+            target[...] = self.blend(target, part, opacity / 255)
+        self.frame[region] = pixels
+
+    def channels(self):
+        """
+        Returns the downsampled grid of channels (see CHANNELS), i. e.
+        how much of each cell (from 0 to 255) objects of each type cover,
+        of shape (channel count, grid height, grid width), rows from
+        the bottom.
+        """
+        grid = self.channel_grid
+        grid[...] = 0
+        grid[CHANNELS.index("brick")] = self.bricks
+        objects = self.simulation.objects
+        entities = (
+            objects["gate"] + list(objects["collectibles"].values())
+            + objects["watchers"] + objects["homer"]
+            )
+        area = self.size * self.size
+        for entity in entities:
+            channel = grid[CHANNELS.index(IMAGES[type(entity)][1])]
+            for x, y in self.cells(entity.x, entity.y):
+                width = self.size - abs(entity.x - x * self.size)
+                height = self.size - abs(entity.y - y * self.size)
+                # (in Python integers, the sum of bytes would overflow)
+                channel[y, x] = min(
+                    255, int(channel[y, x]) + width * height * 255 // area
+                    )
+        return grid
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+"""
+Replays of levels: the arrow pressed in each tick, run-length encoded
+(arrows are held for long stretches), saved as JSON together with
+the level index, a hash of its map (so a replay isn't played in a level
+of another pack), the version of the game rules and a hash of the final
+state. Replays can be played back in the game window or headless as
+fast as possible, and verified, e.g. a corpus of them after a change:
+
+python -m hungry_homer.replay verify replays/*.json
+python -m hungry_homer.replay verify --pack levels.hhlp solutions/*.json
+"""
+
+import argparse
+import hashlib
+import json
+
+from hungry_homer import env, fastforward, levelpack, maps, simulation
+
+# version of the game rules (replays of other versions may play
+# differently)
+VERSION = 1
+
+
+class Replay:
+    """Inputs of a level as runs of [direction_i, number of ticks]."""
+
+    def __init__(self, level_index, runs=None, version=VERSION,
+                 state_hash=None, map_hash=None):
+        """Initializes a replay (an empty one unless runs are given)."""
+        self.level_index = level_index
+        self.runs = runs if runs is not None else []
+        self.version = version
+        # hash of the final state (see state_hash)
+        self.state_hash = state_hash
+        # hash of the map of the level (see map_hash, None in replays
+        # saved before it was)
+        self.map_hash = map_hash
+
+    def record(self, direction_i):
+        """Records the direction of the arrow pressed in a tick."""
+        if self.runs and self.runs[-1][0] == direction_i:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([direction_i, 1])
+
+    def unrecord(self):
+        """Removes the last recorded tick (after rewinding it)."""
+        self.runs[-1][1] -= 1
+        if not self.runs[-1][1]:
+            self.runs.pop()
+
+    def ticks(self):
+        """Returns the number of recorded ticks."""
+        return sum(ticks for _, ticks in self.runs)
+
+    def directions(self):
+        """Yields the recorded direction of each tick."""
+        for direction_i, ticks in self.runs:
+            for _ in range(ticks):
+                yield direction_i
+
+    def check(self, map_):
+        """
+        Raises ValueError if the replay is of another map than the given
+        one (e.g. of a level pack, not of the levels of the game).
+        """
+        if self.map_hash is not None and self.map_hash != map_hash(map_):
+            raise ValueError(
+                "the replay is of another map than level"
+                + f" {self.level_index + 1} (of another level pack?)"
+                )
+
+    def save(self, path):
+        """Saves the replay to a file."""
+        with open(path, "w") as file:
+            json.dump({
+                "version": self.version,
+                "level_index": self.level_index,
+                "map": self.map_hash,
+                "inputs": self.runs,
+                "hash": self.state_hash
+                }, file)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a replay from a file."""
+        with open(path) as file:
+            data = json.load(file)
+        return cls(
+            data["level_index"], data["inputs"], data["version"],
+            data["hash"], data.get("map")
+            )
+
+
+def map_hash(map_):
+    """Returns a hash of a map (rows of symbols as it's played)."""
+    return hashlib.sha1(
+        "\n".join("".join(row) for row in map_).encode()
+        ).hexdigest()
+
+
+def state_hash(simulation_):
+    """Returns a hash of the state of a simulation."""
+    objects = simulation_.objects
+    homer = objects["homer"][0]
+    state = [
+        simulation_.ticks, simulation_.completed,
+        [
+            homer.food_count, homer.has_key, homer.bump_count,
+            homer.invincible, homer.lost, homer.won, homer.opacity,
+            homer.speed
+            ],
+        [
+            [entity.x, entity.y, entity.direction_i, entity.facing_i]
+            for entity in objects["homer"] + objects["watchers"]
+            ],
+        [getattr(watcher, "side", 0) for watcher in objects["watchers"]],
+        sorted(
+            [*position, type(entity).__name__, getattr(entity, "rung", False),
+             getattr(entity, "ringing", False)]
+            for position, entity in objects["collectibles"].items()
+            ),
+        objects["gate"][0].opened,
+        sorted(
+            [entry[0], entry[3].__name__]
+            for entry in simulation_.scheduler.heap
+            if entry[3] is not None
+            )
+        ]
+    return hashlib.sha1(json.dumps(state).encode()).hexdigest()
+
+
+def play(replay, maps_=None):
+    """
+    Plays a replay headless as fast as possible, returns the simulation
+    in its final state (raises ValueError if the replay is of another
+    map than the one in maps_, the levels of the game by default).
+    """
+    if maps_ is None:
+        maps_ = maps.Maps(env.MAPS_LOCATION, env.GRID_WIDTH, env.GRID_HEIGHT)
+    map_ = maps_[replay.level_index]
+    replay.check(map_)
+    level = simulation.Simulation(map_)
+    for direction_i, ticks in replay.runs:
+        fastforward.advance(level, ticks, direction_i)
+    return level
+
+
+def verify(replay, maps_=None):
+    """
+    Checks that a replay of the current version gets to the recorded
+    final state (see play).
+    """
+    return (
+        replay.version == VERSION
+        and state_hash(play(replay, maps_)) == replay.state_hash
+        )
+
+
+def main():
+    """Plays or verifies replays given on the command line."""
+    parser = argparse.ArgumentParser(prog="python -m hungry_homer.replay")
+    parser.add_argument("command", choices=("play", "verify"))
+    parser.add_argument("replays", nargs="+", metavar="REPLAY")
+    parser.add_argument(
+        "--pack", help="the replays are of levels of this level pack"
+        )
+    arguments = parser.parse_args()
+    maps_ = None
+    if arguments.pack is not None:
+        maps_ = levelpack.LevelPack(
+            arguments.pack, env.GRID_WIDTH, env.GRID_HEIGHT
+            )
+    failed = 0
+    for path in arguments.replays:
+        replay = Replay.load(path)
+        try:
+            if arguments.command == "play":
+                level = play(replay, maps_)
+                homer = level.objects["homer"][0]
+                print(
+                    f"{path}: level {replay.level_index + 1},"
+                    + f" {level.ticks} ticks, food {homer.food_count},"
+                    + f" won {homer.won}, hash {state_hash(level)}"
+                    )
+            elif verify(replay, maps_):
+                print(f"{path}: OK")
+            else:
+                print(f"{path}: FAILED")
+                failed += 1
+        except ValueError as error:
+            print(f"{path}: {error}")
+            failed += 1
+    parser.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""
+Scheduling of functions in simulation ticks. Unlike pyglet.clock, it
+measures time only by the ticks the simulation makes, so the game is
+deterministic, scheduled functions wait while the game is paused, and
+ticks can be skipped in bulk.
+"""
+
+import heapq
+import itertools
+
+
+class Scheduler:
+    """
+    Functions to be called after given numbers of ticks, in a heap
+    ordered by the tick when they're due (and by the order in which
+    they were scheduled).
+    """
+
+    def __init__(self):
+        """Initializes an empty scheduler."""
+        self.ticks = 0
+        self.heap = []
+        # entries of the heap by functions (so they can be cancelled)
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def schedule_once(self, func, delay):
+        """
+        Schedules a function to be called after delay ticks (with
+        the delay as its argument).
+        """
+        entry = [self.ticks + delay, next(self.counter), delay, func]
+        self.entries.setdefault(func, []).append(entry)
+        heapq.heappush(self.heap, entry)
+
+    def unschedule(self, func):
+        """Cancels all scheduled calls of a function."""
+        # cancelled entries stay in the heap until they get to its top
+        for entry in self.entries.pop(func, ()):
+            entry[3] = None
+
+    def pop_cancelled(self):
+        """Removes cancelled entries from the top of the heap."""
+        while self.heap and self.heap[0][3] is None:
+            heapq.heappop(self.heap)
+
+    def next_due(self):
+        """
+        Returns in how many ticks the next scheduled function is due
+        (None if nothing is scheduled).
+        """
+        self.pop_cancelled()
+        if not self.heap:
+            return None
+        return max(self.heap[0][0] - self.ticks, 1)
+
+    def pending(self):
+        """
+        Returns the scheduled calls as (due tick, delay, func) in
+        the order in which they'll be called.
+        """
+        return [
+            (due, delay, func) for due, _, delay, func in sorted(self.heap)
+            if func is not None
+            ]
+
+    def restore(self, ticks, pending):
+        """
+        Replaces the scheduled calls by pending ones (as returned by
+        pending) and sets the current tick.
+        """
+        self.ticks = ticks
+        self.heap = []
+        self.entries = {}
+        for due, delay, func in pending:
+            entry = [due, next(self.counter), delay, func]
+            self.entries.setdefault(func, []).append(entry)
+            self.heap.append(entry)
+        # (entries in the order of calls already make a heap)
+
+    def skip(self, ticks):
+        """Advances by ticks in which nothing is due."""
+        self.ticks += ticks
+
+    def tick(self):
+        """Advances by one tick and calls what's due."""
+        self.ticks += 1
+        self.pop_cancelled()
+        while self.heap and self.heap[0][0] <= self.ticks:
+            entry = heapq.heappop(self.heap)
+            _, _, delay, func = entry
+            entries = self.entries[func]
+            entries.remove(entry)
+            if not entries:
+                del self.entries[func]
+            func(delay)
+            self.pop_cancelled()
@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+
+"""
+Headless simulation of a level, i. e. the game rules without any
+drawing. It doesn't need pyglet, so it can run without a window;
+the pyglet level (see states.Level) only renders its state.
+"""
+
+from hungry_homer import distancefield, scheduler, spatial, walkability
+
+OBJECT_SIZE = 20
+OBJECT_SPEED = 2
+OBJECT_DIRECTIONS = (
+    (0, 1),    # up
+    (1, 0),    # right
+    (0, -1),   # down
+    (-1, 0),   # left
+    (0, 0)     # stay
+    )
+TICK_RATE = 120
+# durations in ticks
+INVINCIBILITY_TICKS = TICK_RATE
+RINGING_TICKS = 3 * TICK_RATE
+COMPLETION_TICKS = TICK_RATE
+
+CIRCULAR_WATCHERS = "urdlURDL"
+LINEAR_WATCHERS = "^>v<"
+CHASING_WATCHER = "c"
+
+
+class Entity:
+    """
+    Base class for all simulated level objects. Entities have slots
+    instead of dictionaries of attributes (maps may have lots of them),
+    the constants are shared by their classes. Coordinates of entities
+    which don't move are computed from their map positions.
+    """
+
+    __slots__ = ("simulation", "initial_position", "map_position", "exists")
+    size = OBJECT_SIZE
+    in_place = True    # i. e. at exactly one point of the grid
+
+    def __init__(self, simulation, map_position):
+        """Initializes an entity."""
+        self.simulation = simulation
+        self.initial_position = map_position
+        self.reset()
+
+    def reset(self):
+        """Resets the entity to its initial state (when restarting)."""
+        self.map_position = self.initial_position
+        self.exists = True
+
+    @property
+    def x(self):
+        """Returns the x coordinate (of the bottom left corner)."""
+        return self.map_position[0] * self.size
+
+    @property
+    def y(self):
+        """Returns the y coordinate (of the bottom left corner)."""
+        return self.map_position[1] * self.size
+
+    def update(self):
+        """Updates the entity (should be called every tick)."""
+        pass
+
+    def handle_collision(self, other):
+        """Updates the entity after colliding with another one."""
+        pass
+
+    def collides(self, other):
+        """
+        Finds whether the entity collides with another one, i. e.
+        whether they at least touch with their corners.
+        """
+        return (
+            abs(other.x - self.x) <= self.size
+            and abs(other.y - self.y) <= self.size
+            )
+
+    def overlaps(self, other):
+        """
+        Finds whether the entity completely overlaps another one, i. e.
+        whether they have the same coordinates.
+        """
+        return other.x == self.x and other.y == self.y
+
+
+class Gate(Entity):
+    """
+    Gate which gets opened when Homer collects the key. Homer must enter
+    it to win.
+    """
+
+    __slots__ = ("opened",)
+
+    def reset(self):
+        """Closes the gate."""
+        super().reset()
+        self.opened = False
+
+    def open(self):
+        """Opens the gate if Homer has the key."""
+        if self.simulation.objects["homer"][0].has_key:
+            self.opened = True
+
+
+class MovingEntity(Entity):
+    """Base class for moving entities."""
+
+    __slots__ = (
+        "x", "y", "in_place", "initial_direction_i", "speed", "direction_i",
+        "facing_i", "walkability", "map_index"
+        )
+    directions = OBJECT_DIRECTIONS
+
+    def __init__(self, *args, direction_i=4, **kwargs):
+        """Initializes a moving entity."""
+        self.initial_direction_i = direction_i
+        super().__init__(*args, **kwargs)
+
+    def reset(self):
+        """Resets the moving entity's position and direction."""
+        super().reset()
+        self.x = self.map_position[0] * self.size
+        self.y = self.map_position[1] * self.size
+        self.in_place = True
+        self.speed = OBJECT_SPEED
+        self.direction_i = self.initial_direction_i
+        # direction of the last move (for image orientation)
+        self.facing_i = 0
+        self.walkability = self.simulation.walkability
+        # index of map_position in the walkability masks
+        self.map_index = self.walkability.index(self.map_position)
+
+    def update(self):
+        """Updates moving entity's coordinates according to its direction."""
+        self.x += self.directions[self.direction_i][0] * self.speed
+        self.y += self.directions[self.direction_i][1] * self.speed
+        self.in_place = (
+            self.x % self.size == 0
+            and self.y % self.size == 0
+            )
+        if self.in_place:
+            self.map_position = (
+                self.x // self.size,
+                self.y // self.size
+                )
+            self.map_index = (
+                self.map_position[1] * self.walkability.width
+                + self.map_position[0]
+                )
+        if self.direction_i < 4:
+            # BUG: orientation should be changed also when trying to
+            # move into a wall (this manifests only in a corner)
+            self.facing_i = self.direction_i
+
+
+class Homer(MovingEntity):
+    """Player's entity."""
+
+    __slots__ = (
+        "input_direction_i", "food_count", "has_key", "bump_count",
+        "invincible", "lost", "won", "opacity"
+        )
+
+    def reset(self):
+        """Resets Homer (with nothing collected)."""
+        super().reset()
+        # direction of the pressed arrow (4 if none)
+        self.input_direction_i = 4
+        self.food_count = 0
+        self.has_key = False
+        self.bump_count = 0
+        self.invincible = False
+        self.lost = False
+        self.won = False
+        self.opacity = 255
+
+    def update(self):
+        """Updates Homers's direction etc."""
+
+        # vanish if lost
+        if self.lost:
+            if self.opacity > 0:
+                self.opacity -= 5
+            # restart the level (after updating all the entities)
+            else:
+                self.simulation.restarting = True
+        else:
+            # flash if invincible (after bumping into a watcher or
+            # winning)
+            if self.invincible and self.opacity == 255:
+                self.opacity = 100
+            else:
+                self.opacity = 255
+
+            # after winning slowly go away
+            if self.won:
+                self.speed = 1
+
+            else:
+                new_direction_i = self.input_direction_i
+
+                # stop before moving into a brick
+                if (
+                    self.in_place
+                    and not self.walkability.masks[self.has_key][
+                        self.map_index
+                        ] >> new_direction_i & 1
+                    ):
+                    new_direction_i = 4
+
+                # actually change direction
+                if (
+                    # only if in place
+                    self.in_place
+                    # or if Homer turns around
+                    or (
+                        new_direction_i < 4
+                        and abs(self.direction_i - new_direction_i) == 2
+                        )
+                    ):
+                    self.direction_i = new_direction_i
+
+        # change coordinates accordingly
+        super().update()
+
+    def handle_collision(self, other):
+        """Updates Homer after colliding with collectibles or watchers."""
+
+        # watchers
+        if (
+            self.collides(other)
+            and isinstance(other, Watcher)
+            and not self.invincible
+            ):
+            if self.bump_count == 1:
+                self.lost = True
+                # dramatically fly down
+                self.speed = 4
+                self.direction_i = 2
+            else:
+                self.bump_count += 1
+                self.invincible = True
+                self.simulation.scheduler.schedule_once(
+                    self.end_invincibility, INVINCIBILITY_TICKS
+                    )
+
+        # collectibles + gate + bell
+        if self.overlaps(other):
+            if isinstance(other, Food):
+                self.food_count += 1
+            elif isinstance(other, Key):
+                self.has_key = True
+                self.simulation.objects["gate"][0].open()
+            elif (
+                isinstance(other, Gate)
+                and self.food_count == self.simulation.food_count
+                # only if Homer didn't already enter the gate
+                and not self.won
+                ):
+                # now it doesn't matter whether a watcher happens to
+                # touch Homer (and this also does that cool flashing)
+                self.invincible = True
+                self.won = True
+                self.simulation.scheduler.schedule_once(
+                    self.simulation.complete, COMPLETION_TICKS
+                    )
+            elif (
+                isinstance(other, Bell)
+                # Homer can ring it only once
+                and not other.rung
+                ):
+                self.invincible = True
+                # if already invincible, prevent premature end_invincibility
+                self.simulation.scheduler.unschedule(self.end_invincibility)
+                self.simulation.scheduler.schedule_once(
+                    self.end_invincibility, RINGING_TICKS
+                    )
+
+    def end_invincibility(self, ticks):
+        """Ends invincibility after bumping into a watcher."""
+        self.invincible = False
+
+
+class Watcher(MovingEntity):
+    """Base class for watchers."""
+
+    # (see spatial.SpatialHash)
+    __slots__ = ("spatial_index", "spatial_cell")
+
+    def update(self):
+        """Moves the watcher and updates its cell in the spatial index."""
+        super().update()
+        self.spatial_index.move(self)
+
+
+class CircularWatcher(Watcher):
+    """A watcher who always keeps a wall on his left/right side."""
+
+    __slots__ = ("initial_side", "side")
+
+    def __init__(self, side, *args, **kwargs):
+        """Initializes a circular watcher."""
+        self.initial_side = side
+        super().__init__(*args, **kwargs)
+
+    def reset(self):
+        """Resets the watcher's position, direction and side."""
+        super().reset()
+        self.side = self.initial_side
+
+    def direction_from(self, map_index, direction_i):
+        """
+        Returns the direction in which the watcher goes on from a cell
+        after coming in direction_i. (If no wall is on the given side,
+        they turn to the side; if a wall is ahead, they turn to the
+        other side.)
+        """
+        allowed = self.walkability.masks[0][map_index]
+        # no wall on the given side => turn to the side
+        if allowed >> ((direction_i + self.side) % 4) & 1:
+            return (direction_i + self.side) % 4
+        # wall ahead => turn to the other side
+        # (this may happen only twice, unless the watcher is
+        # completely enclosed which really shouldn't happen)
+        i = 0
+        while not allowed >> direction_i & 1 and i <= 2:
+            direction_i = (direction_i - self.side) % 4
+            i += 1
+        return direction_i
+
+    def update(self):
+        """Always keeps a wall on the given side."""
+        if self.in_place:
+            self.direction_i = self.direction_from(
+                self.map_index, self.direction_i
+                )
+        super().update()
+
+    def handle_collision(self, other):
+        """Changes the side after bumping into another watcher."""
+        if self.collides(other) and isinstance(other, Watcher):
+            self.side *= -1
+            self.direction_i = (self.direction_i + 2) % 4
+
+
+class LinearWatcher(Watcher):
+    """A watcher who moves horizontally/vertically."""
+
+    __slots__ = ()
+
+    def direction_from(self, map_index, direction_i):
+        """
+        Returns the direction in which the watcher goes on from a cell
+        after coming in direction_i (back if a wall is ahead).
+        """
+        if not self.walkability.masks[0][map_index] >> direction_i & 1:
+            return (direction_i + 2) % 4
+        return direction_i
+
+    def update(self):
+        """Turns around after bumping into wall."""
+        if self.in_place:
+            self.direction_i = self.direction_from(
+                self.map_index, self.direction_i
+                )
+        super().update()
+
+    def turn_around(self):
+        """Turns around."""
+        self.direction_i = (self.direction_i + 2) % 4
+
+    def handle_collision(self, other):
+        """Turns around after bumping into another watcher."""
+        if self.collides(other) and isinstance(other, Watcher):
+            self.turn_around()
+
+
+class ChasingWatcher(LinearWatcher):
+    """
+    A watcher who goes after Homer (along a shortest way to the cell
+    he was last in). If he can't get there, he moves like a linear one
+    (he stands at first, even when another one bumps into him).
+    """
+
+    __slots__ = ()
+
+    def direction_from(self, map_index, direction_i):
+        """
+        Returns the direction in which the watcher goes on from a cell
+        after coming in direction_i (towards Homer if possible).
+        """
+        # (shared by all the chasing watchers, see Simulation)
+        field = self.simulation.homer_distances
+        field.set_target(self.simulation.objects["homer"][0].map_position)
+        result = field.direction(map_index, direction_i)
+        if result is None:
+            return super().direction_from(map_index, direction_i)
+        return result
+
+    def turn_around(self):
+        """Turns around (unless he stands)."""
+        if self.direction_i != 4:
+            super().turn_around()
+
+
+class Collectible(Entity):
+    """Base class for entities which Homer can take."""
+
+    __slots__ = ()
+
+    def handle_collision(self, other):
+        """
+        Marks itself as to be deleted after it is completely overlapped
+        by Homer.
+        """
+        if self.overlaps(other) and isinstance(other, Homer):
+            self.exists = False
+
+
+class Food(Collectible):
+    """Food which can be eaten by Homer."""
+
+    __slots__ = ()
+
+
+class Key(Collectible):
+    """Key which opens the gate after Homer gets it."""
+
+    __slots__ = ()
+
+
+class Bell(Entity):
+    """Bell which Homer can ring once."""
+
+    __slots__ = ("rung", "ringing")
+
+    def reset(self):
+        """Makes the bell silent (and not rung)."""
+        super().reset()
+        self.rung = False
+        self.ringing = False
+
+    def handle_collision(self, other):
+        """
+        Rings if Homer hasn't rung it yet.
+        """
+        if not self.rung and self.overlaps(other) and isinstance(other, Homer):
+            self.rung = True
+            self.ringing = True
+            self.simulation.scheduler.schedule_once(
+                self.stop_ringing, RINGING_TICKS
+                )
+
+    def stop_ringing(self, ticks):
+        """Stops ringing."""
+        self.ringing = False
+
+
+class Simulation:
+    """
+    Level rules without drawing. Its objects are updated by calling
+    step once per tick (i. e. every 1/120 s in the game).
+    """
+
+    def __init__(self, map_, on_complete=None, on_restart=None):
+        """
+        Initializes a simulation of a map (a list of rows of symbols
+        from bottom to top, see Game). on_restart is called before
+        the level is restarted (after Homer lost).
+        """
+        self.map = map_
+        self.grid_height = len(map_)
+        self.grid_width = max((len(row) for row in map_))
+        self.walkability = walkability.Walkability(map_, OBJECT_DIRECTIONS)
+        # distances to Homer's cell for chasing watchers (searched only
+        # after he gets to another one)
+        self.homer_distances = distancefield.DistanceField(self.walkability)
+        # scheduled functions wait for ticks of the simulation (so they
+        # wait also when the game is paused)
+        self.scheduler = scheduler.Scheduler()
+        self.on_complete = on_complete
+        self.on_restart = on_restart
+
+        self.objects = None
+        self.all_collectibles = None
+        self.watcher_index = None
+        # collectibles taken by Homer in the last tick
+        self.removed = []
+        self.food_count = 0
+        self.completed = False
+        self.ticks = 0
+        # Homer vanished and the level should be restarted
+        self.restarting = False
+        # how many times the level was restarted
+        self.restarts = 0
+        # times phases of steps if set (see profiler, its timing has to
+        # be started before step)
+        self.profiler = None
+        self.setup_objects()
+
+    def setup_objects(self):
+        """Initializes entities from the level map."""
+
+        self.objects = {
+            "homer": [],
+            "watchers": [],
+            "gate": [],
+            # collectibles (and bells) by their map positions
+            "collectibles": {},
+            "bell": []
+            }
+        # all the collectibles, also those which get taken (in the order
+        # of the map)
+        self.all_collectibles = []
+        self.food_count = 0
+        self.watcher_index = spatial.SpatialHash(OBJECT_SIZE)
+
+        for i, row in enumerate(self.map):
+            for j, symbol in enumerate(row):
+                # skip empty positions and bricks (they never change,
+                # moving entities find them in walkability)
+                if symbol in " .X":
+                    continue
+
+                arguments = {
+                    "simulation": self,
+                    "map_position": (j, i)
+                    }
+
+                if symbol in CIRCULAR_WATCHERS:
+                    class_ = CircularWatcher
+                    group = "watchers"
+                    arguments["direction_i"] = (
+                        CIRCULAR_WATCHERS.index(symbol) % 4
+                        )
+                    arguments["side"] = 1 if symbol.islower() else -1
+                elif symbol in LINEAR_WATCHERS:
+                    class_ = LinearWatcher
+                    group = "watchers"
+                    arguments["direction_i"] = (
+                        LINEAR_WATCHERS.index(symbol) % 4
+                        )
+                elif symbol == CHASING_WATCHER:
+                    class_ = ChasingWatcher
+                    group = "watchers"
+                elif symbol == "*":
+                    class_ = Food
+                    group = "collectibles"
+                    self.food_count += 1
+                elif symbol == "H":
+                    class_ = Homer
+                    group = "homer"
+                elif symbol == "_":
+                    class_ = Key
+                    group = "collectibles"
+                elif symbol == "/":
+                    class_ = Gate
+                    group = "gate"
+                elif symbol == "b":
+                    class_ = Bell
+                    # not really a collectible, but it doesn't matter here
+                    group = "collectibles"
+
+                entity = class_(**arguments)
+                if group == "collectibles":
+                    self.objects[group][entity.map_position] = entity
+                    self.all_collectibles.append(entity)
+                else:
+                    self.objects[group].append(entity)
+                if group == "watchers":
+                    self.watcher_index.insert(entity)
+
+    def restart(self):
+        """Resets all the entities in place (when Homer lost)."""
+        if self.on_restart is not None:
+            self.on_restart()
+        self.restarting = False
+        self.restarts += 1
+        homer = self.objects["homer"][0]
+        # (timers of the entities before restarting shouldn't affect
+        # them after it)
+        self.scheduler.unschedule(homer.end_invincibility)
+        homer.reset()
+        for watcher in self.objects["watchers"]:
+            watcher.reset()
+            self.watcher_index.move(watcher)
+        self.objects["gate"][0].reset()
+        collectibles = self.objects["collectibles"]
+        collectibles.clear()
+        for collectible in self.all_collectibles:
+            if isinstance(collectible, Bell):
+                self.scheduler.unschedule(collectible.stop_ringing)
+            collectible.reset()
+            collectibles[collectible.map_position] = collectible
+
+    def complete(self, ticks):
+        """Marks the level as completed (after Homer wins)."""
+        self.completed = True
+        if self.on_complete is not None:
+            self.on_complete()
+
+    def step(self, direction_i=4):
+        """
+        Updates the entities by one tick and handles their collisions.
+        direction_i is the direction of the arrow pressed by the player
+        (4 if none).
+        """
+        self.scheduler.tick()
+        self.ticks += 1
+        self.objects["homer"][0].input_direction_i = direction_i
+
+        # update all the moving entities (the others don't change
+        # by themselves)
+        objects = self.objects
+        for group in (objects["homer"], objects["watchers"]):
+            for entity in group:
+                entity.update()
+        # (if Homer restarts the level, the entities are updated first,
+        # but the collisions are handled for the restarted ones)
+        if self.restarting:
+            self.restart()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.lap("entities")
+
+        # handle collisions (only of watchers in adjacent cells, the
+        # others can't collide)
+        homer = self.objects["homer"][0]
+        # Homer + watcher
+        for watcher in self.watcher_index.near(homer.x, homer.y):
+            homer.handle_collision(watcher)
+        # Homer + collectible (Homer can completely overlap it only
+        # at a point of the grid)
+        self.removed.clear()
+        if homer.in_place:
+            collectible = self.objects["collectibles"].get(homer.map_position)
+            if collectible is not None:
+                homer.handle_collision(collectible)
+                collectible.handle_collision(homer)
+                # remove things taken by Homer
+                if not collectible.exists:
+                    del self.objects["collectibles"][homer.map_position]
+                    self.removed.append(collectible)
+        # Homer + gate
+        homer.handle_collision(self.objects["gate"][0])
+        if profiler is not None:
+            profiler.lap("homer collisions")
+
+        # watcher + watcher
+        for first in self.objects["watchers"]:
+            for second in self.watcher_index.near(first.x, first.y):
+                if first is second:
+                    continue
+                first.handle_collision(second)
+        if profiler is not None:
+            profiler.lap("watcher collisions")
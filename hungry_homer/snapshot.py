@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+"""
+Snapshots of the dynamic state of a simulation (everything that changes
+while a level is played) as flat arrays of integers, which can be
+restored into the existing entities of the simulation, and a buffer
+of past snapshots for rewinding. A snapshot can be serialized with
+tobytes() and loaded with array.array(TYPECODE, data).
+"""
+
+import array
+
+from hungry_homer import simulation
+
+TYPECODE = "i"
+
+# fields of the snapshot (in this order)
+HEADER_FIELDS = ("ticks", "scheduler_ticks", "completed", "gate_opened")
+HOMER_FIELDS = (
+    "x", "y", "direction_i", "facing_i", "speed",
+    "input_direction_i", "food_count", "has_key", "bump_count",
+    "invincible", "lost", "won", "opacity"
+    )
+WATCHER_FIELDS = ("x", "y", "direction_i", "facing_i")
+# (each entity also has the coordinates of its map position, which can
+# be outside the map after Homer wins or loses, and each watcher its
+# side, 0 for linear ones), then rung and ringing of each bell, taken
+# collectibles as a bitset (32 of them per item) and scheduled calls
+# (their count and due tick, delay, function and owner of each)
+
+# functions which get scheduled and classes of their owners
+FUNCTIONS = (
+    ("end_invincibility", simulation.Homer),
+    ("stop_ringing", simulation.Bell),
+    ("complete", simulation.Simulation)
+    )
+FUNCTION_NAMES = [name for name, _ in FUNCTIONS]
+
+
+def take(simulation_):
+    """Returns a snapshot of a simulation."""
+    objects = simulation_.objects
+    homer = objects["homer"][0]
+    scheduler = simulation_.scheduler
+    snapshot = array.array(TYPECODE, (
+        simulation_.ticks, scheduler.ticks, simulation_.completed,
+        objects["gate"][0].opened
+        ))
+    snapshot.extend([getattr(homer, field) for field in HOMER_FIELDS])
+    snapshot.extend(homer.map_position)
+    for watcher in objects["watchers"]:
+        snapshot.extend(
+            [getattr(watcher, field) for field in WATCHER_FIELDS]
+            )
+        snapshot.extend(watcher.map_position)
+        snapshot.append(getattr(watcher, "side", 0))
+
+    collectibles = simulation_.all_collectibles
+    taken = 0
+    for i, collectible in enumerate(collectibles):
+        if isinstance(collectible, simulation.Bell):
+            snapshot.extend((collectible.rung, collectible.ringing))
+        elif not collectible.exists:
+            taken |= 1 << i
+    for i in range(0, len(collectibles), 32):
+        # (as a signed 32-bit integer)
+        word = taken >> i & 0xFFFFFFFF
+        snapshot.append(word - (word >> 31 << 32))
+
+    pending = scheduler.pending()
+    snapshot.append(len(pending))
+    for due, delay, func in pending:
+        owner = func.__self__
+        if owner is homer or owner is simulation_:
+            owner_i = 0
+        else:
+            owner_i = collectibles.index(owner)
+        snapshot.extend((
+            due, delay, FUNCTION_NAMES.index(func.__name__), owner_i
+            ))
+    return snapshot
+
+
+def restore(simulation_, snapshot):
+    """
+    Restores a snapshot of the simulation (of the same map) into its
+    entities.
+    """
+    objects = simulation_.objects
+    homer = objects["homer"][0]
+    simulation_.ticks, scheduler_ticks, completed, gate_opened = (
+        snapshot[:len(HEADER_FIELDS)]
+        )
+    simulation_.completed = bool(completed)
+    objects["gate"][0].opened = bool(gate_opened)
+    i = len(HEADER_FIELDS)
+
+    entities = [(homer, HOMER_FIELDS)] + [
+        (watcher, WATCHER_FIELDS) for watcher in objects["watchers"]
+        ]
+    for entity, fields in entities:
+        for field, value in zip(fields, snapshot[i:(i + len(fields))]):
+            setattr(entity, field, value)
+        i += len(fields)
+        entity.in_place = (
+            entity.x % entity.size == 0 and entity.y % entity.size == 0
+            )
+        entity.map_position = (snapshot[i], snapshot[i + 1])
+        i += 2
+        entity.map_index = entity.walkability.index(entity.map_position)
+        if entity is not homer:
+            # linear watchers have no side
+            if isinstance(entity, simulation.CircularWatcher):
+                entity.side = snapshot[i]
+            i += 1
+            entity.spatial_index.move(entity)
+    for field in ("has_key", "invincible", "lost", "won"):
+        setattr(homer, field, bool(getattr(homer, field)))
+
+    collectibles = simulation_.all_collectibles
+    bells = [
+        collectible for collectible in collectibles
+        if isinstance(collectible, simulation.Bell)
+        ]
+    for bell in bells:
+        bell.rung, bell.ringing = bool(snapshot[i]), bool(snapshot[i + 1])
+        i += 2
+    word_count = (len(collectibles) + 31) // 32
+    taken = 0
+    for j, word in enumerate(snapshot[i:(i + word_count)]):
+        taken |= (word & 0xFFFFFFFF) << (32 * j)
+    i += word_count
+    objects["collectibles"].clear()
+    for j, collectible in enumerate(collectibles):
+        collectible.exists = not taken >> j & 1
+        if collectible.exists:
+            objects["collectibles"][collectible.map_position] = collectible
+    simulation_.removed = []
+
+    pending = []
+    for j in range(i + 1, i + 1 + 4 * snapshot[i], 4):
+        due, delay, function_i, owner_i = snapshot[j:(j + 4)]
+        name, class_ = FUNCTIONS[function_i]
+        if class_ is simulation.Simulation:
+            owner = simulation_
+        elif class_ is simulation.Homer:
+            owner = homer
+        else:
+            owner = collectibles[owner_i]
+        pending.append((due, delay, getattr(owner, name)))
+    simulation_.scheduler.restore(scheduler_ticks, pending)
+
+
+def difference(snapshot, other):
+    """
+    Returns changes turning a snapshot into another one: the length
+    of the other one and pairs of indices and values.
+    """
+    changes = array.array(TYPECODE, (len(other),))
+    length = len(snapshot)
+    for i, value in enumerate(other):
+        if i >= length or snapshot[i] != value:
+            changes.append(i)
+            changes.append(value)
+    return changes
+
+
+def apply(snapshot, changes):
+    """Returns a snapshot with changes (see difference) applied."""
+    length = changes[0]
+    result = snapshot[:length]
+    # (the new items are all among the changes)
+    result.extend([0] * (length - len(result)))
+    for j in range(1, len(changes), 2):
+        result[changes[j]] = changes[j + 1]
+    return result
+
+
+class RewindBuffer:
+    """
+    Past snapshots of a simulation in a buffer of fixed size. Only the
+    latest snapshot is kept whole, the older ones are kept as changes
+    turning each snapshot into the previous one, one after another
+    in a ring of integers (each preceded and followed by its length).
+    When the buffer is full, the oldest ones are forgotten.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        """Initializes an empty buffer of capacity integers."""
+        self.capacity = capacity
+        self.data = array.array(TYPECODE, [0]) * capacity
+        # start of the oldest changes and end of the latest ones
+        self.start = 0
+        self.end = 0
+        self.used = 0
+        self.count = 0
+        self.current = None
+
+    def __len__(self):
+        """Returns the number of snapshots before the latest one."""
+        return self.count
+
+    def push(self, snapshot):
+        """Adds the latest snapshot."""
+        if self.current is not None:
+            changes = difference(snapshot, self.current)
+            length = len(changes) + 2
+            if length > self.capacity:
+                self.clear()
+            else:
+                # forget the oldest snapshots
+                while self.used + length > self.capacity:
+                    oldest = self.data[self.start]
+                    self.start = (self.start + oldest) % self.capacity
+                    self.used -= oldest
+                    self.count -= 1
+                self.write(self.end, array.array(TYPECODE, [length]))
+                self.write(self.end + 1, changes)
+                self.write(self.end + length - 1, array.array(
+                    TYPECODE, [length]
+                    ))
+                self.end = (self.end + length) % self.capacity
+                self.used += length
+                self.count += 1
+        self.current = snapshot
+
+    def write(self, start, items):
+        """Writes items to the ring from start (wrapping around)."""
+        start %= self.capacity
+        first = min(len(items), self.capacity - start)
+        self.data[start:(start + first)] = items[:first]
+        self.data[:(len(items) - first)] = items[first:]
+
+    def read(self, start, length):
+        """Returns length items of the ring from start."""
+        start %= self.capacity
+        first = min(length, self.capacity - start)
+        items = self.data[start:(start + first)]
+        items.extend(self.data[:(length - first)])
+        return items
+
+    def pop(self):
+        """
+        Removes the latest snapshot and returns the previous one (None
+        if there is none).
+        """
+        if not self.count:
+            return None
+        length = self.data[self.end - 1]
+        self.end = (self.end - length) % self.capacity
+        self.used -= length
+        self.count -= 1
+        self.current = apply(
+            self.current, self.read(self.end + 1, length - 2)
+            )
+        return self.current
+
+    def clear(self):
+        """Forgets all the snapshots."""
+        self.start = 0
+        self.end = 0
+        self.used = 0
+        self.count = 0
+        self.current = None
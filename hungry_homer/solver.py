@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+
+"""
+Offline check that levels can be completed: a search for the shortest
+way to collect all the food (and the key) and enter the gate, which is
+reported as a replay.
+
+Watchers (except chasing ones, whose maps aren't searched) never react
+to Homer, so their positions are a function of the tick. They're
+predicted as far as the search needs them (once they repeat, only the
+phase of the tick matters) and the search itself only moves Homer among
+them, by the same rules as the simulation (a solution found is played
+in the simulation to be sure it wins there).
+
+Homer decides only when he's in place: he goes to an adjacent cell or
+waits as long as that takes (a cell's worth of ticks). So he never
+turns around halfway between cells or waits for fewer ticks, and a
+solution is the shortest one with these moves, not necessarily the
+shortest possible (waiting for single ticks makes the search many
+times longer and solutions rarely shorter).
+States are searched by A*: the fewest ticks in which each state (the
+phase of the tick, Homer's cell, what he took, his bumps and how long
+he's invincible) was reached are remembered, and states from which
+he can't get through the food and the key to the gate in time are
+pruned using distances of the cells found by BFS.
+
+python -m hungry_homer.solver [--pack PACK] [--processes N] [LEVEL...]
+"""
+
+import argparse
+from collections import deque
+import heapq
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+from hungry_homer import (
+    env, fastforward, levelpack, maps, prediction, replay, simulation
+    )
+
+SIZE = simulation.OBJECT_SIZE
+SPEED = simulation.OBJECT_SPEED
+# ticks which Homer takes to go to an adjacent cell (and waits)
+MOVE_TICKS = SIZE // SPEED
+UNREACHABLE = float("inf")
+
+
+def distances(walkability_, start):
+    """
+    Returns the numbers of moves in which Homer (with the key) can get
+    from each cell to the start cell (or UNREACHABLE).
+    """
+    width = walkability_.width
+    masks = walkability_.masks[1]
+    offsets = [dx + dy * width for dx, dy in walkability_.directions[:4]]
+    result = [UNREACHABLE] * len(masks)
+    result[start] = 0
+    queue = deque((start,))
+    while queue:
+        i = queue.popleft()
+        for direction_i, offset in enumerate(offsets):
+            # (going backwards, from the neighbour into this cell)
+            j = i - offset
+            if (
+                0 <= j < len(masks) and result[j] == UNREACHABLE
+                and masks[j] >> direction_i & 1
+                # (not wrapping around the rows)
+                and abs(j % width - i % width) <= 1
+                ):
+                result[j] = result[i] + 1
+                queue.append(j)
+    return result
+
+
+class Timeline:
+    """
+    Watchers by the grid cells of their positions in each tick (as far
+    as they're needed), predicted without stepping the simulation (see
+    prediction.Predictor).
+    """
+
+    def __init__(self, map_):
+        """Prepares the timeline of a map."""
+        self.predictor = prediction.Predictor(map_)
+        # by the phases of the ticks
+        self.cells = {}
+
+    def phase(self, ticks):
+        """
+        Returns the first tick in which the watchers are as in the
+        given one (if it's known already).
+        """
+        return self.predictor.phase(ticks)
+
+    def collides(self, ticks, x, y):
+        """
+        Checks whether Homer at the given coordinates collides with
+        a watcher in the given tick.
+        """
+        ticks = self.phase(ticks)
+        cells = self.cells.get(ticks)
+        if cells is None:
+            cells = self.cells[ticks] = {}
+            for position in self.predictor.positions(ticks):
+                cells.setdefault(
+                    (position[0] // SIZE, position[1] // SIZE), []
+                    ).append(position)
+        cell_x = x // SIZE
+        cell_y = y // SIZE
+        for i in (cell_x - 1, cell_x, cell_x + 1):
+            for j in (cell_y - 1, cell_y, cell_y + 1):
+                for watcher_x, watcher_y in cells.get((i, j), ()):
+                    if (
+                        abs(watcher_x - x) <= SIZE
+                        and abs(watcher_y - y) <= SIZE
+                        ):
+                        return True
+        return False
+
+
+class Solver:
+    """
+    A* search of Homer's moves in a map. A state is a tuple of the tick,
+    Homer's cell (its index in the walkability masks), the taken food
+    and key (bits in the order of the targets), the rung bells (bits),
+    the number of bumps and the tick when Homer stops being invincible.
+    """
+
+    def __init__(self, map_, max_states=1000000):
+        """
+        Prepares a search in a map (padded for a window), giving up
+        after expanding max_states states.
+        """
+        level = simulation.Simulation(map_)
+        self.max_states = max_states
+        self.timeline = Timeline(map_)
+        walkability_ = level.walkability
+        self.masks = walkability_.masks
+        self.width = walkability_.width
+        self.homer_cell = walkability_.index(
+            level.objects["homer"][0].map_position
+            )
+        self.gate_cell = walkability_.index(
+            level.objects["gate"][0].map_position
+            )
+
+        # targets (food and the key) and bells by their cells
+        self.targets = {}
+        self.bells = {}
+        self.all_food = 0
+        # (0 if there's no key)
+        self.key_bit = 0
+        for collectible in level.all_collectibles:
+            cell = walkability_.index(collectible.map_position)
+            if isinstance(collectible, simulation.Bell):
+                self.bells[cell] = len(self.bells)
+                continue
+            if isinstance(collectible, simulation.Food):
+                self.all_food |= 1 << len(self.targets)
+            else:
+                self.key_bit = 1 << len(self.targets)
+            self.targets[cell] = len(self.targets)
+
+        # distances of the cells to the gate and to the targets
+        self.to_gate = distances(walkability_, self.gate_cell)
+        self.to_targets = [
+            (i, cell, distances(walkability_, cell))
+            for cell, i in self.targets.items()
+            ]
+        # lengths of the minimum spanning trees of the targets left
+        # and the gate by the taken targets
+        self.trees = {}
+        self.expanded = 0
+
+    def tree(self, taken):
+        """
+        Returns the length of the minimum spanning tree of the targets
+        which aren't taken and the gate (Prim's algorithm).
+        """
+        result = self.trees.get(taken)
+        if result is not None:
+            return result
+        to_gate = self.to_gate
+        # distances of the targets from the tree (with only the gate)
+        left = {
+            cell: (to_target, to_gate[cell])
+            for i, cell, to_target in self.to_targets if not taken >> i & 1
+            }
+        result = 0
+        while left:
+            cell = min(left, key=lambda cell: left[cell][1])
+            to_target, distance = left.pop(cell)
+            result += distance
+            for other, (other_to_target, other_distance) in left.items():
+                if to_target[other] < other_distance:
+                    left[other] = (other_to_target, to_target[other])
+        self.trees[taken] = result
+        return result
+
+    def bound(self, cell, taken):
+        """
+        Returns a lower bound of the ticks in which Homer can win from
+        a cell with the given targets taken (UNREACHABLE if he can't
+        win at all): he has to get to one of the targets left and then
+        through all of them to the gate (which is at least the spanning
+        tree of them).
+        """
+        nearest = min(
+            (
+                to_target[cell] for i, _, to_target in self.to_targets
+                if not taken >> i & 1
+                ),
+            default=self.to_gate[cell]
+            )
+        return (nearest + self.tree(taken)) * MOVE_TICKS
+
+    def key(self, state):
+        """
+        Returns what matters for the future of a state (the phase of the
+        tick and for how long Homer is still invincible).
+        """
+        ticks, cell, taken, rung, bump_count, invincible_until = state
+        return (
+            self.timeline.phase(ticks), cell, taken, rung, bump_count,
+            max(invincible_until - ticks, 0)
+            )
+
+    def move(self, state, direction_i, ticks):
+        """
+        Returns the state after Homer (in place) goes in a direction
+        for the given ticks (None if he's lost), and whether he won.
+        """
+        start, cell, taken, rung, bump_count, invincible_until = state
+        dx, dy = simulation.OBJECT_DIRECTIONS[direction_i]
+        x = cell % self.width * SIZE
+        y = cell // self.width * SIZE
+        collides = self.timeline.collides
+        for tick in range(start + 1, start + ticks + 1):
+            x += dx * SPEED
+            y += dy * SPEED
+            if tick >= invincible_until and collides(tick, x, y):
+                if bump_count == 1:
+                    return None, False
+                bump_count += 1
+                invincible_until = tick + simulation.INVINCIBILITY_TICKS
+        # (he's in place at the end)
+        cell = y // SIZE * self.width + x // SIZE
+        target_i = self.targets.get(cell)
+        if target_i is not None:
+            taken |= 1 << target_i
+        bell_i = self.bells.get(cell)
+        if bell_i is not None and not rung >> bell_i & 1:
+            rung |= 1 << bell_i
+            invincible_until = tick + simulation.RINGING_TICKS
+        won = cell == self.gate_cell and taken & self.all_food == self.all_food
+        return (tick, cell, taken, rung, bump_count, invincible_until), won
+
+    def moves(self, state):
+        """
+        Yields the possible moves of Homer (in place) as directions
+        with their ticks.
+        """
+        cell, taken = state[1], state[2]
+        mask = self.masks[taken & self.key_bit != 0][cell]
+        for direction_i in range(4):
+            if mask >> direction_i & 1:
+                yield direction_i, MOVE_TICKS
+        yield 4, MOVE_TICKS
+
+    def solve(self):
+        """
+        Searches for the shortest solution, returns its runs of
+        [direction_i, ticks] until Homer enters the gate (None if
+        there's none or the search gave up, see given_up).
+        """
+        counter = itertools.count()
+        start = (0, self.homer_cell, 0, 0, 0, 0)
+        bound = self.bound(self.homer_cell, 0)
+        if bound == UNREACHABLE:
+            return None
+        # (ordered by the bound of the whole solution, then the longer
+        # ones first, so a solution is found without expanding all the
+        # states with the same bound)
+        heap = [(bound, 0, next(counter), start, False)]
+        # the fewest ticks in which each state was reached (and from
+        # which state by which move)
+        parents = {self.key(start): (0, None)}
+        self.expanded = 0
+        while heap and self.expanded < self.max_states:
+            _, _, _, state, won = heapq.heappop(heap)
+            key = self.key(state)
+            # (it was reached sooner since it was pushed)
+            if parents[key][0] < state[0]:
+                continue
+            if won:
+                return self.runs(parents, key)
+            self.expanded += 1
+            for direction_i, ticks in self.moves(state):
+                child, won = self.move(state, direction_i, ticks)
+                if child is None:
+                    continue
+                child_key = self.key(child)
+                reached = parents.get(child_key)
+                if reached is not None and reached[0] <= child[0]:
+                    continue
+                bound = 0 if won else self.bound(child[1], child[2])
+                if bound == UNREACHABLE:
+                    continue
+                parents[child_key] = (child[0], (key, direction_i, ticks))
+                heapq.heappush(heap, (
+                    child[0] + bound, -child[0], next(counter), child, won
+                    ))
+        return None
+
+    def given_up(self):
+        """Checks whether the last search gave up."""
+        return self.expanded >= self.max_states
+
+    def runs(self, parents, key):
+        """Returns the runs of the moves which got to a state."""
+        moves = []
+        parent = parents[key][1]
+        while parent is not None:
+            key, direction_i, ticks = parent
+            moves.append((direction_i, ticks))
+            parent = parents[key][1]
+        result = []
+        for direction_i, ticks in reversed(moves):
+            if result and result[-1][0] == direction_i:
+                result[-1][1] += ticks
+            else:
+                result.append([direction_i, ticks])
+        return result
+
+
+def solve(map_, level_index=0, max_states=1000000):
+    """
+    Solves a map, returns whether it's solvable (None if the search
+    gave up or if it can't be searched because of chasing watchers),
+    its shortest solution as a replay (which also waits until the level
+    is completed) and the number of states expanded.
+    """
+    # (they react to Homer, so they can't be predicted)
+    if any(simulation.CHASING_WATCHER in row for row in map_):
+        return None, None, 0
+    solver = Solver(map_, max_states)
+    runs = solver.solve()
+    if runs is None:
+        return (
+            None if solver.given_up() else False, None, solver.expanded
+            )
+    level = simulation.Simulation(map_)
+    for direction_i, ticks in runs:
+        fastforward.advance(level, ticks, direction_i)
+    if not level.objects["homer"][0].won:
+        raise RuntimeError("the solution doesn't win in the simulation")
+    runs.append([4, simulation.COMPLETION_TICKS])
+    fastforward.advance(level, simulation.COMPLETION_TICKS)
+    return (
+        True,
+        replay.Replay(
+            level_index, runs, state_hash=replay.state_hash(level),
+            map_hash=replay.map_hash(map_)
+            ),
+        solver.expanded
+        )
+
+
+def open_maps(pack_path=None):
+    """Returns the levels of the game or of a pack."""
+    if pack_path is None:
+        return maps.Maps(env.MAPS_LOCATION, env.GRID_WIDTH, env.GRID_HEIGHT)
+    return levelpack.LevelPack(pack_path, env.GRID_WIDTH, env.GRID_HEIGHT)
+
+
+def solve_level(arguments):
+    """
+    Solves a level given as (path of its pack or None, its index,
+    max_states) in a worker process, returns the index, the result
+    of solve and the time it took.
+    """
+    pack_path, level_index, max_states = arguments
+    maps_ = open_maps(pack_path)
+    start = time.perf_counter()
+    result = solve(maps_[level_index], level_index, max_states)
+    return level_index, result, time.perf_counter() - start
+
+
+def main():
+    """Solves the levels of the game (or of a pack) in a process pool."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("levels", nargs="*", type=int, metavar="LEVEL",
+                        help="level number (all levels by default)")
+    parser.add_argument("--pack", help="solve levels of this level pack")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--max-states", type=int, default=1000000,
+                        help="give up a level after expanding this many"
+                        + " states")
+    parser.add_argument("--replays", metavar="DIRECTORY",
+                        help="save the solutions as replays there")
+    arguments = parser.parse_args()
+
+    maps_ = open_maps(arguments.pack)
+    indices = [level - 1 for level in arguments.levels] or range(len(maps_))
+    tasks = [(arguments.pack, i, arguments.max_states) for i in indices]
+    failed = 0
+    with multiprocessing.Pool(arguments.processes) as pool:
+        for i, (solvable, solution, states), elapsed in pool.imap(
+                solve_level, tasks
+                ):
+            if solvable:
+                result = f"solvable in {solution.ticks()} ticks"
+            elif solvable is None:
+                result = (
+                    "unknown (gave up)" if states
+                    else "unknown (chasing watchers)"
+                    )
+            else:
+                result = "UNSOLVABLE"
+            print(
+                f"{maps_.name(i)}: {result}"
+                + f" ({states} states, {elapsed:.2f} s)"
+                )
+            if not solvable:
+                failed += 1
+            elif arguments.replays is not None:
+                os.makedirs(arguments.replays, exist_ok=True)
+                solution.save(os.path.join(
+                    arguments.replays, f"level_{i + 1}.json"
+                    ))
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
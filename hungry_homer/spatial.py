@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""Spatial index of entities for finding collision candidates."""
+
+
+class SpatialHash:
+    """
+    Entities indexed by the grid cell of their bottom left corner. Two
+    entities which collide (see simulation.Entity.collides) are always
+    in the same or adjacent cells, so only those have to be checked.
+    """
+
+    def __init__(self, cell_size):
+        """Initializes an empty index."""
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def cell(self, x, y):
+        """Returns the cell containing the given coordinates."""
+        return (x // self.cell_size, y // self.cell_size)
+
+    def insert(self, entity):
+        """Adds an entity to the index."""
+        entity.spatial_index = self
+        entity.spatial_cell = self.cell(entity.x, entity.y)
+        self.cells.setdefault(entity.spatial_cell, []).append(entity)
+
+    def remove(self, entity):
+        """Removes an entity from the index."""
+        entities = self.cells[entity.spatial_cell]
+        entities.remove(entity)
+        if not entities:
+            del self.cells[entity.spatial_cell]
+
+    def move(self, entity):
+        """Updates the cell of an entity after it has moved."""
+        cell = self.cell(entity.x, entity.y)
+        if cell != entity.spatial_cell:
+            self.remove(entity)
+            entity.spatial_cell = cell
+            self.cells.setdefault(cell, []).append(entity)
+
+    def near(self, x, y):
+        """
+        Yields entities in the cell containing the given coordinates
+        and in the adjacent ones.
+        """
+        cell_x, cell_y = self.cell(x, y)
+        for i in (cell_x - 1, cell_x, cell_x + 1):
+            for j in (cell_y - 1, cell_y, cell_y + 1):
+                entities = self.cells.get((i, j))
+                if entities:
+                    yield from entities
+
+    def within(self, left, bottom, right, top):
+        """
+        Yields entities whose cells intersect the given area (of
+        coordinates).
+        """
+        cell_left, cell_bottom = self.cell(left, bottom)
+        cell_right, cell_top = self.cell(right, top)
+        # (go through the occupied cells if there are fewer of them)
+        if len(self.cells) < (
+            (cell_right - cell_left + 1) * (cell_top - cell_bottom + 1)
+            ):
+            for (i, j), entities in self.cells.items():
+                if (
+                    cell_left <= i <= cell_right
+                    and cell_bottom <= j <= cell_top
+                    ):
+                    yield from entities
+            return
+        for i in range(cell_left, cell_right + 1):
+            for j in range(cell_bottom, cell_top + 1):
+                entities = self.cells.get((i, j))
+                if entities:
+                    yield from entities
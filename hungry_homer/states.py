@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 
+import os
+import time
+
 import pyglet
 
-from hungry_homer import objects
+from hungry_homer import objects, replay, simulation, snapshot, viewport
 
 
 class State:
@@ -19,106 +22,179 @@ class State:
         """This should be implemented in the actual state class."""
         raise NotImplementedError
 
+    def draw(self):
+        """Draws the state."""
+        self.batch.draw()
+
 
 class MenuItem(pyglet.text.Label):
-    """A menu item, now only for levels."""
+    """
+    A menu item, now only for levels. The items of a page of the menu
+    are reused for the levels of other pages.
+    """
 
-    def __init__(self, *args, game, i, selected, text, **kwargs):
-        """Initializes a menu item."""
+    def __init__(self, *args, game, **kwargs):
+        """Initializes a menu item (without a level)."""
         self.game = game
+        self.i = None
+        self.selected = False
+        self.actual_text = ""
+        super().__init__(*args, **kwargs)
+
+    def show(self, i, text, selected):
+        """Shows a level (none and no text if i is None)."""
         self.i = i
-        self.selected = selected
         self.actual_text = text
-        super().__init__(*args, text=text, **kwargs)
+        self.selected = selected
+        self.update()
 
     def update(self):
-        """Highlights the item if selected."""
+        """
+        Highlights the item if selected (only when it changes, setting
+        the text lays the label out again).
+        """
         if self.selected:
-            self.text = "> " + self.actual_text + " <"
+            text = "> " + self.actual_text + " <"
         else:
-            self.text = self.actual_text
+            text = self.actual_text
+        if self.text != text:
+            self.text = text
 
     def action(self):
         """Opens the level."""
-        self.game.state = Level(self.game, self.game.maps[self.i])
+        self.game.state = Level(self.game, self.game.maps[self.i], self.i)
 
 
 class Menu(State):
-    """Menu for choosing a level."""
+    """
+    Menu for choosing a level. Only a page of levels is shown, their
+    names are got from the maps when the page is shown.
+    """
 
     def __init__(self, game):
         """Initializes the menu."""
         super().__init__(game)
         self.items = None
+        self.page_label = None
         self.selected_i = 0
+        # index of the first level of the shown page
+        self.first_i = 0
+        self.page_size = None
         self.setup_items()
 
     def setup_items(self):
-        """Initializes the menu items and centres them."""
+        """Initializes the menu items of a page and centres them."""
         self.items = []
-        item_count = len(self.game.maps)
         font_size = 20
+        # (so the lowest item stays above the page number)
+        self.page_size = self.game.height // (font_size * 3)
+        item_count = min(len(self.game.maps), self.page_size)
         x = self.game.width // 2
         anchor_x = "center"
         y = (self.game.height + item_count * font_size) // 2
-        for i in range(len(self.game.maps)):
+        for _ in range(item_count):
             item = MenuItem(
                 game=self.game,
                 x=x, anchor_x=anchor_x, y=y,
-                i=i,
-                text=f"Level {i+1}",
                 batch=self.batch,
                 font_size=font_size,
-                color=(0, 0, 0, 255),   # black
-                selected=(i == self.selected_i)
+                color=(0, 0, 0, 255)   # black
                 )
             self.items.append(item)
             y -= font_size * 2
+        if len(self.game.maps) > self.page_size:
+            self.page_label = pyglet.text.Label(
+                x=x, anchor_x=anchor_x, y=font_size // 2,
+                batch=self.batch,
+                font_size=font_size // 2,
+                color=(0, 0, 0, 255)
+                )
+        self.show_page()
+
+    def show_page(self):
+        """Shows the page with the selected level."""
+        self.first_i = self.selected_i - self.selected_i % self.page_size
+        maps = self.game.maps
+        for i, item in enumerate(self.items, self.first_i):
+            if i < len(maps):
+                item.show(i, maps.name(i), i == self.selected_i)
+            else:
+                item.show(None, "", False)
+        if self.page_label is not None:
+            self.page_label.text = (
+                f"{self.first_i // self.page_size + 1}"
+                + f"/{(len(maps) - 1) // self.page_size + 1}"
+                + "  (PAGE UP/DOWN, HOME, END)"
+                )
 
     def on_key_press(self, symbol, modifiers):
         """Selects another item, calls its action, or closes the game."""
         if symbol in (self.key.DOWN, self.key.UP):
             direction = 1 if symbol == self.key.DOWN else -1
             self.select(direction)
+        elif symbol in (self.key.PAGEDOWN, self.key.PAGEUP):
+            direction = 1 if symbol == self.key.PAGEDOWN else -1
+            self.select_level(min(
+                max(self.selected_i + direction * self.page_size, 0),
+                len(self.game.maps) - 1
+                ))
+        elif symbol == self.key.HOME:
+            self.select_level(0)
+        elif symbol == self.key.END:
+            self.select_level(len(self.game.maps) - 1)
         elif symbol == self.key.RETURN:
-            self.items[self.selected_i].action()
+            self.open()
         elif symbol == pyglet.window.key.ESCAPE:
             self.game.close()
 
     def select(self, direction):
         """
-        Selects previous/next item (unless the top or bottom one was
+        Selects previous/next item (unless the first or last level was
         selected before).
         """
         new_i = self.selected_i + direction
-        if 0 <= new_i < len(self.items):
-            self.items[self.selected_i].selected = False
-            self.selected_i = new_i
-            self.items[self.selected_i].selected = True
+        if 0 <= new_i < len(self.game.maps):
+            self.select_level(new_i)
+
+    def select_level(self, i):
+        """Selects the i-th level (and shows its page)."""
+        if i // self.page_size != self.first_i // self.page_size:
+            self.selected_i = i
+            self.show_page()
+            return
+        item = self.items[self.selected_i - self.first_i]
+        item.selected = False
+        item.update()
+        self.selected_i = i
+        item = self.items[self.selected_i - self.first_i]
+        item.selected = True
+        item.update()
+
+    def open(self):
+        """Opens the selected level."""
+        self.items[self.selected_i - self.first_i].action()
 
     def update(self):
-        """Highlights the selected item."""
-        for item in self.items:
-            item.update()
+        """Nothing changes in the menu by itself."""
+        pass
 
 
 class Level(State):
-    """A game level class."""
+    """
+    A game level class drawing a simulation of the level. Objects which
+    don't move are in chunks of the map, only the chunks and watchers
+    in view of the camera (following Homer) are drawn and updated.
+    """
 
-    def __init__(self, game, map_):
-        """Initializes a level."""
+    def __init__(self, game, map_, level_index, playback=None):
+        """
+        Initializes a level (with the given index among the game maps).
+        If a replay is given for playback, its inputs are used instead
+        of the keyboard.
+        """
         super().__init__(game)
         self.map = map_
-
-        self.object_size = 20
-        self.object_speed = 2
-        self.object_directions = (
-            (0, 1),    # up
-            (1, 0),    # right
-            (0, -1),   # down
-            (-1, 0),   # left
-            (0, 0)     # stay
-            )
+        self.level_index = level_index
 
         # when two objects overlap, this decides which should be on top
         self.subgroups = {
@@ -127,157 +203,223 @@ class Level(State):
             "homer": pyglet.graphics.OrderedGroup(2)
             }
 
+        self.simulation = simulation.Simulation(map_)
+        self.simulation.profiler = self.game.profiler
+        size = simulation.OBJECT_SIZE
+        self.camera = viewport.Camera(
+            self.simulation.grid_width * size,
+            self.simulation.grid_height * size,
+            self.game.width, self.game.height
+            )
+        self.chunks = viewport.Chunks(map_, self.subgroups["background"])
+        self.visible_chunks = []
+        # (Homer is in the level batch)
+        self.watcher_batch = pyglet.graphics.Batch()
+        self.visible_watchers = set()
         self.objects = None
-        self.food_count = 0
+        self.watcher_objects = None
         self.setup_objects()
+        # the simulation is restarted in place, the sprites are kept
+        self.restarts = self.simulation.restarts
 
         self.paused = False
+        # inputs are recorded in every tick
+        self.replay = replay.Replay(
+            level_index, map_hash=replay.map_hash(map_)
+            )
+        self.playback = playback.directions() if playback else None
+        # past states for rewinding
+        self.history = snapshot.RewindBuffer()
+        self.history.push(snapshot.take(self.simulation))
 
-    def setup_objects(self):
-        """Initializes objects from the level map."""
+        self.update_objects()
 
+    def setup_objects(self):
+        """
+        Initializes objects (sprites) for the simulation entities (also
+        for collectibles which get taken, they're only hidden).
+        """
         self.objects = {
-            "homer": [],
-            "watchers": [],
-            "gate": [],
-            "collectibles": [],
-            "bell": [],
-            "bricks": []
+            name: [self.create_object(entity, name) for entity in entities]
+            for name, entities in self.simulation.objects.items()
+            if name != "collectibles"
+            }
+        self.objects["collectibles"] = {
+            entity.map_position: self.create_object(entity, "collectibles")
+            for entity in self.simulation.all_collectibles
+            }
+        self.watcher_objects = {
+            object_.entity: object_ for object_ in self.objects["watchers"]
             }
-        self.food_count = 0
-
-        circular_watchers = "urdlURDL"
-        linear_watchers = "^>v<"
-        watchers = circular_watchers + linear_watchers
-
-        for i, row in enumerate(self.map):
-            for j, symbol in enumerate(row):
-                # skip empty positions
-                if symbol in " .":
-                    continue
-
-                batch_group = None
-                if symbol == "H":
-                    batch_group = "homer"
-                elif symbol in watchers:
-                    batch_group = "watchers"
-                else:
-                    batch_group = "background"
-
-                group = None
-                if symbol in circular_watchers:
-                    class_ = objects.CircularWatcher
-                    group = "watchers"
-                elif symbol in linear_watchers:
-                    class_ = objects.LinearWatcher
-                    group = "watchers"
-                elif symbol == "X":
-                    class_ = objects.Brick
-                    group = "bricks"
-                elif symbol == "*":
-                    class_ = objects.Food
-                    group = "collectibles"
-                    self.food_count += 1
-                elif symbol == "H":
-                    class_ = objects.Homer
-                    group = "homer"
-                elif symbol == "_":
-                    class_ = objects.Key
-                    group = "collectibles"
-                elif symbol == "/":
-                    class_ = objects.Gate
-                    group = "gate"
-                elif symbol == "b":
-                    class_ = objects.Bell
-                    # not really a collectible, but it doesn't matter here
-                    group = "collectibles"
-
-                arguments = {
-                    "game": self.game,
-                    "level": self,
-                    "map_position": (j, i),
-                    "batch": self.batch,
-                    "group": self.subgroups[batch_group]
-                    }
-
-                if symbol in circular_watchers:
-                    arguments["direction_i"] = (
-                        circular_watchers.index(symbol) % 4
-                        )
-                    arguments["side"] = 1 if symbol.islower() else -1
-                elif symbol in linear_watchers:
-                    arguments["direction_i"] = (
-                        linear_watchers.index(symbol) % 4
-                        )
-
-                object_ = class_(**arguments)
-                self.objects[group].append(object_)
-
-    def complete(self, dt):
+        # (those out of view get hidden)
+        self.visible_watchers = set(self.objects["watchers"])
+
+    def update_objects(self):
+        """
+        Moves the camera after Homer and updates the objects in view
+        (and hides watchers which left it).
+        """
+        homer = self.objects["homer"][0]
+        homer.update()
+        self.camera.follow(homer.entity)
+        self.visible_chunks = self.chunks.visible(self.camera)
+        for chunk in self.visible_chunks:
+            for object_ in chunk.updated_objects:
+                object_.update()
+
+        # (watchers are indexed by the cells of their bottom left
+        # corners, so those a cell left or down may be in view too)
+        size = simulation.OBJECT_SIZE
+        visible_watchers = {
+            self.watcher_objects[entity]
+            for entity in self.simulation.watcher_index.within(
+                self.camera.x - size, self.camera.y - size,
+                self.camera.x + self.camera.width - 1,
+                self.camera.y + self.camera.height - 1
+                )
+            }
+        for object_ in self.visible_watchers - visible_watchers:
+            object_.visible = False
+        for object_ in visible_watchers:
+            if not object_.visible:
+                object_.visible = True
+            object_.update()
+        self.visible_watchers = visible_watchers
+
+    def draw(self):
+        """Draws the chunks and the watchers in view, and Homer."""
+        pyglet.gl.glPushMatrix()
+        pyglet.gl.glTranslatef(-self.camera.x, -self.camera.y, 0)
+        for chunk in self.visible_chunks:
+            chunk.batch.draw()
+        self.watcher_batch.draw()
+        self.batch.draw()
+        pyglet.gl.glPopMatrix()
+
+    def show_collectibles(self):
+        """
+        Shows only the collectibles which are in the simulation (after
+        restarting or rewinding it).
+        """
+        entities = self.simulation.objects["collectibles"]
+        for position, object_ in self.objects["collectibles"].items():
+            visible = position in entities
+            if object_.visible != visible:
+                object_.visible = visible
+
+    def delete(self):
+        """Deletes the sprites (when the level is left)."""
+        for object_ in self.objects["homer"] + self.objects["watchers"]:
+            object_.delete()
+        for chunk in self.chunks.values():
+            chunk.delete()
+
+    def rewind(self):
+        """Returns the level one tick back (if it remembers it)."""
+        previous = self.history.pop()
+        if previous is None:
+            return
+        snapshot.restore(self.simulation, previous)
+        self.replay.unrecord()
+        self.show_collectibles()
+        self.update_objects()
+
+    def create_object(self, entity, name):
+        """
+        Creates an object (sprite) of an entity from the given group
+        (in the batch of its chunk if it doesn't move).
+        """
+        if name == "homer":
+            batch = self.batch
+        elif name == "watchers":
+            batch = self.watcher_batch
+        else:
+            batch = self.chunks.of(entity).batch
+        batch_group = name if name in ("homer", "watchers") else "background"
+        object_ = objects.classes[type(entity)](
+            entity=entity,
+            batch=batch,
+            group=self.subgroups[batch_group]
+            )
+        if name not in ("homer", "watchers"):
+            self.chunks.of(entity).add(object_)
+        return object_
+
+    def complete(self):
         """Returns to menu after Homer wins and selects the next level."""
         self.game.menu.select(1)
+        self.leave()
+
+    def leave(self):
+        """Saves the replay (if they're recorded) and returns to menu."""
+        if self.game.replay_directory is not None:
+            self.replay.state_hash = replay.state_hash(self.simulation)
+            self.replay.save(os.path.join(
+                self.game.replay_directory,
+                f"level{self.level_index + 1}"
+                + time.strftime("-%Y%m%d-%H%M%S.json")
+                ))
+        self.delete()
         self.game.state = self.game.menu
 
-    def is_forbidden(self, position, direction_i=4, has_key=False):
-        """
-        Checks whether a moving object can move to the position in
-        the given direction.
-        """
-        x = position[0] + self.game.object_directions[direction_i][0]
-        y = position[1] + self.game.object_directions[direction_i][1]
-        forbidden = "X." if has_key else "X./"
-        # don't go outside the window
-        if not (
-            0 <= x < self.game.grid_width
-            and 0 <= y < self.game.grid_height
+    def input_direction(self):
+        """Returns the direction of the pressed arrow (4 if none)."""
+        for i, key in enumerate(
+            (self.key.UP, self.key.RIGHT, self.key.DOWN, self.key.LEFT)
             ):
-            return True
-        return self.map[y][x] in forbidden
+            if self.key_handler[key]:
+                return i
+        return 4
 
     def on_key_press(self, symbol, modifiers):
         """Pauses the game or returns to the menu."""
         if symbol == self.key.P:
             self.paused = not self.paused
         elif symbol == self.key.ESCAPE:
-            self.game.state = self.game.menu
+            self.leave()
 
     def update(self):
-        """Updates the objects and handles their collisions."""
+        """Updates the simulation and the objects drawing it."""
         # don't do anything when paused
         if self.paused:
             return
 
-        # update all the objects
-        for group in self.objects.values():
-            for object_ in group:
-                object_.update()
+        if self.playback is None:
+            # rewind while backspace is held
+            if self.key_handler[self.key.BACKSPACE]:
+                self.rewind()
+                return
+            direction_i = self.input_direction()
+        else:
+            direction_i = next(self.playback, None)
+            # the replay is over
+            if direction_i is None:
+                self.leave()
+                return
+        profiler = self.game.profiler
+        if profiler is not None:
+            profiler.start()
+        self.replay.record(direction_i)
+        self.simulation.step(direction_i)
+        self.history.push(snapshot.take(self.simulation))
+        if profiler is not None:
+            profiler.lap("history")
+
+        # (after the whole tick, so a replay ends in the same state)
+        if self.simulation.completed:
+            self.complete()
+            return
+
+        # the level was restarted
+        if self.simulation.restarts != self.restarts:
+            self.restarts = self.simulation.restarts
+            self.show_collectibles()
+
+        # hide things taken by Homer
+        for entity in self.simulation.removed:
+            self.objects["collectibles"][entity.map_position].visible = False
 
-        # handle collisions
-        # Homer + watcher
-        for watcher in self.objects["watchers"]:
-            self.objects["homer"][0].handle_collision(watcher)
-        # Homer + collectible
-        for collectible in self.objects["collectibles"]:
-            self.objects["homer"][0].handle_collision(collectible)
-            collectible.handle_collision(self.objects["homer"][0])
-        # Homer + gate
-        self.objects["homer"][0].handle_collision(self.objects["gate"][0])
-        
-        # watcher + watcher
-        for first in self.objects["watchers"]:
-            for second in self.objects["watchers"]:
-                if first is second:
-                    continue
-                first.handle_collision(second)
-
-        # remove things taken by Homer
-        collectibles_to_delete = [
-            collectible for collectible in self.objects["collectibles"]
-            if not collectible.exists
-            ]
-        self.objects["collectibles"] = [
-            collectible for collectible in self.objects["collectibles"]
-            if collectible.exists
-            ]
-        for collectible in collectibles_to_delete:
-            collectible.delete()
+        self.update_objects()
+        if profiler is not None:
+            profiler.lap("sprites")
+            profiler.total("tick")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+"""Fixed-timestep game loop."""
+
+
+class FixedTimestep:
+    """
+    Runs a tick function at a constant rate of game time, independently
+    of the frame rate. If frames come late, more ticks are run per frame
+    (the frames which would be drawn between them are skipped) instead
+    of slowing the game down; ticks over the cap are dropped.
+    """
+
+    def __init__(self, tick, rate, max_ticks=8):
+        """
+        Initializes a loop calling tick rate times per second (at most
+        max_ticks times per frame).
+        """
+        self.tick = tick
+        self.rate = rate
+        self.max_ticks = max_ticks
+        # game time not simulated yet
+        self.accumulator = 0.0
+
+        # statistics
+        self.ticks = 0
+        self.frames = 0
+        self.skipped_frames = 0
+        self.dropped_ticks = 0
+        # ticks per second over the last measured second
+        self.tick_rate = 0.0
+        self.measured_time = 0.0
+        self.measured_ticks = 0
+
+    def update(self, dt):
+        """Runs ticks for dt seconds of game time (called every frame)."""
+        self.frames += 1
+        self.accumulator += dt
+        # (a little more to compensate rounding errors)
+        tick_count = int(self.accumulator * self.rate + 1e-6)
+        if tick_count > self.max_ticks:
+            self.dropped_ticks += tick_count - self.max_ticks
+            tick_count = self.max_ticks
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= tick_count / self.rate
+        if tick_count > 1:
+            self.skipped_frames += tick_count - 1
+
+        for _ in range(tick_count):
+            self.tick()
+        self.ticks += tick_count
+
+        self.measured_time += dt
+        self.measured_ticks += tick_count
+        if self.measured_time >= 1.0:
+            self.tick_rate = self.measured_ticks / self.measured_time
+            self.measured_time = 0.0
+            self.measured_ticks = 0
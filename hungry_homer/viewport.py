@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Drawing of maps bigger than the window: a camera following Homer and
+chunks of the map with their own batches, so only the chunks in view
+are drawn and updated (the simulation still runs in the whole map).
+"""
+
+import pyglet
+
+from hungry_homer import objects, simulation
+
+# chunks are squares of CHUNK_SIZE x CHUNK_SIZE cells
+CHUNK_SIZE = 32
+
+
+class Camera:
+    """View of the window into a map, following an entity."""
+
+    def __init__(self, map_width, map_height, width, height):
+        """
+        Initializes a camera of a map (of the given size in pixels) for
+        a window (of the given size in pixels).
+        """
+        self.map_width = map_width
+        self.map_height = map_height
+        self.width = width
+        self.height = height
+        # the bottom left corner of the view
+        self.x = 0
+        self.y = 0
+
+    def follow(self, entity):
+        """Centres the view on an entity (but doesn't leave the map)."""
+        self.x = min(
+            max(entity.x + entity.size // 2 - self.width // 2, 0),
+            max(self.map_width - self.width, 0)
+            )
+        self.y = min(
+            max(entity.y + entity.size // 2 - self.height // 2, 0),
+            max(self.map_height - self.height, 0)
+            )
+
+
+class Chunk:
+    """Part of a map with its own batch of objects which don't move."""
+
+    def __init__(self, map_, columns, rows, group):
+        """
+        Initializes a chunk of a map with the cells in the given ranges
+        of columns and rows.
+        """
+        self.batch = pyglet.graphics.Batch()
+        self.static_layer = objects.StaticLayer(
+            map_, cells=(columns, rows), batch=self.batch, group=group
+            )
+        self.objects = []
+        # objects whose appearance may change
+        self.updated_objects = []
+
+    def add(self, object_):
+        """Adds an object (created in the batch of the chunk)."""
+        self.objects.append(object_)
+        if isinstance(object_, (objects.Gate, objects.Bell)):
+            self.updated_objects.append(object_)
+
+    def delete(self):
+        """Deletes the sprites of the chunk."""
+        for object_ in self.objects:
+            object_.delete()
+        self.static_layer.delete()
+
+
+class Chunks(dict):
+    """Chunks of a map by their positions (in chunks)."""
+
+    def __init__(self, map_, group):
+        """Splits a map into chunks (with bricks in the given group)."""
+        super().__init__()
+        width = max((len(row) for row in map_))
+        for x in range(0, width, CHUNK_SIZE):
+            for y in range(0, len(map_), CHUNK_SIZE):
+                self[x // CHUNK_SIZE, y // CHUNK_SIZE] = Chunk(
+                    map_, range(x, min(x + CHUNK_SIZE, width)),
+                    range(y, min(y + CHUNK_SIZE, len(map_))), group
+                    )
+
+    def of(self, entity):
+        """Returns the chunk containing an entity (its map position)."""
+        x, y = entity.map_position
+        return self[x // CHUNK_SIZE, y // CHUNK_SIZE]
+
+    def visible(self, camera):
+        """Returns the chunks in the view of a camera."""
+        size = CHUNK_SIZE * simulation.OBJECT_SIZE
+        return [
+            self[x, y]
+            for x in range(
+                camera.x // size, (camera.x + camera.width - 1) // size + 1
+                )
+            for y in range(
+                camera.y // size, (camera.y + camera.height - 1) // size + 1
+                )
+            if (x, y) in self
+            ]
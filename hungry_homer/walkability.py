@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""Level map compiled for finding where moving entities can go."""
+
+
+class Walkability:
+    """
+    Map compiled into masks of directions in which moving entities can
+    go from each cell, one layer for entities without the key (for
+    which the gate is closed) and one for Homer with the key.
+
+    Moving entities make decisions only in walkable cells (which are
+    always in the map), so they index the masks directly.
+    """
+
+    def __init__(self, map_, directions):
+        """
+        Compiles a map (rows of symbols from bottom to top) for the
+        given directions (coordinate offsets, the last one is staying
+        in place).
+        """
+        self.directions = directions
+        self.height = len(map_)
+        self.width = max((len(row) for row in map_))
+        # walkable cells (without and with the key)
+        self.cells = (bytearray(self.width * self.height),
+                      bytearray(self.width * self.height))
+        for has_key, forbidden in ((0, "X./"), (1, "X.")):
+            for y, row in enumerate(map_):
+                for x, symbol in enumerate(row):
+                    if symbol not in forbidden:
+                        self.cells[has_key][y * self.width + x] = 1
+        # bit i of a mask is set if moving in direction i is allowed
+        self.masks = tuple(
+            bytearray(
+                self.compute_mask(x, y, has_key)
+                for y in range(self.height) for x in range(self.width)
+                )
+            for has_key in (0, 1)
+            )
+
+    def is_walkable(self, x, y, has_key=False):
+        """Checks whether a moving entity can be in the given cell."""
+        return (
+            0 <= x < self.width
+            and 0 <= y < self.height
+            and self.cells[has_key][y * self.width + x] == 1
+            )
+
+    def compute_mask(self, x, y, has_key=False):
+        """Computes the mask of directions allowed from the given cell."""
+        mask = 0
+        for i, direction in enumerate(self.directions):
+            if self.is_walkable(x + direction[0], y + direction[1], has_key):
+                mask |= 1 << i
+        return mask
+
+    def index(self, position):
+        """
+        Returns the index of the position in the masks (which is valid
+        only for positions in the map).
+        """
+        return position[1] * self.width + position[0]
+
+    def mask(self, position, has_key=False):
+        """Returns the mask of directions allowed from the position."""
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.masks[has_key][y * self.width + x]
+        return self.compute_mask(x, y, has_key)
+
+    def is_forbidden(self, position, direction_i=4, has_key=False):
+        """
+        Checks whether a moving entity can move to the position in
+        the given direction.
+        """
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            mask = self.masks[has_key][y * self.width + x]
+        else:
+            mask = self.compute_mask(x, y, has_key)
+        return not mask >> direction_i & 1
@@ -11,7 +11,9 @@ def main():
     setup(
         name="Hungry Homer",
         version="1.0",
-        packages=find_packages(),
+        packages=find_packages(
+            exclude=["benchmarks", "benchmarks.*", "tests", "tests.*"]
+            ),
         package_data={"hungry_homer": [
             os.path.join("resources_dir", "*"),
             os.path.join("level_maps", "*")
@@ -20,6 +22,12 @@ def main():
             "pyglet>=1.5.7",
             "importlib-resources;python_version<'3.7'"
             ],
+        extras_require={
+            # batch simulation (hungry_homer.batch)
+            "batch": ["numpy"],
+            # software rendering (hungry_homer.raster)
+            "raster": ["numpy"]
+            },
         entry_points={
             "gui_scripts": ["hungry_homer=hungry_homer.__main__:main"],
         },
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""
+Golden traces of the shipped maps: inputs and a digest of the state
+after each tick, recorded from the sprite-based level of the game before
+the headless simulation (see record_golden.py). Only attributes both
+of them have are digested, so this module mustn't import the game.
+"""
+
+import hashlib
+import json
+import os
+import random
+
+PATH = os.path.join(os.path.dirname(__file__), "golden.json")
+# hex digits of each digest
+DIGEST_LENGTH = 8
+
+
+def digest(completed, homer, watchers, collectibles, gate):
+    """Returns a short digest of the state of a level."""
+    state = [
+        bool(completed),
+        [
+            homer.x, homer.y, homer.direction_i, homer.speed,
+            homer.food_count, homer.has_key, homer.bump_count,
+            homer.invincible, homer.lost, homer.won, homer.opacity
+            ],
+        [
+            [watcher.x, watcher.y, watcher.direction_i,
+             getattr(watcher, "side", 0)]
+            for watcher in watchers
+            ],
+        sorted(
+            [*collectible.map_position, type(collectible).__name__,
+             getattr(collectible, "rung", False)]
+            for collectible in collectibles
+            ),
+        gate.opened
+        ]
+    return hashlib.sha1(
+        json.dumps(state).encode()
+        ).hexdigest()[:DIGEST_LENGTH]
+
+
+def directions(runs):
+    """Yields the direction of each tick of runs of [direction, ticks]."""
+    for direction_i, ticks in runs:
+        for _ in range(ticks):
+            yield direction_i
+
+
+def random_runs(seed, ticks):
+    """
+    Returns random inputs (runs of [direction_i, ticks]), each arrow held
+    for up to a second.
+    """
+    rng = random.Random(seed)
+    runs = []
+    total = 0
+    while total < ticks:
+        run = [rng.randrange(5), min(rng.randrange(1, 120), ticks - total)]
+        runs.append(run)
+        total += run[1]
+    return runs
+
+
+def load():
+    """
+    Returns the traces as dictionaries with the level index, the inputs
+    (runs of [direction_i, ticks]) and the digests of the ticks.
+    """
+    with open(PATH) as file:
+        traces = json.load(file)
+    for trace in traces:
+        hashes = trace["digests"]
+        trace["digests"] = [
+            hashes[i:(i + DIGEST_LENGTH)]
+            for i in range(0, len(hashes), DIGEST_LENGTH)
+            ]
+    return traces
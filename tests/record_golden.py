@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Records golden traces (tests/golden.json) of the shipped maps from the
+sprite-based level of the game as it was before the headless simulation
+(commit b2ae880), with random inputs and optionally inputs of replays
+(e.g. solutions, to get through whole levels). Timers of that level
+were in seconds of pyglet.clock, here they're counted in ticks of 1/120 s,
+as in the game loop:
+
+git worktree add /tmp/sprites b2ae880
+PYTHONPATH=/tmp/sprites python tests/record_golden.py [REPLAY...]
+"""
+
+import heapq
+import itertools
+import json
+import sys
+
+import pyglet
+pyglet.options["headless"] = True
+
+# (the directory of the script, not of the package, is on the path, so
+# hungry_homer is the one of the old tree)
+import golden
+
+TICK_RATE = 120
+SEEDS = (1, 2)
+TICKS = 2400
+
+
+class TickClock:
+    """Replacement of pyglet.clock counting ticks."""
+
+    def __init__(self):
+        """Initializes a clock with nothing scheduled."""
+        self.ticks = 0
+        self.heap = []
+        self.counter = itertools.count()
+
+    def schedule_once(self, func, delay):
+        """Schedules a function after delay seconds."""
+        heapq.heappush(self.heap, [
+            self.ticks + round(delay * TICK_RATE), next(self.counter), delay,
+            func
+            ])
+
+    def unschedule(self, func):
+        """Cancels all scheduled calls of a function."""
+        for entry in self.heap:
+            if entry[3] == func:
+                entry[3] = None
+
+    def tick(self):
+        """Advances by one tick and calls what's due."""
+        self.ticks += 1
+        while self.heap and self.heap[0][0] <= self.ticks:
+            _, _, delay, func = heapq.heappop(self.heap)
+            if func is not None:
+                func(delay)
+
+
+class Game:
+    """What the level needs of the game window (and of its menu)."""
+
+    grid_width = 32
+    grid_height = 24
+    object_size = 20
+    object_speed = 2
+    object_directions = ((0, 1), (1, 0), (0, -1), (-1, 0), (0, 0))
+    maps_location = "hungry_homer.level_maps"
+    key = pyglet.window.key
+
+    def __init__(self):
+        """Initializes the game with no arrow pressed."""
+        self.key_handler = pyglet.window.key.KeyStateHandler()
+        self.clock = TickClock()
+        self.menu = self
+        self.state = None
+        self.completed = False
+
+    def select(self, direction):
+        """Selects the next level in the menu, i. e. the level is over."""
+        self.completed = True
+
+
+def record(map_, runs):
+    """Plays the inputs in a level, returns the digests of the ticks."""
+    from hungry_homer import states
+
+    game = Game()
+    level = states.Level(game, map_)
+    arrows = (game.key.UP, game.key.RIGHT, game.key.DOWN, game.key.LEFT)
+    digests = []
+    for direction_i in golden.directions(runs):
+        for i, key in enumerate(arrows):
+            game.key_handler[key] = i == direction_i
+        game.clock.tick()
+        level.update()
+        objects = level.objects
+        digests.append(golden.digest(
+            game.completed, objects["homer"][0], objects["watchers"],
+            objects["collectibles"], objects["gate"][0]
+            ))
+    return digests
+
+
+def main():
+    """Records the traces."""
+    # (the images are loaded into textures when the objects are imported)
+    window = pyglet.window.Window(visible=False)
+    from hungry_homer import game as game_module
+
+    maps = game_module.Game._Game__read_maps(Game())
+    inputs = [
+        (level_index, golden.random_runs(seed, TICKS))
+        for level_index in range(len(maps)) for seed in SEEDS
+        ]
+    for path in sys.argv[1:]:
+        with open(path) as file:
+            replay = json.load(file)
+        inputs.append((replay["level_index"], replay["inputs"]))
+    traces = []
+    for level_index, runs in inputs:
+        traces.append({
+            "level_index": level_index, "inputs": runs,
+            "digests": "".join(record(maps[level_index], runs))
+            })
+    window.close()
+    with open(golden.PATH, "w") as file:
+        json.dump(traces, file)
+
+if __name__ == "__main__":
+    main()
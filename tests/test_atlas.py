@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""The cached atlas is used until the images change."""
+
+import json
+import os
+import shutil
+
+import pytest
+
+pyglet = pytest.importorskip("pyglet")
+if not os.environ.get("DISPLAY"):
+    pyglet.options["headless"] = True
+
+from hungry_homer import atlas
+
+
+@pytest.fixture
+def images(tmp_path, monkeypatch):
+    """Copies of the images, the atlas is cached next to them."""
+    for name in atlas.NAMES:
+        shutil.copy(
+            os.path.join(atlas.directory, name + ".png"), tmp_path
+            )
+    monkeypatch.setattr(atlas, "directory", str(tmp_path))
+    monkeypatch.setattr(atlas, "image_path", str(tmp_path / "atlas.png"))
+    monkeypatch.setattr(atlas, "index_path", str(tmp_path / "atlas.json"))
+    try:
+        # (textures need an OpenGL context)
+        import pyglet.gl
+    except Exception as error:
+        pytest.skip(f"no OpenGL context: {error}")
+    return tmp_path
+
+
+def cached_hash():
+    """Returns the hash of the images of the cached atlas."""
+    with open(atlas.index_path) as file:
+        return json.load(file)["hash"]
+
+
+def not_built():
+    """Fails a test which should use the cached atlas."""
+    raise AssertionError("the atlas is built again")
+
+
+def test_stale_cache_rebuilt(images, monkeypatch):
+    """
+    The atlas is built once and read from the cache then, until the sha1
+    of the images doesn't match, and it's built and saved again.
+    """
+    regions = atlas.load()
+    assert cached_hash() == atlas.sources_hash()
+    build = atlas.build
+    monkeypatch.setattr(atlas, "build", not_built)
+    cached = atlas.load()
+    assert {
+        name: (region.width, region.height)
+        for name, region in cached.items()
+        } == {
+        name: (region.width, region.height)
+        for name, region in regions.items()
+        }
+
+    # (a brick of another size)
+    shutil.copy(images / "homer.png", images / "brick.png")
+    assert cached_hash() != atlas.sources_hash()
+    with pytest.raises(AssertionError):
+        atlas.load()
+    monkeypatch.setattr(atlas, "build", build)
+    rebuilt = atlas.load()
+    assert cached_hash() == atlas.sources_hash()
+    assert (rebuilt["brick"].width, rebuilt["brick"].height) == (
+        rebuilt["homer"].width, rebuilt["homer"].height
+        )
+    monkeypatch.setattr(atlas, "build", not_built)
+    atlas.load()
+
+
+def test_broken_cache_rebuilt(images):
+    """An unreadable cached index is replaced."""
+    atlas.load()
+    with open(atlas.index_path, "w") as file:
+        file.write("{")
+    atlas.load()
+    assert cached_hash() == atlas.sources_hash()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""Instances of a batch simulation play as simulations one by one."""
+
+import itertools
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks import maps as generated
+from hungry_homer import batch, maps, simulation
+from tests import golden
+
+SHIPPED = maps.Maps("hungry_homer.level_maps", 32, 24)
+MAPS = {
+    **{f"level {i + 1}": SHIPPED[i] for i in range(len(SHIPPED))},
+    "arena": generated.arena(32, 24, 30),
+    "generated": generated.generate(32, 24, watcher_count=20, bell_count=2)
+    }
+TICKS = 3000
+HOMER_FIELDS = (
+    "x", "y", "direction_i", "facing_i", "in_place", "speed", "food_count",
+    "has_key", "bump_count", "invincible", "lost", "won", "opacity"
+    )
+
+
+def inputs(name):
+    """
+    Returns the arrows pressed in the instances in each tick (random ones,
+    and in the shipped levels also those of their golden traces, which
+    complete them).
+    """
+    runs = [golden.random_runs(seed, TICKS) for seed in range(1, 5)]
+    runs += [
+        trace["inputs"] for trace in golden.load()
+        if name == f"level {trace['level_index'] + 1}"
+        ]
+    # (none pressed after the end of a trace)
+    directions = [
+        itertools.chain(golden.directions(runs_), itertools.repeat(4))
+        for runs_ in runs
+        ]
+    return np.array([
+        [next(instance) for instance in directions] for _ in range(TICKS)
+        ])
+
+
+def instance_state(batch_simulation, i):
+    """Returns the state of an instance of a batch simulation."""
+    return {
+        field: getattr(batch_simulation, field)[..., i].tolist()
+        for field in (
+            *HOMER_FIELDS, "watcher_x", "watcher_y", "watcher_direction_i",
+            "watcher_side", "exists", "rung", "ringing", "gate_opened",
+            "completed"
+            )
+        }
+
+
+def simulation_state(level, collectible_positions):
+    """Returns the state of a simulation like instance_state."""
+    homer = level.objects["homer"][0]
+    watchers = level.objects["watchers"]
+    collectibles = level.objects["collectibles"]
+    state = {field: getattr(homer, field) for field in HOMER_FIELDS}
+    for field in ("x", "y", "direction_i"):
+        state["watcher_" + field] = [
+            getattr(watcher, field) for watcher in watchers
+            ]
+    state["watcher_side"] = [
+        getattr(watcher, "side", 0) for watcher in watchers
+        ]
+    # (taken ones don't exist)
+    state["exists"] = [
+        position in collectibles for position in collectible_positions
+        ]
+    for field in ("rung", "ringing"):
+        state[field] = [
+            getattr(collectibles.get(position), field, False)
+            for position in collectible_positions
+            ]
+    state["gate_opened"] = level.objects["gate"][0].opened
+    state["completed"] = level.completed
+    return state
+
+
+@pytest.mark.parametrize("name", MAPS)
+def test_instances_as_simulations(name):
+    """Every tick, each instance is in the same state as its simulation."""
+    directions = inputs(name)
+    count = directions.shape[1]
+    batch_simulation = batch.BatchSimulation(MAPS[name], count)
+    levels = [simulation.Simulation(MAPS[name]) for _ in range(count)]
+    collectible_positions = list(levels[0].objects["collectibles"])
+    for tick in range(TICKS):
+        batch_simulation.step(directions[tick])
+        for i, level in enumerate(levels):
+            level.step(int(directions[tick, i]))
+            expected = simulation_state(level, collectible_positions)
+            actual = instance_state(batch_simulation, i)
+            assert actual == expected, (
+                f"instance {i} differs in tick {tick + 1}: "
+                + str({
+                    field: (actual[field], expected[field])
+                    for field in expected
+                    if actual[field] != expected[field]
+                    })
+                )
+    if name.startswith("level"):
+        # (the golden trace is played to the end)
+        assert levels[-1].completed
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""Chasing watchers and their distance field to Homer."""
+
+import collections
+
+import pytest
+
+from benchmarks import maps as generated
+from hungry_homer import distancefield, simulation, walkability
+
+
+def chaser(level):
+    """Returns the (only) chasing watcher of a simulation."""
+    return next(
+        watcher for watcher in level.objects["watchers"]
+        if isinstance(watcher, simulation.ChasingWatcher)
+        )
+
+
+def test_bumped_standing_chaser_stands():
+    """
+    A chaser who can't get to Homer stands, also after a linear watcher
+    bumps into him (who turns around).
+    """
+    # (from bottom to top, Homer is behind the bricks)
+    level = simulation.Simulation([list(row) for row in (
+        "XXX/XXX", "X    HX", "XXXXXXX", "Xc  < X", "X     X", "XXXXXXX"
+        )])
+    watcher = chaser(level)
+    linear = level.objects["watchers"][1]
+    bumped = False
+    for _ in range(600):
+        level.step()
+        bumped = bumped or linear.direction_i == 1
+        assert (watcher.x, watcher.y, watcher.direction_i) == (20, 60, 4)
+    assert bumped
+
+
+def test_chaser_gets_to_homer():
+    """
+    A chaser goes after Homer standing in a maze along a shortest way
+    until he bumps him.
+    """
+    map_ = generated.maze(15, 11, 0)
+    # (the food farthest from Homer in the bottom left corner)
+    x, y = max(
+        ((x, y) for y, row in enumerate(map_) for x, symbol in enumerate(row)
+         if symbol == "*"),
+        key=sum
+        )
+    map_[y][x] = simulation.CHASING_WATCHER
+    level = simulation.Simulation(map_)
+    homer = level.objects["homer"][0]
+    level.homer_distances.set_target(homer.map_position)
+    distance = level.homer_distances.distance(chaser(level).map_index)
+    # (he moves by a cell in 10 ticks and bumps Homer from the next one)
+    for _ in range(10 * (distance - 1)):
+        assert not homer.bump_count
+        level.step()
+    assert homer.bump_count == 1
+
+
+def searched(walkability_, target):
+    """Returns distances of all the cells to the target (by a search)."""
+    masks = walkability_.masks[0]
+    distances = {target: 0}
+    queue = collections.deque([target])
+    while queue:
+        x, y = queue.popleft()
+        for direction_i, (dx, dy) in enumerate(walkability_.directions[:4]):
+            other = (x - dx, y - dy)
+            if (
+                other not in distances
+                and 0 <= other[0] < walkability_.width
+                and 0 <= other[1] < walkability_.height
+                and masks[walkability_.index(other)] >> direction_i & 1
+                ):
+                distances[other] = distances[(x, y)] + 1
+                queue.append(other)
+    return distances
+
+
+@pytest.mark.parametrize("seed", (0, 1))
+def test_distance_field_as_search(seed):
+    """
+    The field gives the distances of a whole search after its target
+    changes (the cells are queried in any order) and a direction of
+    a shortest way.
+    """
+    walkability_ = walkability.Walkability(
+        generated.maze(31, 23, 0, seed), simulation.OBJECT_DIRECTIONS
+        )
+    field = distancefield.DistanceField(walkability_)
+    cells = [
+        (x, y)
+        for y in range(walkability_.height) for x in range(walkability_.width)
+        ]
+    for target in ((1, 1), (29, 21), (15, 11), (1, 1)):
+        field.set_target(target)
+        expected = searched(walkability_, target)
+        for x, y in reversed(cells):
+            index = walkability_.index((x, y))
+            assert field.distance(index) == expected.get((x, y))
+            direction_i = field.direction(index, 0)
+            if expected.get((x, y)):
+                dx, dy = walkability_.directions[direction_i]
+                assert expected[(x + dx, y + dy)] == expected[(x, y)] - 1
+            else:
+                assert direction_i is None
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+"""Fast-forwarding ends in the same state as stepping each tick."""
+
+import pytest
+
+from benchmarks import maps as generated
+from hungry_homer import fastforward, maps, replay, simulation
+from tests import golden
+
+SHIPPED = maps.Maps("hungry_homer.level_maps", 32, 24)
+MAPS = {
+    **{f"level {i + 1}": SHIPPED[i] for i in range(len(SHIPPED))},
+    "arena": generated.arena(32, 24, 30),
+    "maze": generated.maze(31, 23, 20),
+    "chasing arena": [
+        [simulation.CHASING_WATCHER if symbol in "^>v<" else symbol
+         for symbol in row]
+        for row in generated.arena(32, 24, 20)
+        ]
+    }
+
+
+@pytest.mark.parametrize("name", MAPS)
+@pytest.mark.parametrize("seed", (1, 2))
+def test_advance_as_stepping(name, seed):
+    """After each run of inputs, both simulations are in the same state."""
+    stepped = simulation.Simulation(MAPS[name])
+    forwarded = simulation.Simulation(MAPS[name])
+    for direction_i, ticks in golden.random_runs(seed, 3000):
+        for _ in range(ticks):
+            stepped.step(direction_i)
+        fastforward.advance(forwarded, ticks, direction_i)
+        assert replay.state_hash(forwarded) == replay.state_hash(stepped), (
+            f"tick {stepped.ticks}"
+            )
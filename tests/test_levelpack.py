@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""Level packs decode the maps written into them."""
+
+import pytest
+
+from benchmarks import maps as generated
+from hungry_homer import levelpack, maps
+
+SHIPPED = maps.Maps("hungry_homer.level_maps", 32, 24)
+
+
+def test_round_trip(tmp_path):
+    """
+    A pack of the shipped maps and of generated ones (also bigger than
+    the window and with rows of different lengths) gives them padded
+    as text maps are.
+    """
+    written = [
+        *SHIPPED,
+        generated.arena(32, 24, 30, food=True),
+        generated.maze(63, 47, 40),
+        generated.generate(20, 10, watcher_count=5, bell_count=2),
+        [list("XXXX"), list("XH/"), list("X_*b<XXX")]
+        ]
+    path = tmp_path / "levels.hhlp"
+    levelpack.write(written, path)
+    pack = levelpack.LevelPack(path, 32, 24)
+    try:
+        assert len(pack) == len(written)
+        for i, map_ in enumerate(written):
+            assert pack[i] == maps.pad(map_, 32, 24)
+            width = max(len(row) for row in map_)
+            food_count = sum(row.count("*") for row in map_)
+            assert pack.name(i) == (
+                f"Level {i + 1}  ({width}x{len(map_)}, food {food_count})"
+                )
+        for i in range(len(SHIPPED)):
+            assert pack[i] == SHIPPED[i]
+        assert pack[-1] == pack[len(written) - 1]
+        with pytest.raises(IndexError):
+            pack[len(written)]
+    finally:
+        pack.close()
+
+
+def test_not_a_pack(tmp_path):
+    """Files of other formats (or versions) are refused."""
+    path = tmp_path / "levels.hhlp"
+    path.write_bytes(b"HHLP" + bytes(8) + b"XXXX")
+    with pytest.raises(ValueError):
+        levelpack.LevelPack(path, 32, 24)
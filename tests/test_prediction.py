@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""Predicted watchers are where stepping a simulation gets them."""
+
+import random
+
+import pytest
+
+from benchmarks import maps as generated
+from hungry_homer import maps, prediction, simulation
+
+TICKS = 3000
+SHIPPED = maps.Maps("hungry_homer.level_maps", 32, 24)
+
+
+def rows(*rows_):
+    """Returns a map of rows of symbols given from top to bottom."""
+    return [list(row) for row in reversed(rows_)]
+
+
+MAPS = {
+    **{f"level {i + 1}": SHIPPED[i] for i in range(len(SHIPPED))},
+    "linear pair": rows(
+        "XXXXXXXXXX",
+        "XH>    < X",
+        "XXXXXXXX/X"
+        ),
+    "circular pair": rows(
+        "XXXXXXXXXXXX",
+        "X          X",
+        "X XXXXXXXX X",
+        "X XXXXXXXX X",
+        "Xr       L X",
+        "XXXXXXXXXHX/"
+        ),
+    "ring": rows(
+        "XXXXXXXXXXXX",
+        "Xd     U   X",
+        "X XXXXXXXX X",
+        "X XXX<XXXX X",
+        "X    >     X",
+        "XXXXXXXXXHX/"
+        ),
+    "arena": generated.arena(32, 24, 30),
+    "maze": generated.maze(31, 23, 40)
+    }
+# watchers which meet a few times and then never again
+SETTLING = {
+    "circular and linear": rows(
+        "XXXXXXXXXX",
+        "X    X   X",
+        "X U      X",
+        "XX>X     X",
+        "X    X   X",
+        "XX   XX  X",
+        "H/XXXXXXXX"
+        ),
+    "three linear": rows(
+        "XXXXXXXXX",
+        "X     vXX",
+        "X    >X X",
+        "X  X   XX",
+        "XX> X   X",
+        "X    X  X",
+        "H/XXXXXXX"
+        )
+    }
+
+
+def stepped_states(map_, ticks=TICKS):
+    """
+    Returns the states of the watchers (as Predictor.state) in each tick
+    of a simulation with an invincible Homer standing still.
+    """
+    level = simulation.Simulation(map_)
+    level.objects["homer"][0].invincible = True
+    watchers = level.objects["watchers"]
+    states = []
+    for _ in range(ticks + 1):
+        states.append([
+            (watcher.x, watcher.y, watcher.direction_i,
+             getattr(watcher, "side", 0))
+            for watcher in watchers
+            ])
+        level.step()
+    return states
+
+
+@pytest.mark.parametrize("name", [*MAPS, *SETTLING])
+def test_states_as_stepping(name):
+    """Every watcher is predicted as stepped in every tick."""
+    map_ = {**MAPS, **SETTLING}[name]
+    states = stepped_states(map_)
+    predictor = prediction.Predictor(map_)
+    for tick, expected in enumerate(states):
+        for i, state in enumerate(expected):
+            assert predictor.state(i, tick) == state, (
+                f"watcher {i} in tick {tick}"
+                )
+
+
+@pytest.mark.parametrize("name", ["circular pair", "ring", "maze"])
+def test_queries_in_any_order(name):
+    """
+    Queries of random ticks (after paths from later meetings are traced
+    already) give the same states.
+    """
+    states = stepped_states(MAPS[name])
+    predictor = prediction.Predictor(MAPS[name])
+    ticks = list(range(len(states)))
+    random.Random(0).shuffle(ticks)
+    for tick in ticks:
+        assert [
+            predictor.state(i, tick) for i in range(len(states[tick]))
+            ] == states[tick], f"tick {tick}"
+
+
+@pytest.mark.parametrize("name", SETTLING)
+def test_phase(name):
+    """
+    Once the watchers are known to repeat, ticks are mapped to the first
+    ones with the same states (after they met for the last time).
+    """
+    states = stepped_states(SETTLING[name])
+    predictor = prediction.Predictor(SETTLING[name])
+    predictor.phase(TICKS)
+    assert predictor.period is not None and predictor.met > 0
+    assert predictor.start >= predictor.met
+    for tick, expected in enumerate(states):
+        phase = predictor.phase(tick)
+        if tick < predictor.start:
+            assert phase == tick
+        else:
+            assert predictor.start <= phase < (
+                predictor.start + predictor.period
+                )
+        assert states[phase] == expected, f"tick {tick}"
+
+
+def test_chasing_watchers_rejected():
+    """Chasing watchers react to Homer, so they can't be predicted."""
+    with pytest.raises(ValueError):
+        prediction.Predictor(rows(
+            "XXXXXX",
+            "XH c X",
+            "XXXX/X"
+            ))
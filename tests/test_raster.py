@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+"""Coverage of cells by object types."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from benchmarks import maps as generated
+from hungry_homer import raster, simulation
+
+
+def test_overlapping_watchers_cover_whole_cell():
+    """Two watchers in one cell cover it completely, not more."""
+    level = simulation.Simulation(generated.arena(8, 8, 0))
+    level.objects["watchers"] = [
+        simulation.LinearWatcher(level, (3, 3), direction_i=0)
+        for _ in range(2)
+        ]
+    grid = raster.Rasterizer(level).channels()
+    assert grid[raster.CHANNELS.index("watcher"), 3, 3] == 255
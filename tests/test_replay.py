@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""Replays are saved, loaded and verified."""
+
+import json
+
+import pytest
+
+from benchmarks import maps as generated
+from hungry_homer import env, levelpack, maps, replay, simulation
+from tests import golden
+
+SHIPPED = maps.Maps(env.MAPS_LOCATION, env.GRID_WIDTH, env.GRID_HEIGHT)
+
+
+def recorded(maps_, level_index, runs):
+    """
+    Returns a replay recorded tick by tick as the game does (with
+    the hash of the final state).
+    """
+    map_ = maps_[level_index]
+    result = replay.Replay(level_index, map_hash=replay.map_hash(map_))
+    level = simulation.Simulation(map_)
+    for direction_i in golden.directions(runs):
+        result.record(direction_i)
+        level.step(direction_i)
+    result.state_hash = replay.state_hash(level)
+    return result
+
+
+def test_record():
+    """Recorded ticks are run-length encoded and can be unrecorded."""
+    result = replay.Replay(0)
+    for direction_i in (1, 1, 1, 4, 2, 2):
+        result.record(direction_i)
+    assert result.runs == [[1, 3], [4, 1], [2, 2]]
+    result.unrecord()
+    result.unrecord()
+    assert result.runs == [[1, 3], [4, 1]]
+    assert result.ticks() == 4
+    assert list(result.directions()) == [1, 1, 1, 4]
+
+
+def test_save_and_load(tmp_path):
+    """A loaded replay is the same as the saved one."""
+    saved = recorded(SHIPPED, 2, golden.random_runs(1, 1000))
+    path = tmp_path / "replay.json"
+    saved.save(path)
+    loaded = replay.Replay.load(path)
+    for field in (
+            "level_index", "runs", "version", "state_hash", "map_hash"
+            ):
+        assert getattr(loaded, field) == getattr(saved, field)
+
+
+@pytest.mark.parametrize("level_index", range(len(SHIPPED)))
+def test_verify(level_index):
+    """
+    A replay verifies, it doesn't if its inputs or the version of
+    the rules differ.
+    """
+    result = recorded(SHIPPED, level_index, golden.random_runs(2, 2000))
+    assert replay.verify(result)
+    assert replay.state_hash(replay.play(result)) == result.state_hash
+    result.runs[len(result.runs) // 2][1] += 1
+    assert not replay.verify(result)
+    result.runs[len(result.runs) // 2][1] -= 1
+    result.version += 1
+    assert not replay.verify(result)
+
+
+def test_golden_traces():
+    """
+    Replays of the golden traces verify (also fast-forwarded), those
+    of solutions complete the levels.
+    """
+    random_inputs = [golden.random_runs(seed, 2400) for seed in (1, 2)]
+    for trace in golden.load():
+        result = recorded(SHIPPED, trace["level_index"], trace["inputs"])
+        assert replay.verify(result)
+        if trace["inputs"] not in random_inputs:
+            assert replay.play(result).completed
+
+
+def test_replay_of_pack(tmp_path):
+    """
+    A replay of a level of a pack verifies in the pack, not in the
+    levels of the game (as it would fail only because of another map).
+    """
+    path = tmp_path / "levels.hhlp"
+    levelpack.write(
+        [generated.arena(32, 24, 10, seed) for seed in range(4)], path
+        )
+    pack = levelpack.LevelPack(path, env.GRID_WIDTH, env.GRID_HEIGHT)
+    try:
+        result = recorded(pack, 1, golden.random_runs(1, 1000))
+        assert replay.verify(result, pack)
+        with pytest.raises(ValueError):
+            replay.verify(result)
+        with pytest.raises(ValueError):
+            replay.play(result, SHIPPED)
+    finally:
+        pack.close()
+
+
+def test_replay_without_map_hash(tmp_path):
+    """Replays saved without the hash of the map are still played."""
+    saved = recorded(SHIPPED, 1, golden.random_runs(1, 500))
+    path = tmp_path / "replay.json"
+    saved.save(path)
+    with open(path) as file:
+        data = json.load(file)
+    del data["map"]
+    with open(path, "w") as file:
+        json.dump(data, file)
+    loaded = replay.Replay.load(path)
+    assert loaded.map_hash is None
+    assert replay.verify(loaded)
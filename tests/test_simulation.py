@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+"""The simulation plays the shipped maps as the sprite-based level did."""
+
+import pytest
+
+from hungry_homer import maps, simulation
+from tests import golden
+
+TRACES = golden.load()
+
+
+@pytest.mark.parametrize(
+    "trace", TRACES,
+    ids=[f"level {trace['level_index'] + 1}" for trace in TRACES]
+    )
+def test_golden_trace(trace):
+    """Every tick digests the same as the golden trace."""
+    maps_ = maps.Maps("hungry_homer.level_maps", 32, 24)
+    level = simulation.Simulation(maps_[trace["level_index"]])
+    for tick, (direction_i, expected) in enumerate(zip(
+            golden.directions(trace["inputs"]), trace["digests"]
+            ), 1):
+        level.step(direction_i)
+        # (restarting the level may replace the objects)
+        objects = level.objects
+        assert golden.digest(
+            level.completed, objects["homer"][0], objects["watchers"],
+            objects["collectibles"].values(), objects["gate"][0]
+            ) == expected, f"tick {tick}"
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+"""Snapshots restored into a simulation go on as the original one."""
+
+import pytest
+
+from benchmarks import maps as generated
+from hungry_homer import maps, replay, simulation, snapshot
+from tests import golden
+
+SHIPPED = maps.Maps("hungry_homer.level_maps", 32, 24)
+MAPS = {
+    **{f"level {i + 1}": SHIPPED[i] for i in range(len(SHIPPED))},
+    "arena": generated.arena(32, 24, 30)
+    }
+
+
+@pytest.mark.parametrize("name", MAPS)
+def test_round_trip(name):
+    """
+    A snapshot restored into another simulation is taken the same and
+    it then goes on in the same states as the original one.
+    """
+    level = simulation.Simulation(MAPS[name])
+    restored = None
+    runs = golden.random_runs(1, 3000)
+    for i in range(0, len(runs), 5):
+        for direction_i in golden.directions(runs[i:(i + 5)]):
+            level.step(direction_i)
+            if restored is not None:
+                restored.step(direction_i)
+        if restored is not None:
+            assert replay.state_hash(restored) == replay.state_hash(level)
+        saved = snapshot.take(level)
+        restored = simulation.Simulation(MAPS[name])
+        snapshot.restore(restored, saved)
+        assert snapshot.take(restored) == saved
+
+
+def test_off_map_positions():
+    """
+    Restoring keeps map positions also after Homer flies off the side of
+    the map (chasing watchers go after his map position).
+    """
+    # (from bottom to top, the gate is on the right edge)
+    map_ = [list(row) for row in ("XXXXXX", "XH_  /", "Xc   X", "XXXXXX")]
+    level = simulation.Simulation(map_)
+    restored = simulation.Simulation(map_)
+    for _ in range(300):
+        level.step(1)
+        snapshot.restore(restored, snapshot.take(level))
+        for first, second in zip(
+                level.objects["homer"] + level.objects["watchers"],
+                restored.objects["homer"] + restored.objects["watchers"]
+                ):
+            assert second.map_position == first.map_position
+            assert second.map_index == first.map_index
+    homer = level.objects["homer"][0]
+    assert homer.won and homer.map_position[0] >= len(map_[0])